@@ -0,0 +1,257 @@
+import json
+import time
+import uuid
+import redis
+from config import settings
+from logger import log
+
+KEY_PREFIX = "batch"
+# Celery message priority per batch level (Redis transport: 0 runs first).
+# Interactive /upload and /process_url jobs are sent with priority 0.
+PRIORITIES = {"high": 3, "normal": 6, "low": 9}
+# Jobs a batch may release per scheduling round (fair share, weighted by level)
+SHARE = {"high": 3, "normal": 2, "low": 1}
+INT_FIELDS = ("total", "done", "failed")
+FLOAT_FIELDS = ("created", "started", "finished")
+
+def _member(job):
+    """A job's entry in batch:<id>:running."""
+    return job.get("filename") or f"url:{job['url']}"
+
+def dedupe_jobs(jobs):
+    """
+    Drops repeated job specs (same filename or URL), keeping the first. Two of
+    them would share one running-set member, so the second finish() would not
+    be counted and the batch would never complete.
+    """
+    seen = set()
+    unique = []
+    for job in jobs:
+        if _member(job) not in seen:
+            seen.add(_member(job))
+            unique.append(job)
+    return unique
+
+class BatchScheduler:
+    """
+    Batch / folder ingestion with fair-share scheduling on top of Celery.
+
+    Jobs of a batch are not queued in Celery up front: they wait in Redis and
+    are released a few at a time, so the pipeline queues never hold more than
+    BATCH_MAX_RUNNING batch jobs. A 500-video backfill therefore cannot push
+    interactive uploads (enqueued directly, highest priority) to the back of
+    the line, and several batches share the slots round-robin (least recently
+    served first), each taking up to SHARE[priority] jobs per turn.
+
+    - batch:<id>           hash: name, priority, total, done, failed, created,
+                           started, finished, cancelled
+    - batch:<id>:pending   list of job specs (JSON) not yet released
+    - batch:<id>:running   set of released jobs (filename, or url:<url> until downloaded)
+    - batch:active         sorted set of batches with pending jobs (score = last served)
+    - batch:busy           set of batches with released, unfinished jobs
+    - batch:index          sorted set of all batches (score = created)
+    - batch:job:<filename> batch id, so the worker can report completion
+    Slots are freed by finish(), which the worker calls when a job ends.
+    Folder imports reserve() their file count up front, so `total` is known
+    before the files trickle in and the batch cannot look finished early.
+    """
+    def __init__(self):
+        self.redis = redis.Redis(host=settings.REDIS_HOST, port=6379, db=0, decode_responses=True)
+
+    def _key(self, batch_id, suffix=None):
+        return f"{KEY_PREFIX}:{batch_id}" + (f":{suffix}" if suffix else "")
+
+    def _job_key(self, filename):
+        return f"{KEY_PREFIX}:job:{filename}"
+
+    # --- Batches ---
+    def create(self, name=None, priority="normal"):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}' (expected: {', '.join(PRIORITIES)})")
+        batch_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.hset(self._key(batch_id), mapping={
+            "id": batch_id, "name": name or batch_id, "priority": priority, "created": now,
+            **{field: 0 for field in INT_FIELDS},
+        })
+        pipe.zadd(f"{KEY_PREFIX}:index", {batch_id: now})
+        pipe.execute()
+        return batch_id
+
+    def add_jobs(self, batch_id, jobs, reserved=False):
+        """
+        Appends job specs ({"filename": ...} or {"url": ...}) and releases what
+        fits. reserved=True: already counted in `total` by reserve().
+        """
+        unique = dedupe_jobs(jobs)
+        if len(unique) < len(jobs):
+            log.warning(f"⚠️ Batch {batch_id}: ignored {len(jobs) - len(unique)} duplicate jobs")
+        jobs = unique
+        if not jobs:
+            return
+        pipe = self.redis.pipeline()
+        pipe.rpush(self._key(batch_id, "pending"), *[json.dumps(job) for job in jobs])
+        if not reserved:
+            pipe.hincrby(self._key(batch_id), "total", len(jobs))
+        pipe.zadd(f"{KEY_PREFIX}:active", {batch_id: 0}, nx=True)
+        pipe.execute()
+        self.dispatch()
+
+    def reserve(self, batch_id, count):
+        """Counts jobs that will be added later; a negative count gives back what never came."""
+        self.redis.hincrby(self._key(batch_id), "total", count)
+        if count < 0:
+            self._check_finished(batch_id)
+
+    def fail_reserved(self, batch_id):
+        """A reserved job that could not be created (e.g. its import failed) counts as failed."""
+        self.redis.hincrby(self._key(batch_id), "failed", 1)
+        self._check_finished(batch_id)
+
+    def cancelled(self, batch_id):
+        return bool(int(self.redis.hget(self._key(batch_id), "cancelled") or 0))
+
+    def cancel(self, batch_id):
+        """Drops jobs that were not released yet; running ones finish normally."""
+        dropped = self.redis.llen(self._key(batch_id, "pending"))
+        pipe = self.redis.pipeline()
+        pipe.delete(self._key(batch_id, "pending"))
+        pipe.zrem(f"{KEY_PREFIX}:active", batch_id)
+        pipe.hset(self._key(batch_id), "cancelled", 1)
+        pipe.hincrby(self._key(batch_id), "total", -dropped)
+        pipe.execute()
+        if not self.redis.scard(self._key(batch_id, "running")):
+            self.redis.hsetnx(self._key(batch_id), "finished", time.time())
+        return dropped
+
+    def get(self, batch_id):
+        data = self.redis.hgetall(self._key(batch_id))
+        if not data:
+            return None
+        for field in INT_FIELDS:
+            data[field] = int(data.get(field, 0))
+        for field in FLOAT_FIELDS:
+            if field in data:
+                data[field] = float(data[field])
+        data["cancelled"] = bool(int(data.get("cancelled", 0)))
+        data["pending"] = self.redis.llen(self._key(batch_id, "pending"))
+        running = self.redis.smembers(self._key(batch_id, "running"))
+        data["running"] = len(running)
+        data.update(self._throughput(data, running))
+        return data
+
+    def list(self, limit=50):
+        ids = self.redis.zrevrange(f"{KEY_PREFIX}:index", 0, limit - 1)
+        return [b for b in (self.get(batch_id) for batch_id in ids) if b]
+
+    def _throughput(self, data, running):
+        """Aggregate progress (finished jobs + partial progress of running ones), rate and ETA."""
+        files = [job for job in running if not job.startswith("url:")]
+        partial = 0
+        if files:
+            pipe = self.redis.pipeline()
+            for filename in files:
+                pipe.hget(f"progress:{filename}", "percent")
+            partial = sum(max(0, int(p or 0)) for p in pipe.execute()) / 100
+        finished = data["done"] + data["failed"]
+        elapsed = (data.get("finished") or time.time()) - data["started"] if data.get("started") else 0
+        per_hour = data["done"] / elapsed * 3600 if elapsed > 0 else 0.0
+        remaining = data["total"] - finished
+        return {
+            "percent": round(100 * (finished + partial) / data["total"], 1) if data["total"] else 0.0,
+            "videos_per_hour": round(per_hour, 1),
+            "eta_seconds": round(remaining / per_hour * 3600) if per_hour and remaining else None,
+        }
+
+    # --- Scheduling ---
+    def running_total(self):
+        ids = self.redis.smembers(f"{KEY_PREFIX}:busy")
+        pipe = self.redis.pipeline()
+        for batch_id in ids:
+            pipe.scard(self._key(batch_id, "running"))
+        return sum(pipe.execute()) if ids else 0
+
+    def pending_total(self):
+        ids = [batch_id for batch_id, _ in self.redis.zrange(f"{KEY_PREFIX}:active", 0, -1, withscores=True)]
+        pipe = self.redis.pipeline()
+        for batch_id in ids:
+            pipe.llen(self._key(batch_id, "pending"))
+        return sum(pipe.execute()) if ids else 0
+
+    def dispatch(self):
+        """Releases pending jobs into Celery while fewer than BATCH_MAX_RUNNING are in flight."""
+        with self.redis.lock(f"{KEY_PREFIX}:dispatch-lock", timeout=30, blocking_timeout=10):
+            free = settings.BATCH_MAX_RUNNING - self.running_total()
+            while free > 0:
+                active = self.redis.zrange(f"{KEY_PREFIX}:active", 0, -1, withscores=True)
+                if not active:
+                    break
+                levels = {batch_id: self.redis.hget(self._key(batch_id), "priority") or "normal" for batch_id, _ in active}
+                # Least recently served first (ties: higher priority); SHARE weights the turns
+                order = sorted(active, key=lambda item: (item[1], PRIORITIES[levels[item[0]]]))
+                released = 0
+                for batch_id, _ in order:
+                    for _ in range(min(SHARE[levels[batch_id]], free)):
+                        raw = self.redis.lpop(self._key(batch_id, "pending"))
+                        if raw is None:
+                            self.redis.zrem(f"{KEY_PREFIX}:active", batch_id)
+                            break
+                        self._release(batch_id, json.loads(raw), levels[batch_id])
+                        free -= 1
+                        released += 1
+                    self.redis.zadd(f"{KEY_PREFIX}:active", {batch_id: time.time()}, xx=True)
+                    if free <= 0:
+                        break
+                if not released:
+                    break
+
+    def _release(self, batch_id, job, level):
+        from tasks import enqueue_video, enqueue_download
+        pipe = self.redis.pipeline()
+        pipe.sadd(self._key(batch_id, "running"), _member(job))
+        pipe.sadd(f"{KEY_PREFIX}:busy", batch_id)
+        pipe.hsetnx(self._key(batch_id), "started", time.time())
+        if "filename" in job:
+            pipe.set(self._job_key(job["filename"]), batch_id)
+        pipe.execute()
+        if "filename" in job:
+            enqueue_video(job["filename"], priority=PRIORITIES[level])
+        else:
+            enqueue_download(job["url"], batch_id=batch_id, priority=PRIORITIES[level])
+
+    def downloaded(self, batch_id, url, filename):
+        """A URL job became a file job (download finished); its slot carries over."""
+        pipe = self.redis.pipeline()
+        pipe.srem(self._key(batch_id, "running"), f"url:{url}")
+        pipe.sadd(self._key(batch_id, "running"), filename)
+        pipe.set(self._job_key(filename), batch_id)
+        pipe.execute()
+
+    def finish(self, filename=None, ok=True, batch_id=None, url=None):
+        """Called by the worker when a job ends (ready, failed or cancelled). No-op for non-batch jobs."""
+        member = filename if filename else f"url:{url}"
+        batch_id = batch_id or (self.redis.get(self._job_key(filename)) if filename else None)
+        if not batch_id:
+            return
+        if not self.redis.srem(self._key(batch_id, "running"), member):
+            return  # Already counted (e.g. a retried finalize)
+        pipe = self.redis.pipeline()
+        pipe.hincrby(self._key(batch_id), "done" if ok else "failed", 1)
+        if filename:
+            pipe.delete(self._job_key(filename))
+        pipe.execute()
+
+        if not self.redis.scard(self._key(batch_id, "running")):
+            self.redis.srem(f"{KEY_PREFIX}:busy", batch_id)
+        self._check_finished(batch_id)
+        self.dispatch()
+
+    def _check_finished(self, batch_id):
+        batch = self.redis.hmget(self._key(batch_id), "total", "done", "failed")
+        total, done, failed = (int(v or 0) for v in batch)
+        if done + failed >= total:
+            self.redis.hset(self._key(batch_id), "finished", time.time())
+            log.info(f"📦 Batch {batch_id} finished: {done} ready, {failed} failed")
+
+batches = BatchScheduler()
@@ -0,0 +1,103 @@
+"""
+Qdrant ingestion throughput for one video: legacy per-chunk PointStruct
+upserts (wait=True) vs the bulk path (NumPy matrix + payload columns,
+parallel wait=False batches, one barrier at the end).
+
+Usage (from backend/):
+    python -m benchmarks.bench_bulk_ingest [-n 10000] [--dim 768] [--chunk 256]
+
+Uses a scratch collection (dropped afterwards) with the configured HNSW /
+quantization profile; points/sec includes the final barrier, i.e. the time
+until every point is searchable.
+"""
+import argparse
+import time
+import numpy as np
+from qdrant_client.http import models
+from db import db, hnsw_config, quantization_config
+from logger import log
+
+COLLECTION = "bench_bulk_ingest"
+
+
+def recreate(dim):
+    db.client.delete_collection(COLLECTION)
+    db.client.create_collection(
+        collection_name=COLLECTION,
+        vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE),
+        hnsw_config=hnsw_config(),
+        quantization_config=quantization_config()
+    )
+
+
+def synthetic_video(n, dim, video_id):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    timestamps = np.arange(n, dtype=np.float64) * 0.5
+    ids = [f"{video_id}_{t:.2f}" for t in timestamps]
+    payload = {
+        "video_id": video_id,
+        "timestamp": timestamps,
+        "end": timestamps + 0.5,
+        "frame_path": [f"{video_id}/frames/frame_{i:06d}.jpg" for i in range(n)],
+    }
+    return ids, vectors, payload
+
+
+def legacy(ids, vectors, payload, chunk):
+    """Previous add_frames: per-item length check, .tolist(), blocking upsert."""
+    rows = [{"video_id": payload["video_id"], "timestamp": float(t), "end": float(e), "frame_path": p}
+            for t, e, p in zip(payload["timestamp"], payload["end"], payload["frame_path"])]
+    for start in range(0, len(ids), chunk):
+        data = [{"id": ids[i], "embedding": vectors[i].tolist(), "metadata": rows[i]}
+                for i in range(start, min(start + chunk, len(ids)))]
+        for item in data:
+            if len(item["embedding"]) != vectors.shape[1]:
+                raise ValueError("bad dim")
+        points = [models.PointStruct(id=db._to_uuid(item["id"]), vector=item["embedding"], payload=item["metadata"])
+                  for item in data]
+        db.client.upsert(collection_name=COLLECTION, points=points)
+
+
+def bulk(ids, vectors, payload, chunk, video_id):
+    for start in range(0, len(ids), chunk):
+        end = start + chunk
+        columns = {k: (v[start:end] if not isinstance(v, str) else v) for k, v in payload.items()}
+        db.upload_vectors(COLLECTION, video_id, ids[start:end], vectors[start:end], columns, dim=vectors.shape[1])
+    db.barrier(COLLECTION, video_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", type=int, default=10_000, help="Frames in the synthetic video")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--chunk", type=int, default=256, help="Points handed over per call (UPSERT_CHUNK)")
+    args = parser.parse_args()
+
+    video_id = "bench_video"
+    ids, vectors, payload = synthetic_video(args.n, args.dim, video_id)
+    log.info(f"📦 {args.n} frames x {args.dim}d, chunk {args.chunk}")
+
+    rows = []
+    try:
+        for name, run in (("legacy upsert", lambda: legacy(ids, vectors, payload, args.chunk)),
+                          ("bulk + barrier", lambda: bulk(ids, vectors, payload, args.chunk, video_id))):
+            recreate(args.dim)
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            stored = db.client.count(COLLECTION, exact=True).count
+            rows.append((name, elapsed, args.n / elapsed, stored))
+    finally:
+        db.client.delete_collection(COLLECTION)
+
+    log.info(f"📊 {'path':<15} {'seconds':>8} {'points/s':>10} {'stored':>8}")
+    for name, elapsed, rate, stored in rows:
+        log.info(f"   {name:<15} {elapsed:>8.2f} {rate:>10.0f} {stored:>8}")
+    if len(rows) == 2:
+        log.info(f"   speedup: {rows[1][2] / rows[0][2]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+CLIP backend parity + throughput: PyTorch (reference) vs ONNX Runtime fp32 / int8.
+
+Usage (from backend/):
+    python -m benchmarks.bench_clip_backend [--images frames_dir] [-n 64] [--batch 16] [--threads 0]
+
+Parity is the cosine similarity of each backend's image / text embeddings
+against PyTorch on the same inputs; the run exits non-zero if any minimum
+falls below clip_backend.PARITY_WARN. Without --images, random tensors are
+used (fine for throughput, pessimistic for int8 parity).
+"""
+import argparse
+import sys
+import time
+import torch
+from pathlib import Path
+from PIL import Image
+from clip_backend import TorchCLIP, OnnxCLIP, check_parity, PARITY_WARN
+from logger import log
+
+MODEL = "ViT-L/14"
+CAPTIONS = ["a person talking to the camera", "a slide with a bar chart", "a dog running on grass",
+            "source code in an editor", "a crowded city street at night", "a whiteboard diagram"]
+
+
+def load_images(backend, folder, n):
+    if folder:
+        paths = sorted(Path(folder).glob("*.jpg"))[:n]
+        return torch.stack([backend.preprocess(Image.open(p)) for p in paths])
+    return torch.randn(n, 3, backend.input_size, backend.input_size)
+
+
+def throughput(fn, items, batch):
+    fn(items[:batch])  # warmup
+    start = time.perf_counter()
+    for i in range(0, len(items), batch):
+        fn(items[i : i + batch])
+    return len(items) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=Path, help="Folder of .jpg frames (e.g. TEMP_DIR/<video_id>)")
+    parser.add_argument("-n", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    reference = TorchCLIP(MODEL, "cpu")
+    images = load_images(reference, args.images, args.n)
+    texts = [CAPTIONS[i % len(CAPTIONS)] + f" #{i}" for i in range(args.n)]
+    log.info(f"📦 {len(images)} images, {len(texts)} texts, batch {args.batch}")
+
+    backends = [("torch fp32", reference)]
+    for precision in ("fp32", "int8"):
+        backends.append((f"onnx {precision}", OnnxCLIP(MODEL, precision, args.threads)))
+
+    rows = []
+    ok = True
+    for name, backend in backends:
+        img_rate = throughput(backend.encode_images, images, args.batch)
+        txt_rate = throughput(backend.encode_texts, texts, args.batch)
+        parity = check_parity(reference, backend, images, texts)
+        img_min, txt_min = float(parity["image"].min()), float(parity["text"].min())
+        ok &= min(img_min, txt_min) >= PARITY_WARN
+        rows.append((name, img_rate, txt_rate, img_min, float(parity["image"].mean()), txt_min))
+
+    log.info(f"📊 {'backend':<11} {'img/s':>8} {'txt/s':>8} {'img cos min':>12} {'img cos avg':>12} {'txt cos min':>12}")
+    for name, img_rate, txt_rate, img_min, img_avg, txt_min in rows:
+        log.info(f"   {name:<11} {img_rate:>8.1f} {txt_rate:>8.1f} {img_min:>12.4f} {img_avg:>12.4f} {txt_min:>12.4f}")
+    log.info(f"   parity (min cosine >= {PARITY_WARN}): {'✅' if ok else '⚠️ FAILED'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Wall-time benchmark: two-pass (PySceneDetect scan + cv2 seeks) vs single-pass
+keyframe extraction.
+
+Usage (from backend/):
+    python -m benchmarks.bench_frame_extraction /path/to/video.mp4 [--repeat 3]
+
+Only the decode/capture stage is timed; no JPEGs are written or uploaded.
+Parity is checked on timestamps AND pixels: single-pass picks the midpoint
+of short scenes from sparse candidates (within 1/8 s of the exact frame), so
+each keyframe pair is compared by mean absolute difference on a small
+grayscale thumbnail.
+"""
+import argparse
+import shutil
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+from config import settings
+from ingest import VideoProcessor
+from logger import log
+
+THUMB_WIDTH = 160        # Pixel comparison resolution
+PIXEL_TOLERANCE = 8.0    # Max mean absolute difference (0-255) for a keyframe pair to count as the same
+
+
+def thumbnail(frame_small):
+    h, w = frame_small.shape[:2]
+    gray = cv2.cvtColor(frame_small, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (THUMB_WIDTH, max(1, round(h * THUMB_WIDTH / w))), interpolation=cv2.INTER_AREA)
+
+
+def run_mode(processor, mode, repeat):
+    timings = []
+    frames = []
+    for _ in range(repeat):
+        frames = []
+        emit = lambda frame_small, target_ts: frames.append(
+            {"timestamp": round(target_ts, 2), "thumb": thumbnail(frame_small)})
+        start = time.perf_counter()
+        if mode == "two_pass":
+            processor._extract_two_pass(emit)
+        else:
+            processor._extract_single_pass(emit)
+        timings.append(time.perf_counter() - start)
+    return min(timings), frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    filename = f"bench_{args.video.stem}{args.video.suffix}"
+    local_copy = settings.TEMP_DIR / filename
+    shutil.copy(args.video, local_copy)
+    try:
+        processor = VideoProcessor(filename)
+        t_two, frames_two = run_mode(processor, "two_pass", args.repeat)
+        t_one, frames_one = run_mode(processor, "single_pass", args.repeat)
+    finally:
+        local_copy.unlink(missing_ok=True)
+
+    same = [f["timestamp"] for f in frames_two] == [f["timestamp"] for f in frames_one]
+    diffs = np.array([np.abs(a["thumb"].astype(np.int16) - b["thumb"].astype(np.int16)).mean()
+                      for a, b in zip(frames_two, frames_one)])
+    off = int(np.count_nonzero(diffs > PIXEL_TOLERANCE))
+    log.info(f"📊 {args.video.name} (best of {args.repeat})")
+    log.info(f"   two_pass:    {t_two:8.2f}s  ({len(frames_two)} frames)")
+    log.info(f"   single_pass: {t_one:8.2f}s  ({len(frames_one)} frames)")
+    log.info(f"   speedup:     {t_two / t_one:8.2f}x")
+    log.info(f"   manifest timestamps identical: {'✅' if same else '❌'}")
+    if len(diffs):
+        log.info(f"   pixel MAD per keyframe: mean {diffs.mean():.2f}, max {diffs.max():.2f} "
+                 f"(index {int(diffs.argmax())}), {off} above {PIXEL_TOLERANCE}")
+    log.info(f"   frames match: {'✅' if same and not off else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
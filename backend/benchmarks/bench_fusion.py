@@ -0,0 +1,86 @@
+"""
+Micro-benchmark: fusion.TemporalFusion vs the original dict-based RRF loop
+from VideoSearchEngine.search, on synthetic hit lists.
+
+Usage (from backend/):
+    python -m benchmarks.bench_fusion [--videos 20] [--repeat 200]
+
+Needs no running services. Also reports how often the legacy loop merged
+hits from different videos that share the same second.
+"""
+import argparse
+import random
+import timeit
+from fusion import TemporalFusion
+
+
+def legacy_fuse(v_results, t_results, k):
+    """The pre-fusion.py implementation (URL signing stripped)."""
+    fusion_map = {}
+    RRF_K = 60
+
+    def add_score(ts, vid, score, meta, type_label, text=""):
+        key = int(ts)
+        if key not in fusion_map:
+            s3_key = meta.get('frame_path', '') or f"{vid}/frames/{meta.get('filename','')}"
+            fusion_map[key] = {"score": 0, "video_id": vid, "timestamp": ts, "frame_path": s3_key,
+                               "type": type_label, "context": text or "Visual Match"}
+        fusion_map[key]["score"] += score
+        if type_label == "🗣️ Speech" and "Visual" in fusion_map[key]["type"]:
+            fusion_map[key]["type"] = "✨ Hybrid"
+            fusion_map[key]["context"] += f" + {text}"
+
+    for rank, hit in enumerate(v_results):
+        add_score(hit['metadata']['timestamp'], hit['metadata']['video_id'], 2.0 / (RRF_K + rank + 1), hit['metadata'], "📸 Visual")
+    for rank, hit in enumerate(t_results):
+        rrf_score = 1.5 / (RRF_K + rank + 1)
+        ts = hit['metadata']['timestamp']
+        found_match = False
+        for offset in range(-2, 3):
+            if int(ts + offset) in fusion_map:
+                add_score(ts + offset, hit['metadata']['video_id'], rrf_score, hit['metadata'], "🗣️ Speech", f"Said: '{hit['metadata']['text']}...'")
+                found_match = True
+                break
+        if not found_match:
+            add_score(ts, hit['metadata']['video_id'], rrf_score, hit['metadata'], "🗣️ Speech", f"Said: '{hit['metadata']['text']}...'")
+    return sorted(fusion_map.values(), key=lambda x: x["score"], reverse=True)[:k]
+
+
+def synthetic_hits(n, videos, rng):
+    vision = [{"metadata": {"video_id": f"vid{rng.randrange(videos)}", "timestamp": round(rng.uniform(0, 3600), 2),
+                            "frame_path": "x.jpg"}} for _ in range(n)]
+    text = [{"metadata": {"video_id": f"vid{rng.randrange(videos)}", "timestamp": round(rng.uniform(0, 3600), 2),
+                          "text": "some words", "end": 0.0}} for _ in range(n)]
+    return vision, text
+
+
+def cross_video_merges(v_hits):
+    seen = {}
+    merges = 0
+    for hit in v_hits:
+        key = int(hit["metadata"]["timestamp"])
+        if key in seen and seen[key] != hit["metadata"]["video_id"]:
+            merges += 1
+        seen.setdefault(key, hit["metadata"]["video_id"])
+    return merges
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    fusion = TemporalFusion()
+    print(f"{'k':>6} {'hits/modality':>14} {'legacy µs':>12} {'vectorized µs':>14} {'speedup':>8} {'collisions':>11}")
+    for k in (5, 15, 50, 150, 500, 1500):
+        v_hits, t_hits = synthetic_hits(k * 3, args.videos, rng)
+        t_legacy = timeit.timeit(lambda: legacy_fuse(v_hits, t_hits, k), number=args.repeat) / args.repeat
+        t_new = timeit.timeit(lambda: fusion.fuse(v_hits, t_hits, k), number=args.repeat) / args.repeat
+        print(f"{k:>6} {k * 3:>14} {t_legacy * 1e6:>12.1f} {t_new * 1e6:>14.1f} "
+              f"{t_legacy / t_new:>8.2f} {cross_video_merges(v_hits):>11}")
+
+
+if __name__ == "__main__":
+    main()
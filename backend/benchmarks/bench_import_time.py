@@ -0,0 +1,67 @@
+"""
+Import-time profile of the API (python -X importtime), plus a guard that
+heavy ML modules stay out of the API's import path.
+
+Usage (from backend/):
+    python -m benchmarks.bench_import_time [--module main] [--top 15]
+
+Runs the import in a fresh interpreter, prints total wall time, the slowest
+top-level packages (cumulative) and exits non-zero if any module in HEAVY
+was imported eagerly.
+"""
+import argparse
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from logger import log
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# Must only load on first use (search engine / worker / download)
+HEAVY = ["torch", "clip", "sentence_transformers", "faster_whisper", "cv2", "scenedetect", "yt_dlp", "onnxruntime", "worker"]
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(module):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=BACKEND_DIR, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.splitlines()[-5:])
+        raise RuntimeError(f"import {module} failed:\n{tail}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            self_us, cumulative_us, indent, name = m.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return wall, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    wall, rows = profile(args.module)
+    imported = {name for name, *_ in rows}
+    top_level = sorted((r for r in rows if "." not in r[0]), key=lambda r: r[2], reverse=True)
+
+    log.info(f"📊 import {args.module}: {wall:.2f}s wall, {len(rows)} modules")
+    log.info(f"   {'package':<28} {'cumulative ms':>14} {'self ms':>9}")
+    for name, self_us, cumulative_us, _ in top_level[: args.top]:
+        log.info(f"   {name:<28} {cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}")
+
+    eager = [name for name in HEAVY if name in imported]
+    if eager:
+        log.warning(f"⚠️ Heavy modules imported eagerly: {', '.join(eager)}")
+        sys.exit(1)
+    log.info("   heavy modules deferred: ✅")
+
+
+if __name__ == "__main__":
+    main()
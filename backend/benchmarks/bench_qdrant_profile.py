@@ -0,0 +1,154 @@
+"""
+Recall vs latency vs memory of Qdrant collection profiles (HNSW m/ef,
+scalar / binary quantization, on-disk vectors).
+
+Usage (from backend/):
+    python -m benchmarks.bench_qdrant_profile [--source vision_frames] [-n 50000] [-q 200] [-k 10]
+
+Points are copied from --source (real CLIP frames) when given, otherwise
+synthetic clustered 768-d vectors are generated. Each profile gets its own
+scratch collection; recall@k is measured against exact (brute-force) search.
+RAM is estimated from vector count: originals (unless on disk) + quantized
+copy + HNSW links.
+"""
+import argparse
+import time
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from config import settings
+from logger import log
+
+SCRATCH_PREFIX = "bench_profile_"
+INDEX_TIMEOUT = 600
+
+SCALAR = models.ScalarQuantization(
+    scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+)
+BINARY = models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+
+# name, m, ef_construct, search ef, quantization, on_disk, rescore, oversampling
+PROFILES = [
+    ("baseline", 16, 100, None, None, False, False, 1.0),
+    ("ef256", 16, 100, 256, None, False, False, 1.0),
+    ("m32", 32, 200, 128, None, False, False, 1.0),
+    ("scalar", 16, 100, None, SCALAR, False, False, 1.0),
+    ("scalar+rescore", 16, 100, None, SCALAR, True, True, 2.0),
+    ("binary+rescore", 16, 100, None, BINARY, True, True, 3.0),
+]
+
+
+def synthetic_vectors(n, dim, clusters=200, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.4 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_vectors(client, source, n):
+    vectors, offset = [], None
+    while len(vectors) < n:
+        points, offset = client.scroll(source, limit=min(1000, n - len(vectors)), offset=offset, with_vectors=True)
+        vectors.extend(p.vector for p in points)
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def estimated_ram(n, dim, m, quantization, on_disk):
+    total = 0 if on_disk else n * dim * 4
+    if quantization is SCALAR:
+        total += n * dim
+    elif quantization is BINARY:
+        total += n * dim // 8
+    return total + n * m * 2 * 4  # level-0 HNSW links dominate
+
+
+def wait_indexed(client, name):
+    deadline = time.time() + INDEX_TIMEOUT
+    while time.time() < deadline:
+        if client.get_collection(name).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(1)
+    log.warning(f"⚠️ {name} still optimizing after {INDEX_TIMEOUT}s, timings may be pessimistic")
+
+
+def build(client, name, vectors, m, ef_construct, quantization, on_disk):
+    client.recreate_collection(
+        collection_name=name,
+        vectors_config=models.VectorParams(size=vectors.shape[1], distance=models.Distance.COSINE, on_disk=on_disk),
+        hnsw_config=models.HnswConfigDiff(m=m, ef_construct=ef_construct),
+        quantization_config=quantization,
+        # Small benchmark sets would otherwise stay below the indexing threshold and be brute-forced
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1),
+    )
+    client.upload_collection(collection_name=name, vectors=vectors, ids=range(len(vectors)), batch_size=512)
+    wait_indexed(client, name)
+
+
+def run_queries(client, name, queries, k, params):
+    ids, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        hits = client.search(collection_name=name, query_vector=q.tolist(), limit=k, search_params=params)
+        latencies.append(time.perf_counter() - start)
+        ids.append({h.id for h in hits})
+    return ids, np.asarray(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", help="Collection to copy vectors from (e.g. vision_frames)")
+    parser.add_argument("-n", type=int, default=50000)
+    parser.add_argument("-q", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="Don't drop the scratch collections")
+    args = parser.parse_args()
+
+    client = QdrantClient(host=settings.QDRANT_HOST, port=settings.QDRANT_PORT, timeout=120)
+    vectors = load_vectors(client, args.source, args.n) if args.source else synthetic_vectors(args.n, 768)
+    n, dim = vectors.shape
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(n, size=min(args.q, n), replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    log.info(f"📦 {n} vectors (dim {dim}), {len(queries)} queries, k={args.k}")
+
+    truth = None
+    rows = []
+    try:
+        for name, m, ef_construct, ef, quantization, on_disk, rescore, oversampling in PROFILES:
+            collection = SCRATCH_PREFIX + name.replace("+", "_")
+            log.info(f"🏗️ Building {name}...")
+            build(client, collection, vectors, m, ef_construct, quantization, on_disk)
+
+            if truth is None:
+                truth, _ = run_queries(client, collection, queries, args.k, models.SearchParams(exact=True))
+
+            params = models.SearchParams(
+                hnsw_ef=ef,
+                quantization=models.QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+                if quantization is not None else None,
+            )
+            run_queries(client, collection, queries[:10], args.k, params)  # warmup
+            found, ms = run_queries(client, collection, queries, args.k, params)
+            recall = np.mean([len(f & t) / max(len(t), 1) for f, t in zip(found, truth)])
+            rows.append((name, recall, np.percentile(ms, 50), np.percentile(ms, 95),
+                         estimated_ram(n, dim, m, quantization, on_disk) / 1024**2))
+
+            if not args.keep:
+                client.delete_collection(collection)
+    finally:
+        if not args.keep:
+            for name, *_ in PROFILES:
+                try:
+                    client.delete_collection(SCRATCH_PREFIX + name.replace("+", "_"))
+                except Exception:
+                    pass
+
+    log.info(f"📊 {'profile':<16} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p95 ms':>8} {'est. RAM MB':>12}")
+    for name, recall, p50, p95, ram in rows:
+        log.info(f"   {name:<16} {recall:>10.3f} {p50:>8.2f} {p95:>8.2f} {ram:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Throughput of VideoSearchEngine.search_many vs looping VideoSearchEngine.search.
+
+Usage (from backend/):
+    python -m benchmarks.bench_search_batch [--queries queries.txt] [-n 500] [-k 10]
+
+Without --queries, synthetic queries are generated. The local query cache is
+cleared before each run so both paths pay for encoding.
+"""
+import argparse
+import time
+from pathlib import Path
+from search_engine import VideoSearchEngine
+from logger import log
+
+SUBJECTS = ["a person", "a car", "a dog", "a chart", "code on screen", "a whiteboard", "a crowd", "a city street"]
+ACTIONS = ["talking", "moving fast", "at night", "close up", "outdoors", "being explained", "in slow motion"]
+
+
+def synthetic_queries(n):
+    return [f"{SUBJECTS[i % len(SUBJECTS)]} {ACTIONS[(i // len(SUBJECTS)) % len(ACTIONS)]} #{i}" for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=Path)
+    parser.add_argument("-n", type=int, default=500)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    queries = args.queries.read_text().splitlines() if args.queries else synthetic_queries(args.n)
+    queries = [q for q in queries if q.strip()][: args.n]
+    engine = VideoSearchEngine()
+    engine.search("warmup", k=args.k)
+
+    engine.query_cache.clear()
+    start = time.perf_counter()
+    looped = [engine.search(q, k=args.k) for q in queries]
+    t_loop = time.perf_counter() - start
+
+    engine.query_cache.clear()
+    start = time.perf_counter()
+    batched = engine.search_many(queries, k=args.k)
+    t_batch = time.perf_counter() - start
+
+    same_order = all(
+        [r["timestamp"] for r in a] == [r["timestamp"] for r in b] for a, b in zip(looped, batched)
+    )
+    log.info(f"📊 {len(queries)} queries, k={args.k}")
+    log.info(f"   loop search:  {t_loop:8.2f}s  ({len(queries) / t_loop:8.1f} queries/sec)")
+    log.info(f"   search_many:  {t_batch:8.2f}s  ({len(queries) / t_batch:8.1f} queries/sec)")
+    log.info(f"   speedup:      {t_loop / t_batch:8.2f}x")
+    log.info(f"   same rankings: {'✅' if same_order else '⚠️ (float drift from padded batches)'}")
+
+
+if __name__ == "__main__":
+    main()
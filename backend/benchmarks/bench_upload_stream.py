@@ -0,0 +1,129 @@
+"""
+Upload load test against a running API: N concurrent multi-GB uploads to
+/upload?process=false, generated on the fly (nothing read from disk), while
+a probe keeps hitting /ready to see whether the event loop stays responsive.
+
+Usage (from backend/):
+    python -m benchmarks.bench_upload_stream [--url http://localhost:8000] [-c 8] [--size-gb 2] [--pid API_PID]
+
+Reports per-upload MB/s, aggregate throughput, p50/p95 upload latency,
+/ready latency under load and, with --pid, the peak RSS of the API process.
+Uploaded videos are deleted afterwards.
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+import numpy as np
+import httpx
+from logger import log
+
+CHUNK = 1024**2
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def multipart_body(boundary, filename, size):
+    """A multipart/form-data body with one "file" part of `size` pseudo-random bytes."""
+    yield (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+           f"Content-Type: video/mp4\r\n\r\n").encode()
+    block = os.urandom(CHUNK)
+    sent = 0
+    while sent < size:
+        n = min(CHUNK, size - sent)
+        yield block[:n]
+        sent += n
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+async def upload(client, index, size):
+    boundary = uuid.uuid4().hex
+    started = time.perf_counter()
+    resp = await client.post(
+        "/upload", params={"process": "false"},
+        content=multipart_body(boundary, f"bench_upload_{index}.mp4", size),
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+    resp.raise_for_status()
+    return resp.json()["filename"], time.perf_counter() - started
+
+
+async def probe(client, latencies, stop, interval):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            await client.get("/ready")
+            latencies.append((time.perf_counter() - started) * 1000)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+
+
+async def sample_rss(pid, peak, stop):
+    while not stop.is_set():
+        peak[0] = max(peak[0], rss_mb(pid))
+        await asyncio.sleep(0.5)
+
+
+async def run(args):
+    size = int(args.size_gb * 1024**3)
+    timeout = httpx.Timeout(None, connect=10)
+    async with httpx.AsyncClient(base_url=args.url, timeout=timeout) as client:
+        stop = asyncio.Event()
+        probes, peak = [], [rss_mb(args.pid) if args.pid else 0.0]
+        background = [asyncio.create_task(probe(client, probes, stop, args.probe_interval))]
+        if args.pid:
+            background.append(asyncio.create_task(sample_rss(args.pid, peak, stop)))
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(upload(client, i, size) for i in range(args.concurrency)),
+                                       return_exceptions=True)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*background)
+
+        done = [r for r in results if not isinstance(r, BaseException)]
+        for r in results:
+            if isinstance(r, BaseException):
+                log.error(f"❌ Upload failed: {r}")
+        for filename, _ in done:
+            await client.delete(f"/videos/{os.path.splitext(filename)[0]}")
+
+    mb = size / 1024**2
+    latencies = [seconds for _, seconds in done]
+    log.info(f"📦 {args.concurrency} concurrent uploads x {args.size_gb:g} GB -> {args.url}")
+    log.info(f"📊 {'upload':<8} {'seconds':>8} {'MB/s':>8}")
+    for i, seconds in enumerate(latencies):
+        log.info(f"   {i:<8} {seconds:>8.1f} {mb / seconds:>8.1f}")
+    log.info(f"   aggregate: {len(done) * mb / elapsed:.1f} MB/s over {elapsed:.1f}s "
+             f"({len(done)}/{args.concurrency} ok)")
+    log.info(f"   upload latency p50 {percentile(latencies, 50):.1f}s, p95 {percentile(latencies, 95):.1f}s")
+    log.info(f"   /ready under load: p50 {percentile(probes, 50):.1f} ms, p95 {percentile(probes, 95):.1f} ms, "
+             f"max {max(probes, default=0):.1f} ms ({len(probes)} probes)")
+    if args.pid:
+        log.info(f"   API peak RSS: {peak[0]:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Simultaneous uploads")
+    parser.add_argument("--size-gb", type=float, default=2.0, help="Size of each upload")
+    parser.add_argument("--probe-interval", type=float, default=0.2, help="Seconds between /ready probes")
+    parser.add_argument("--pid", type=int, help="API process id (Linux): sample its RSS during the run")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Real-time factor (RTF = wall time / audio duration, lower is better) of
+single-stream vs chunked parallel Whisper transcription.
+
+Usage (from backend/):
+    python -m benchmarks.bench_whisper_chunked /path/to/audio.wav [--model base] [--workers 4]
+
+Any format ffmpeg can decode works; audio is resampled to 16 kHz mono.
+"""
+import argparse
+import time
+from pathlib import Path
+from config import settings
+from embed_audio import AudioTranscriber, SAMPLE_RATE, decode_audio
+from logger import log
+
+
+def timed(fn, audio):
+    start = time.perf_counter()
+    segments = fn(audio)
+    return time.perf_counter() - start, segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", type=Path)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--workers", type=int, default=settings.WHISPER_WORKERS)
+    args = parser.parse_args()
+
+    settings.WHISPER_WORKERS = args.workers
+    transcriber = AudioTranscriber(args.model)
+    audio = decode_audio(str(args.audio), sampling_rate=SAMPLE_RATE)
+    duration = len(audio) / SAMPLE_RATE
+
+    t_single, seg_single = timed(transcriber._transcribe_single, audio)
+    t_chunked, seg_chunked = timed(transcriber._transcribe_chunked, audio)
+
+    log.info(f"📊 {args.audio.name}: {duration / 60:.1f} min, model={args.model}, "
+             f"{transcriber.num_workers} workers x {transcriber.cpu_threads} threads")
+    log.info(f"   single:  {t_single:8.1f}s  RTF {t_single / duration:.3f}  ({len(seg_single)} segments)")
+    log.info(f"   chunked: {t_chunked:8.1f}s  RTF {t_chunked / duration:.3f}  ({len(seg_chunked)} segments)")
+    log.info(f"   speedup: {t_single / t_chunked:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import re
+import time
+import redis
+from pathlib import Path
+from config import settings
+from logger import log
+
+KEY_PREFIX = "catalog"
+NUMERIC_SORTS = ("created", "duration", "frames", "segments")
+SORTS = NUMERIC_SORTS + ("title",)
+FIELDS = ("title", "duration", "frames", "segments", "status", "thumbnail", "created", "sha256")
+INT_FIELDS = ("frames", "segments")
+FLOAT_FIELDS = ("duration", "created")
+
+def title_from_filename(filename: str) -> str:
+    """'1712345678_My_Talk.mp4' -> 'My Talk'"""
+    return re.sub(r"^\d+_", "", Path(filename).stem).replace("_", " ") or Path(filename).stem
+
+def thumbnail_key(video_id: str) -> str:
+    return f"{video_id}/frames/frame_0000.jpg"
+
+class VideoCatalog:
+    """
+    Video library index in Redis, kept up to date at upload / ingest / delete
+    time so /videos never has to list the bucket.
+
+    - catalog:video:<id>   hash with title, duration, frames, segments,
+                           status, thumbnail (S3 key), created and sha256
+    - catalog:by:<field>   sorted set per sortable number (score = value)
+    - catalog:by:title     lexicographic sorted set ("<title>\\0<id>")
+    A page costs one ZRANGE + one pipelined HGETALL per returned video.
+    """
+    def __init__(self):
+        self.redis = redis.Redis(host=settings.REDIS_HOST, port=6379, db=0, decode_responses=True)
+
+    def _key(self, video_id):
+        return f"{KEY_PREFIX}:video:{video_id}"
+
+    def _index(self, sort):
+        return f"{KEY_PREFIX}:by:{sort}"
+
+    def _title_member(self, title, video_id):
+        return f"{title.lower()}\0{video_id}"
+
+    def upsert(self, video_id: str, **fields):
+        """Creates or updates an entry. Unknown fields are ignored."""
+        fields = {k: v for k, v in fields.items() if k in FIELDS and v is not None}
+        key = self._key(video_id)
+        old_title = self.redis.hget(key, "title")
+        created = fields.setdefault("created", float(self.redis.hget(key, "created") or time.time()))
+        fields.setdefault("title", old_title or title_from_filename(video_id))
+        fields.setdefault("thumbnail", thumbnail_key(video_id))
+
+        pipe = self.redis.pipeline()
+        pipe.hset(key, mapping={"id": video_id, **fields})
+        pipe.zadd(self._index("created"), {video_id: created})
+        for sort in NUMERIC_SORTS[1:]:
+            if sort in fields:
+                pipe.zadd(self._index(sort), {video_id: float(fields[sort])})
+        if old_title is not None and old_title != fields["title"]:
+            pipe.zrem(self._index("title"), self._title_member(old_title, video_id))
+        pipe.zadd(self._index("title"), {self._title_member(fields["title"], video_id): 0})
+        pipe.execute()
+
+    def update(self, video_id: str, **fields):
+        """Like upsert, but a no-op for videos that were deleted meanwhile."""
+        if self.redis.exists(self._key(video_id)):
+            self.upsert(video_id, **fields)
+
+    def remove(self, video_id: str):
+        key = self._key(video_id)
+        title = self.redis.hget(key, "title")
+        pipe = self.redis.pipeline()
+        pipe.delete(key)
+        for sort in NUMERIC_SORTS:
+            pipe.zrem(self._index(sort), video_id)
+        if title is not None:
+            pipe.zrem(self._index("title"), self._title_member(title, video_id))
+        pipe.execute()
+
+    def statuses(self, video_ids):
+        """{video_id: status} in one round trip; None for videos not in the catalog."""
+        pipe = self.redis.pipeline()
+        for video_id in video_ids:
+            pipe.hget(self._key(video_id), "status")
+        return dict(zip(video_ids, pipe.execute()))
+
+    def count(self) -> int:
+        return self.redis.zcard(self._index("created"))
+
+    def page(self, offset=0, limit=None, sort="created", descending=True):
+        """Returns (entries, total). limit=None returns everything from offset on."""
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort '{sort}'. Use one of: {', '.join(SORTS)}")
+        offset = max(0, offset)
+        if limit is not None and limit <= 0:
+            return [], self.count()  # A zero-length ZRANGE end would wrap to "everything"
+
+        if sort == "title":
+            num = -1 if limit is None else limit
+            if descending:
+                members = self.redis.zrevrangebylex(self._index(sort), "+", "-", start=offset, num=num)
+            else:
+                members = self.redis.zrangebylex(self._index(sort), "-", "+", start=offset, num=num)
+            ids = [m.rsplit("\0", 1)[-1] for m in members]
+        else:
+            end = -1 if limit is None else offset + limit - 1
+            ids = self.redis.zrange(self._index(sort), offset, end, desc=descending)
+
+        pipe = self.redis.pipeline()
+        for video_id in ids:
+            pipe.hgetall(self._key(video_id))
+        entries = [self._decode(e) for e in pipe.execute() if e]
+        return entries, self.count()
+
+    def _decode(self, entry):
+        for field in INT_FIELDS:
+            if field in entry:
+                entry[field] = int(float(entry[field]))
+        for field in FLOAT_FIELDS:
+            if field in entry:
+                entry[field] = float(entry[field])
+        return entry
+
+    def backfill(self, video_ids, stats=None):
+        """One-off migration for libraries ingested before the catalog existed."""
+        for video_id in video_ids:
+            extra = stats(video_id) if stats else {}
+            self.upsert(video_id, status="ready", **extra)
+        log.info(f"📚 Catalog backfilled with {len(video_ids)} videos")
+
+catalog = VideoCatalog()
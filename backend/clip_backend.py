@@ -0,0 +1,161 @@
+import os
+import numpy as np
+import torch
+import clip
+from pathlib import Path
+from config import settings
+from logger import log
+
+ONNX_OPSET = 17
+PARITY_IMAGES = 4
+PARITY_WARN = 0.99   # Min cosine vs PyTorch the parity check accepts
+
+def normalize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+def cosine_parity(reference, candidate):
+    """Per-row cosine similarity between two embedding batches."""
+    return np.sum(normalize(reference) * normalize(candidate), axis=-1)
+
+class TorchCLIP:
+    """Reference backend: openai/CLIP in PyTorch (fp16 on GPU, fp32 on CPU)."""
+    def __init__(self, model_name, device):
+        self.model_name = model_name
+        self.device = device
+        self.tag = f"{model_name}|torch"
+        # Jit=False helps with some compatibility issues on newer PyTorch versions
+        self.model, self.preprocess = clip.load(model_name, device=device, jit=False)
+        self.model.eval()
+        self.input_size = self.model.visual.input_resolution
+
+    def encode_images(self, images):
+        """images: preprocessed (N, 3, H, W) tensor or array. Returns float32 (N, D), not normalized."""
+        if isinstance(images, np.ndarray):
+            images = torch.from_numpy(images)  # Batches sent by embed_server clients
+        with torch.no_grad():
+            return self.model.encode_image(images.to(self.device)).float().cpu().numpy()
+
+    def encode_texts(self, texts):
+        tokens = clip.tokenize(texts, truncate=True).to(self.device)
+        with torch.no_grad():
+            return self.model.encode_text(tokens).float().cpu().numpy()
+
+class _ImageTower(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, images):
+        return self.model.encode_image(images)
+
+class _TextTower(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, tokens):
+        return self.model.encode_text(tokens)
+
+class OnnxCLIP:
+    """
+    ONNX Runtime backend for CPU nodes. The image and text towers are exported
+    once from the PyTorch weights into ONNX_DIR (optionally dynamically
+    quantized to int8) and reused by every later process.
+    """
+    def __init__(self, model_name, precision="int8", threads=0):
+        import onnxruntime as ort
+
+        self.model_name = model_name
+        self.device = "cpu"
+        self.precision = precision
+        self.tag = f"{model_name}|onnx-{precision}"
+        visual_path, text_path = self.export(model_name, precision)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.visual = ort.InferenceSession(str(visual_path), options, providers=["CPUExecutionProvider"])
+        self.text = ort.InferenceSession(str(text_path), options, providers=["CPUExecutionProvider"])
+
+        # Same torchvision transform clip.load would return, without loading the weights
+        self.input_size = self.visual.get_inputs()[0].shape[-1]
+        self.preprocess = clip.clip._transform(self.input_size)
+
+    @staticmethod
+    def model_dir(model_name):
+        return settings.ONNX_DIR / model_name.replace("/", "-")
+
+    @classmethod
+    def export(cls, model_name, precision):
+        """Returns (visual, text) ONNX paths, exporting / quantizing whatever is missing."""
+        out_dir = cls.model_dir(model_name)
+        suffix = "" if precision == "fp32" else f".{precision}"
+        visual_path, text_path = out_dir / f"visual{suffix}.onnx", out_dir / f"text{suffix}.onnx"
+        if visual_path.exists() and text_path.exists():
+            return visual_path, text_path
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        fp32_visual, fp32_text = out_dir / "visual.onnx", out_dir / "text.onnx"
+        if not (fp32_visual.exists() and fp32_text.exists()):
+            log.info(f"📦 Exporting {model_name} to ONNX (one-off)...")
+            model, _ = clip.load(model_name, device="cpu", jit=False)
+            model.eval()
+            size = model.visual.input_resolution
+            _export(_ImageTower(model), torch.randn(1, 3, size, size), "images", fp32_visual)
+            _export(_TextTower(model), clip.tokenize(["a photo"]), "tokens", fp32_text)
+
+        if precision == "int8":
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            log.info(f"🗜️ Quantizing {model_name} ONNX towers to int8...")
+            for src, dst in ((fp32_visual, visual_path), (fp32_text, text_path)):
+                tmp = dst.with_suffix(f".tmp{os.getpid()}")
+                quantize_dynamic(str(src), str(tmp), weight_type=QuantType.QInt8)
+                os.replace(tmp, dst)
+        elif precision != "fp32":
+            raise ValueError(f"Unknown CLIP_PRECISION: {precision}")
+        return visual_path, text_path
+
+    def encode_images(self, images):
+        batch = images.numpy() if isinstance(images, torch.Tensor) else images
+        return self.visual.run(None, {"images": batch.astype(np.float32, copy=False)})[0]
+
+    def encode_texts(self, texts):
+        tokens = clip.tokenize(texts, truncate=True).numpy().astype(np.int64)
+        return self.text.run(None, {"tokens": tokens})[0]
+
+def _export(module, example, input_name, path):
+    # Write next to the target and rename, so concurrent workers never load a half-written file
+    tmp = Path(f"{path}.tmp{os.getpid()}")
+    with torch.no_grad():
+        torch.onnx.export(
+            module, example, str(tmp),
+            input_names=[input_name], output_names=["embeddings"],
+            dynamic_axes={input_name: {0: "batch"}, "embeddings": {0: "batch"}},
+            opset_version=ONNX_OPSET, dynamo=False,
+        )
+    os.replace(tmp, path)
+
+def check_parity(reference, candidate, images=None, texts=None):
+    """
+    Cosine similarity of candidate vs reference outputs on the same inputs.
+    Returns {"image": per-image cosines, "text": per-text cosines}.
+    """
+    if images is None:
+        images = torch.randn(PARITY_IMAGES, 3, reference.input_size, reference.input_size)
+    texts = texts or ["a person talking", "a chart on a slide", "a dog running outdoors", "code on screen"]
+    return {
+        "image": cosine_parity(reference.encode_images(images), candidate.encode_images(images)),
+        "text": cosine_parity(reference.encode_texts(texts), candidate.encode_texts(texts)),
+    }
+
+def load_clip(model_name, device):
+    """Backend picked by settings.CLIP_BACKEND ('torch' | 'onnx')."""
+    if settings.CLIP_BACKEND == "onnx":
+        log.info(f"⚙️ CLIP backend: ONNX Runtime ({settings.CLIP_PRECISION}, threads={settings.CLIP_THREADS or 'auto'})")
+        return OnnxCLIP(model_name, settings.CLIP_PRECISION, settings.CLIP_THREADS)
+    if settings.CLIP_BACKEND != "torch":
+        raise ValueError(f"Unknown CLIP_BACKEND: {settings.CLIP_BACKEND}")
+    if settings.CLIP_THREADS and device == "cpu":
+        torch.set_num_threads(settings.CLIP_THREADS)
+    return TorchCLIP(model_name, device)
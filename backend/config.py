@@ -1,47 +1,154 @@
-import os
-import socket
-import tempfile
-from pathlib import Path
-from pydantic_settings import BaseSettings
-
-def resolve_host(docker_name: str, local_default: str = "localhost") -> str:
-    """
-    Auto-detects environment.
-    If 'redis' (docker hostname) resolves, use it.
-    Otherwise, assume we are running locally and use 'localhost'.
-    """
-    try:
-        socket.gethostbyname(docker_name)
-        return docker_name
-    except socket.error:
-        return local_default
-
-class Settings(BaseSettings):
-    # --- Infrastructure (Auto-Switching) ---
-    REDIS_HOST: str = resolve_host("redis")
-    QDRANT_HOST: str = resolve_host("qdrant")
-    QDRANT_PORT: int = 6333
-    
-    # MinIO is tricky because of the port.
-    # If inside docker: "minio:9000". If local: "localhost:9000"
-    MINIO_ENDPOINT: str = f"{resolve_host('minio')}:9000"
-    
-    MINIO_ACCESS_KEY: str = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
-    MINIO_SECRET_KEY: str = os.getenv("MINIO_SECRET_KEY", "minioadmin")
-    MINIO_BUCKET: str = os.getenv("MINIO_BUCKET", "reelinsight")
-
-    
-    # --- Paths ---
-    # 1. Logs (Visible Project Folder)
-    LOGS_DIR: Path = Path(__file__).parent.parent / "logs"
-    
-    # 2. Temp Workspace (Invisible System Temp)
-    TEMP_DIR: Path = Path(tempfile.gettempdir()) / "reelinsight_temp"
-
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        # Create directories on startup
-        self.LOGS_DIR.mkdir(parents=True, exist_ok=True)
-        self.TEMP_DIR.mkdir(parents=True, exist_ok=True)
-
+import os
+import socket
+import tempfile
+from pathlib import Path
+from pydantic_settings import BaseSettings
+
+def resolve_host(docker_name: str, local_default: str = "localhost") -> str:
+    """
+    Auto-detects environment.
+    If 'redis' (docker hostname) resolves, use it.
+    Otherwise, assume we are running locally and use 'localhost'.
+    """
+    try:
+        socket.gethostbyname(docker_name)
+        return docker_name
+    except socket.error:
+        return local_default
+
+def env_or_resolve(var: str, docker_name: str) -> str:
+    """Explicit env vars (docker-compose, k8s) skip the DNS probe at import time."""
+    return os.getenv(var) or resolve_host(docker_name)
+
+class Settings(BaseSettings):
+    # --- Infrastructure (Auto-Switching) ---
+    REDIS_HOST: str = env_or_resolve("REDIS_HOST", "redis")
+    QDRANT_HOST: str = env_or_resolve("QDRANT_HOST", "qdrant")
+    QDRANT_PORT: int = 6333
+    
+    # MinIO is tricky because of the port.
+    # If inside docker: "minio:9000". If local: "localhost:9000"
+    MINIO_ENDPOINT: str = os.getenv("MINIO_ENDPOINT") or f"{resolve_host('minio')}:9000"
+    
+    MINIO_ACCESS_KEY: str = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
+    MINIO_SECRET_KEY: str = os.getenv("MINIO_SECRET_KEY", "minioadmin")
+    MINIO_BUCKET: str = os.getenv("MINIO_BUCKET", "reelinsight")
+
+    # --- Pipeline Tuning ---
+    # 'single_pass' detects scenes and grabs keyframes in one sequential decode.
+    # 'two_pass' is the legacy PySceneDetect scan + cv2 seek path.
+    FRAME_EXTRACTION_MODE: str = "single_pass"
+    # 'memory' streams decoded frames straight into CLIP (ingest + embed on one worker).
+    # 'disk' writes JPEGs to TEMP_DIR first (fallback for split workers).
+    FRAME_HANDOFF: str = "memory"
+    # Whisper: CTranslate2 workers for chunked long-audio transcription.
+    # 0 threads = split the machine's cores evenly between workers.
+    WHISPER_WORKERS: int = 2
+    WHISPER_CPU_THREADS: int = 0
+    # 'stream' pipes Whisper segments straight into MiniLM as they are produced.
+    # 'file' embeds only after transcript.json is complete.
+    TRANSCRIPT_HANDOFF: str = "stream"
+    # Near-duplicate keyframes (difference hash within N of 256 bits of the last kept one)
+    # are dropped before CLIP; the kept frame records the covered time range.
+    FRAME_DEDUP: bool = True
+    FRAME_DEDUP_DISTANCE: int = 10
+    # Failed ingest tasks retry with exponential backoff (base * 2^attempt, capped,
+    # jittered) and resume from the stage manifest instead of starting over.
+    INGEST_MAX_RETRIES: int = 3
+    INGEST_RETRY_BACKOFF: int = 30
+    INGEST_RETRY_BACKOFF_MAX: int = 600
+    # 'single' runs the whole graph in one process_video_task: in-memory frame
+    # handoff, transcript streaming and in-process stage concurrency.
+    # 'staged' splits ingest into per-stage Celery tasks on their own queues
+    # (decode, transcribe, vision_embed, text_embed, llm; see docker-compose.yml)
+    # and replaces those handoffs with artifacts in MinIO between stages.
+    PIPELINE_MODE: str = "single"
+    # Models a worker process loads before taking tasks: any of clip, whisper, minilm, llm
+    WORKER_PRELOAD: str = ""
+    # Batch ingestion: jobs of all batches in the pipeline at once (the rest wait
+    # in Redis and are released fair-share as slots free up)
+    BATCH_MAX_RUNNING: int = 4
+
+    # --- CLIP Inference ---
+    # 'torch' = openai/CLIP in PyTorch. 'onnx' = ONNX Runtime towers exported
+    # once into ONNX_DIR (CPU nodes), 'int8' = dynamically quantized weights.
+    CLIP_BACKEND: str = "torch"
+    CLIP_PRECISION: str = "int8"         # onnx only: 'fp32' | 'int8'
+    CLIP_THREADS: int = 0                # Intra-op threads (0 = runtime default)
+
+    # --- Model Registry ---
+    MODEL_MEMORY_BUDGET_MB: int = 0      # Unload least-recently-used models above this (0 = no limit)
+    # Unix socket of embed_server.py: API + worker on one host share a single copy of
+    # CLIP / MiniLM. Empty = every process loads its own models.
+    # Requests are pickled, so the server refuses to start without a real secret
+    # (shared by server and clients; e.g. `openssl rand -hex 32`).
+    EMBED_SERVER_SOCKET: str = ""
+    EMBED_SERVER_AUTHKEY: str = ""
+
+    # --- Uploads ---
+    # Request bodies stream straight into MinIO multipart uploads, one uploader
+    # thread each; further uploads wait (backpressure) until a thread frees up.
+    UPLOAD_CONCURRENCY: int = 16
+
+    # --- Downloads ---
+    # yt-dlp fragments fetched in parallel per URL job (DASH / HLS formats)
+    DOWNLOAD_FRAGMENTS: int = 8
+
+    # --- API Startup ---
+    # 'lazy' serves immediately and warms backends + models in the background (see /ready).
+    # 'eager' warms everything before the first request, like before.
+    STARTUP_MODE: str = "lazy"
+
+    # --- Search ---
+    QUERY_CACHE_SIZE: int = 1024         # Query embeddings kept per API process (LRU)
+    QUERY_CACHE_REDIS: bool = False      # Share cached query embeddings between API replicas
+    QUERY_CACHE_TTL: int = 86400
+    QUERY_ENCODE_WORKERS: int = 2        # Threads running CLIP/MiniLM query encoding for async search
+    # 'presigned' signs (and caches) frame/thumbnail URLs.
+    # 'public' returns stable URLs straight off the public-read bucket.
+    FRAME_URL_MODE: str = "presigned"
+    # Result fusion (RRF): per-modality weights, grouping bucket and speech<->visual match window
+    FUSION_VISION_WEIGHT: float = 2.0    # Visuals are usually what users want first
+    FUSION_TEXT_WEIGHT: float = 1.5
+    FUSION_RRF_K: int = 60
+    FUSION_BUCKET_SECONDS: float = 1.0
+    FUSION_MATCH_WINDOW: float = 2.0
+
+    # --- Vector DB Profile ---
+    # 'none' | 'scalar' (int8, ~4x less RAM) | 'binary' (~32x less RAM, best on 768-d CLIP)
+    QDRANT_QUANTIZATION: str = "none"
+    QDRANT_RESCORE: bool = True          # Re-rank quantized candidates with the original vectors
+    QDRANT_OVERSAMPLING: float = 2.0     # Candidates fetched per result before rescoring
+    QDRANT_ON_DISK: bool = False         # Keep original vectors on disk (quantized copy stays in RAM)
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_HNSW_EF: int = 0              # Search-time ef (0 = Qdrant default)
+    QDRANT_APPLY_PROFILE: bool = True    # Bring existing collections in line with the profile on startup
+
+    # --- Embedding Cache ---
+    # Content-hash cache so re-ingesting unchanged frames / segments skips CLIP & MiniLM
+    EMBED_CACHE: bool = True
+    EMBED_CACHE_MAX_MB: int = 2048       # Local SQLite budget (LRU eviction)
+    EMBED_CACHE_MINIO: bool = False      # Also share vectors between workers through the bucket
+
+    # --- Paths ---
+    # 1. Logs (Visible Project Folder)
+    LOGS_DIR: Path = Path(__file__).parent.parent / "logs"
+    
+    # 2. Temp Workspace (Invisible System Temp)
+    TEMP_DIR: Path = Path(tempfile.gettempdir()) / "reelinsight_temp"
+
+    # 3. Embedding Cache (Persistent, survives per-video cleanup)
+    EMBED_CACHE_DIR: Path = Path(__file__).parent.parent / "cache"
+    ONNX_DIR: Path = Path(__file__).parent.parent / "cache" / "onnx"
+
+    # 4. Batch folder imports (only folders under this root can be ingested)
+    IMPORT_DIR: Path = Path(__file__).parent.parent / "data"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Create directories on startup
+        self.LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        self.TEMP_DIR.mkdir(parents=True, exist_ok=True)
+
 settings = Settings()
\ No newline at end of file
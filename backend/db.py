@@ -1,159 +1,450 @@
-import uuid
-from qdrant_client import QdrantClient
-from qdrant_client.http import models
-from config import settings
-from logger import log
-
-
-class ReelInsightDB:
-    def __init__(self):
-        log.info(f"🔌 Connecting to Vector DB at {settings.QDRANT_HOST}:{settings.QDRANT_PORT}...")
-        self.client = QdrantClient(host=settings.QDRANT_HOST, port=settings.QDRANT_PORT)
-        
-        # 👁️ VISION: Remains CLIP ViT-L/14 (768 Dimensions)
-        self._init_collection("vision_frames", 768)
-        
-        # 🧠 TEXT: Swapping to MiniLM-L6-v2 (384 Dimensions)
-        # We check if migration is needed inside _init_collection
-        self._init_collection("video_transcripts", 384)
-
-    def _init_collection(self, name, target_vector_size):
-        try:
-            # 1. Check if collection exists
-            collection_info = self.client.get_collection(name)
-            
-            # 2. VALIDATE SIZE: If old collection has wrong size, we must nuke it
-            current_size = collection_info.config.params.vectors.size
-            if current_size != target_vector_size:
-                log.warning(f"⚠️ Collection '{name}' dimension mismatch! (Current: {current_size}, Target: {target_vector_size})")
-                log.warning(f"♻️ Re-creating collection '{name}' to fix compatibility...")
-                self.client.delete_collection(name)
-                raise ValueError("Collection deleted for migration") # Trigger creation block below
-
-            log.info(f"✅ Collection ready: {name} (Dim: {target_vector_size})")
-
-        except Exception:
-            # 3. Create if missing or just deleted
-            log.info(f"✨ Creating Collection: {name} (Dim: {target_vector_size})")
-            try:
-                self.client.create_collection(
-                    collection_name=name,
-                    vectors_config=models.VectorParams(size=target_vector_size, distance=models.Distance.COSINE)
-                )
-            except Exception as create_error:
-                log.error(f"❌ Failed to create collection {name}: {create_error}")
-                raise
-
-
-    def _to_uuid(self, id_str):
-        """
-        🛡️ FIX: Qdrant strictly requires UUIDs or Integers for IDs.
-        """
-        return str(uuid.uuid5(uuid.NAMESPACE_DNS, str(id_str)))
-
-    def add_frames(self, video_id, data):
-        if not data: return
-        
-        # Vision is always 768 (CLIP)
-        expected_dim = 768
-        for item in data:
-            emb_len = len(item["embedding"])
-            if emb_len != expected_dim:
-                raise ValueError(f"Invalid embedding dimension for {item['id']}: expected {expected_dim}, got {emb_len}")
-        
-        points = [
-            models.PointStruct(
-                id=self._to_uuid(item["id"]),
-                vector=item["embedding"],
-                payload=item["metadata"]
-            )
-            for item in data
-        ]
-        self.client.upsert(collection_name="vision_frames", points=points)
-        log.info(f" 💾 Saved {len(points)} frames to Qdrant.")
-
-
-    def add_transcripts(self, video_id, data):
-        if not data: return
-        
-        # Text is now 384 (MiniLM)
-        expected_dim = 384
-        for item in data:
-            emb_len = len(item["embedding"])
-            if emb_len != expected_dim:
-                raise ValueError(f"Invalid embedding dimension for {item['id']}: expected {expected_dim}, got {emb_len}")
-        
-        points = [
-            models.PointStruct(
-                id=self._to_uuid(item["id"]),
-                vector=item["embedding"],
-                payload=item["metadata"]
-            )
-            for item in data
-        ]
-        self.client.upsert(collection_name="video_transcripts", points=points)
-
-    def search_vision(self, vector, k=10, filter_video_id=None):
-        query_filter = None
-        if filter_video_id:
-            query_filter = models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="video_id",
-                        match=models.MatchValue(value=filter_video_id)
-                    )
-                ]
-            )
-
-        results = self.client.search(
-            collection_name="vision_frames",
-            query_vector=vector,
-            query_filter=query_filter,
-            limit=k
-        )
-        return [{"id": hit.id, "score": hit.score, "metadata": hit.payload} for hit in results]
-
-    def search_text(self, vector, k=10, filter_video_id=None):
-        query_filter = None
-        if filter_video_id:
-            query_filter = models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="video_id",
-                        match=models.MatchValue(value=filter_video_id)
-                    )
-                ]
-            )
-
-        results = self.client.search(
-            collection_name="video_transcripts",
-            query_vector=vector,
-            query_filter=query_filter,
-            limit=k
-        )
-        return [{"id": hit.id, "score": hit.score, "metadata": hit.payload} for hit in results]
-    
-    def delete_video(self, video_id):
-        """Removes all vectors (Vision & Text) for a specific video."""
-        try:
-            self.client.delete(
-                collection_name="vision_frames",
-                points_selector=models.FilterSelector(
-                    filter=models.Filter(
-                        must=[models.FieldCondition(key="video_id", match=models.MatchValue(value=video_id))]
-                    )
-                ),
-            )
-            self.client.delete(
-                collection_name="video_transcripts",
-                points_selector=models.FilterSelector(
-                    filter=models.Filter(
-                        must=[models.FieldCondition(key="video_id", match=models.MatchValue(value=video_id))]
-                    )
-                ),
-            )
-            log.info(f"🗑️ Deleted vectors for {video_id}")
-        except Exception as e:
-            log.error(f"⚠️ Vector Delete Failed: {e}")
-
-db = ReelInsightDB()
\ No newline at end of file
+import re
+import threading
+import time
+import uuid
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.http import models
+from config import settings
+from lazy import Lazy
+from logger import log
+
+VECTOR_DIMS = {
+    "vision_frames": 768,       # CLIP ViT-L/14
+    "video_transcripts": 384,   # MiniLM-L6-v2
+}
+# Bulk upload: points per upsert, parallel uploads, batches buffered in memory
+UPLOAD_BATCH = 256
+UPLOAD_WORKERS = 4
+UPLOAD_MAX_INFLIGHT = 16
+
+PAYLOAD_INDEXES = {
+    "video_id": models.PayloadSchemaType.KEYWORD,
+    "timestamp": models.PayloadSchemaType.FLOAT,
+}
+
+def vector_dim(collection):
+    """Dimension of a collection, its alias, or one of its versions (<name>_v<unix time>)."""
+    return VECTOR_DIMS[re.sub(r"_v\d+$", "", collection)]
+
+def payload_rows(columns, n):
+    """Dict of payload columns -> one dict per point. Non-sequence values apply to every row."""
+    per_row = {}
+    shared = {}
+    for key, value in columns.items():
+        if isinstance(value, np.ndarray):
+            value = value.tolist()
+        if isinstance(value, (list, tuple)):
+            if len(value) != n:
+                raise ValueError(f"Payload column '{key}' has {len(value)} values for {n} points")
+            per_row[key] = value
+        else:
+            shared[key] = value
+    return [{**shared, **{key: values[i] for key, values in per_row.items()}} for i in range(n)]
+
+def hnsw_config():
+    return models.HnswConfigDiff(m=settings.QDRANT_HNSW_M, ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT)
+
+def quantization_config():
+    """Quantized vector copy kept in RAM; None when quantization is off."""
+    kind = settings.QDRANT_QUANTIZATION
+    if kind == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if kind == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    if kind != "none":
+        raise ValueError(f"Unknown QDRANT_QUANTIZATION: {kind}")
+    return None
+
+def quantization_kind(config):
+    if isinstance(config, models.ScalarQuantization):
+        return "scalar"
+    if isinstance(config, models.BinaryQuantization):
+        return "binary"
+    if isinstance(config, models.ProductQuantization):
+        return "product"
+    return "none"
+
+def search_params():
+    """Search-time ef and rescoring for quantized collections (None = Qdrant defaults)."""
+    quantization = None
+    if settings.QDRANT_QUANTIZATION != "none":
+        quantization = models.QuantizationSearchParams(
+            rescore=settings.QDRANT_RESCORE, oversampling=settings.QDRANT_OVERSAMPLING
+        )
+    if not settings.QDRANT_HNSW_EF and quantization is None:
+        return None
+    return models.SearchParams(hnsw_ef=settings.QDRANT_HNSW_EF or None, quantization=quantization)
+
+
+class ReelInsightDB:
+    def __init__(self):
+        log.info(f"🔌 Connecting to Vector DB at {settings.QDRANT_HOST}:{settings.QDRANT_PORT}...")
+        self.client = QdrantClient(host=settings.QDRANT_HOST, port=settings.QDRANT_PORT)
+        # Non-blocking client for the async search path (connects lazily)
+        self.aclient = AsyncQdrantClient(host=settings.QDRANT_HOST, port=settings.QDRANT_PORT)
+        # Bulk uploads: batches in flight per (collection, video_id) until barrier()
+        self._upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="qdrant-upload")
+        self._inflight = threading.BoundedSemaphore(UPLOAD_MAX_INFLIGHT)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        
+        # 👁️ VISION: Remains CLIP ViT-L/14 (768 Dimensions)
+        self._init_collection("vision_frames", VECTOR_DIMS["vision_frames"])
+        
+        # 🧠 TEXT: Swapping to MiniLM-L6-v2 (384 Dimensions)
+        # We check if migration is needed inside _init_collection
+        self._init_collection("video_transcripts", VECTOR_DIMS["video_transcripts"])
+
+    def _init_collection(self, name, target_vector_size):
+        # 1. Check if collection exists (`name` may be an alias onto a versioned collection)
+        try:
+            collection_info = self.client.get_collection(name)
+        except Exception:
+            collection_info = None
+        physical = self.resolve(name) if collection_info is not None else name
+
+        # 2. VALIDATE SIZE: If old collection has wrong size, we must nuke it
+        if collection_info is not None:
+            current_size = collection_info.config.params.vectors.size
+            if current_size != target_vector_size:
+                log.warning(f"⚠️ Collection '{name}' dimension mismatch! (Current: {current_size}, Target: {target_vector_size})")
+                log.warning(f"♻️ Re-creating collection '{name}' to fix compatibility "
+                            f"(refill it from MinIO with `python reindex.py`)...")
+                self.client.delete_collection(physical)
+                collection_info = None
+                physical = name
+
+        # 3. Create if missing or just deleted
+        if collection_info is None:
+            self._create_collection(name, target_vector_size)
+        else:
+            log.info(f"✅ Collection ready: {name} (Dim: {target_vector_size})")
+            if settings.QDRANT_APPLY_PROFILE:
+                self.apply_profile(physical, collection_info)
+
+        self._ensure_payload_indexes(physical, collection_info)
+
+    def _create_collection(self, name, target_vector_size):
+        log.info(f"✨ Creating Collection: {name} (Dim: {target_vector_size}, Quantization: {settings.QDRANT_QUANTIZATION})")
+        try:
+            self.client.create_collection(
+                collection_name=name,
+                vectors_config=models.VectorParams(
+                    size=target_vector_size,
+                    distance=models.Distance.COSINE,
+                    on_disk=settings.QDRANT_ON_DISK
+                ),
+                hnsw_config=hnsw_config(),
+                quantization_config=quantization_config()
+            )
+        except Exception as create_error:
+            log.error(f"❌ Failed to create collection {name}: {create_error}")
+            raise
+
+    def _ensure_payload_indexes(self, name, collection_info=None):
+        """Filtered search and delete_video hit these instead of scanning every payload."""
+        existing = set(collection_info.payload_schema) if collection_info is not None else set()
+        for field, schema in PAYLOAD_INDEXES.items():
+            if field in existing:
+                continue
+            try:
+                self.client.create_payload_index(collection_name=name, field_name=field, field_schema=schema)
+                log.info(f"   ↳ Indexed payload '{field}' on {name}")
+            except Exception as e:
+                log.warning(f"⚠️ Payload index '{field}' on {name} failed: {e}")
+
+    def apply_profile(self, name, collection_info=None):
+        """
+        Updates an existing collection to the configured HNSW / quantization /
+        on-disk profile. Only fields that differ are sent; Qdrant rebuilds the
+        affected segments in the background, so search keeps working meanwhile.
+        """
+        info = collection_info or self.client.get_collection(name)
+        changes = {}
+
+        hnsw = info.config.hnsw_config
+        if (hnsw.m, hnsw.ef_construct) != (settings.QDRANT_HNSW_M, settings.QDRANT_HNSW_EF_CONSTRUCT):
+            changes["hnsw_config"] = hnsw_config()
+
+        if quantization_kind(info.config.quantization_config) != settings.QDRANT_QUANTIZATION:
+            changes["quantization_config"] = quantization_config() or models.Disabled.DISABLED
+
+        if bool(info.config.params.vectors.on_disk) != settings.QDRANT_ON_DISK:
+            changes["vectors_config"] = {"": models.VectorParamsDiff(on_disk=settings.QDRANT_ON_DISK)}
+
+        if not changes:
+            return False
+        log.info(f"🛠️ Applying profile to '{name}': {', '.join(changes)}")
+        try:
+            self.client.update_collection(collection_name=name, **changes)
+        except Exception as e:
+            log.error(f"⚠️ Profile update for {name} failed: {e}")
+            return False
+        return True
+
+    # --- Versioned collections (re-index) ---
+    def resolve(self, name):
+        """Physical collection behind an alias (or `name` itself)."""
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == name:
+                return alias.collection_name
+        return name
+
+    def create_version(self, name, target_vector_size=None):
+        """
+        Fresh, empty `<name>_v<unix time>` with the configured profile. Searches
+        keep hitting `name` until swap_alias() points it at the new version.
+        """
+        version = f"{name}_v{int(time.time())}"
+        self._create_collection(version, target_vector_size or VECTOR_DIMS[name])
+        self._ensure_payload_indexes(version)
+        return version
+
+    def swap_alias(self, name, version, drop_old=True):
+        """
+        Atomically repoints alias `name` at `version` (one update_collection_aliases
+        call). A plain collection still named `name` (pre-alias deployments)
+        has to be deleted first, which is a one-off gap in search.
+        """
+        old = self.resolve(name)
+        operations = []
+        if old != name:
+            operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=name)))
+        elif self.client.collection_exists(name):
+            log.warning(f"⚠️ '{name}' is a plain collection; replacing it with an alias (brief search gap)")
+            self.client.delete_collection(name)
+            old = None
+        else:
+            old = None
+        operations.append(models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=version, alias_name=name)
+        ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        log.info(f"🔀 Alias '{name}' -> {version}" + (f" (was {old})" if old else ""))
+
+        if old and old != version and drop_old:
+            self.client.delete_collection(old)
+            log.info(f"🗑️ Dropped previous version {old}")
+        return old
+
+    def _to_uuid(self, id_str):
+        """
+        🛡️ FIX: Qdrant strictly requires UUIDs or Integers for IDs.
+        """
+        return str(uuid.uuid5(uuid.NAMESPACE_DNS, str(id_str)))
+
+    def upload_vectors(self, collection, video_id, ids, vectors, payload, dim=None):
+        """
+        Bulk ingest: `vectors` is an (n, dim) matrix, `payload` either one dict
+        per point or a dict of columns (scalars are broadcast). Batches go to
+        Qdrant on a small thread pool with wait=False, so the caller keeps
+        embedding while Qdrant indexes; call barrier() once the video is done.
+        """
+        n = len(ids)
+        if not n: return 0
+        expected_dim = dim or vector_dim(collection)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape != (n, expected_dim):
+            raise ValueError(f"Invalid embedding matrix for {collection}: expected ({n}, {expected_dim}), got {vectors.shape}")
+
+        rows = payload if isinstance(payload, list) else payload_rows(payload, n)
+        point_ids = [self._to_uuid(i) for i in ids]
+        with self._pending_lock:
+            pending = self._pending.setdefault((collection, video_id), [])
+        for start in range(0, n, UPLOAD_BATCH):
+            end = start + UPLOAD_BATCH
+            self._inflight.acquire()
+            future = self._upload_pool.submit(
+                self._upsert_batch, collection, point_ids[start:end], vectors[start:end], rows[start:end]
+            )
+            future.add_done_callback(lambda _: self._inflight.release())
+            with self._pending_lock:
+                pending.append(future)
+        return n
+
+    def _upsert_batch(self, collection, point_ids, vectors, rows):
+        self.client.upsert(
+            collection_name=collection,
+            points=models.Batch(ids=point_ids, vectors=vectors.tolist(), payloads=rows),
+            wait=False
+        )
+
+    def barrier(self, collection, video_id):
+        """
+        Consistency barrier for one video: waits for its queued batches (and
+        re-raises the first upload error), then sends one wait=True no-op.
+        Qdrant applies updates in order, so once that returns every point of
+        the video is indexed and searchable.
+        """
+        with self._pending_lock:
+            futures = self._pending.pop((collection, video_id), [])
+        for future in futures:
+            future.result()
+        self.client.delete(
+            collection_name=collection,
+            points_selector=models.PointIdsList(points=[self._to_uuid(f"barrier:{video_id}")]),
+            wait=True
+        )
+        return len(futures)
+
+    def discard(self, collection, video_id):
+        """
+        Forgets a video's queued batches after a failed run, so a retry in the
+        same process doesn't re-raise the stale error at its own barrier().
+        Batches that have not started are cancelled, running ones just finish.
+        """
+        with self._pending_lock:
+            futures = self._pending.pop((collection, video_id), [])
+        for future in futures:
+            future.cancel()
+        return len(futures)
+
+    def add_frames(self, video_id, data, collection="vision_frames"):
+        if not data: return
+        self.upload_vectors(
+            collection, video_id,
+            [item["id"] for item in data],
+            [item["embedding"] for item in data],
+            [item["metadata"] for item in data]
+        )
+        log.info(f" 💾 Queued {len(data)} frames for Qdrant.")
+
+    def add_transcripts(self, video_id, data, collection="video_transcripts"):
+        if not data: return
+        self.upload_vectors(
+            collection, video_id,
+            [item["id"] for item in data],
+            [item["embedding"] for item in data],
+            [item["metadata"] for item in data]
+        )
+
+    def _video_filter(self, filter_video_id):
+        if not filter_video_id:
+            return None
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="video_id",
+                    match=models.MatchValue(value=filter_video_id)
+                )
+            ]
+        )
+
+    def _hits(self, results):
+        return [{"id": hit.id, "score": hit.score, "metadata": hit.payload} for hit in results]
+
+    def search_vision(self, vector, k=10, filter_video_id=None):
+        results = self.client.search(
+            collection_name="vision_frames",
+            query_vector=vector,
+            query_filter=self._video_filter(filter_video_id),
+            search_params=search_params(),
+            limit=k
+        )
+        return self._hits(results)
+
+    def search_text(self, vector, k=10, filter_video_id=None):
+        results = self.client.search(
+            collection_name="video_transcripts",
+            query_vector=vector,
+            query_filter=self._video_filter(filter_video_id),
+            search_params=search_params(),
+            limit=k
+        )
+        return self._hits(results)
+
+    def _search_requests(self, vectors, k, filter_video_id):
+        query_filter = self._video_filter(filter_video_id)
+        params = search_params()
+        return [
+            models.SearchRequest(vector=vector, filter=query_filter, params=params, limit=k, with_payload=True)
+            for vector in vectors
+        ]
+
+    def search_vision_batch(self, vectors, k=10, filter_video_id=None):
+        """One Qdrant round-trip for many query vectors. Returns one hit list per vector."""
+        results = self.client.search_batch(
+            collection_name="vision_frames",
+            requests=self._search_requests(vectors, k, filter_video_id)
+        )
+        return [self._hits(r) for r in results]
+
+    def search_text_batch(self, vectors, k=10, filter_video_id=None):
+        results = self.client.search_batch(
+            collection_name="video_transcripts",
+            requests=self._search_requests(vectors, k, filter_video_id)
+        )
+        return [self._hits(r) for r in results]
+
+    # --- Async variants (used by the API so lookups can run concurrently) ---
+    async def asearch_vision(self, vector, k=10, filter_video_id=None):
+        results = await self.aclient.search(
+            collection_name="vision_frames",
+            query_vector=vector,
+            query_filter=self._video_filter(filter_video_id),
+            search_params=search_params(),
+            limit=k
+        )
+        return self._hits(results)
+
+    async def asearch_text(self, vector, k=10, filter_video_id=None):
+        results = await self.aclient.search(
+            collection_name="video_transcripts",
+            query_vector=vector,
+            query_filter=self._video_filter(filter_video_id),
+            search_params=search_params(),
+            limit=k
+        )
+        return self._hits(results)
+
+    async def asearch_vision_batch(self, vectors, k=10, filter_video_id=None):
+        results = await self.aclient.search_batch(
+            collection_name="vision_frames",
+            requests=self._search_requests(vectors, k, filter_video_id)
+        )
+        return [self._hits(r) for r in results]
+
+    async def asearch_text_batch(self, vectors, k=10, filter_video_id=None):
+        results = await self.aclient.search_batch(
+            collection_name="video_transcripts",
+            requests=self._search_requests(vectors, k, filter_video_id)
+        )
+        return [self._hits(r) for r in results]
+    
+    def video_stats(self, video_id):
+        """Exact frame / transcript-segment counts for one video (served by the video_id index)."""
+        query_filter = self._video_filter(video_id)
+        return {
+            "frames": self.client.count("vision_frames", count_filter=query_filter, exact=True).count,
+            "segments": self.client.count("video_transcripts", count_filter=query_filter, exact=True).count,
+        }
+
+    def delete_video(self, video_id):
+        """Removes all vectors (Vision & Text) for a specific video."""
+        try:
+            self.client.delete(
+                collection_name="vision_frames",
+                points_selector=models.FilterSelector(
+                    filter=models.Filter(
+                        must=[models.FieldCondition(key="video_id", match=models.MatchValue(value=video_id))]
+                    )
+                ),
+            )
+            self.client.delete(
+                collection_name="video_transcripts",
+                points_selector=models.FilterSelector(
+                    filter=models.Filter(
+                        must=[models.FieldCondition(key="video_id", match=models.MatchValue(value=video_id))]
+                    )
+                ),
+            )
+            log.info(f"🗑️ Deleted vectors for {video_id}")
+        except Exception as e:
+            log.error(f"⚠️ Vector Delete Failed: {e}")
+
+# Collections are checked / created on first use, not at import
+db = Lazy(ReelInsightDB, "qdrant")
\ No newline at end of file
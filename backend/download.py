@@ -1,72 +1,122 @@
-import yt_dlp
-import time
-import re
-import os
-from pathlib import Path
-from config import settings
-from logger import log
-
-def sanitize_filename(name: str) -> str:
-    """Removes special chars and replaces spaces with underscores"""
-    clean = re.sub(r'[^a-zA-Z0-9_.-]', '', name.replace(' ', '_'))
-    return clean
-
-def download_video(url: str) -> str:
-    log.info(f"⬇️ Starting download for: {url}")
-    
-    # 1. Use Invisible Temp Directory
-    work_dir = settings.TEMP_DIR
-    work_dir.mkdir(parents=True, exist_ok=True)
-    
-    timestamp = int(time.time())
-    temp_template = str(work_dir / f"{timestamp}_%(title)s.%(ext)s")
-    
-    ydl_opts = {
-        'format': 'bestvideo[height<=720][ext=mp4][vcodec^=avc1]+bestaudio[ext=m4a]/best[height<=720][ext=mp4][vcodec^=avc1]/best',
-        'outtmpl': temp_template,
-        'noplaylist': True,
-        'restrictfilenames': True,
-        'http_headers': {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Referer': 'https://www.youtube.com/',
-        },
-        'quiet': False,
-        'no_warnings': False,
-    }
-
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            downloaded_path = Path(ydl.prepare_filename(info))
-            
-            if not downloaded_path.exists() or downloaded_path.stat().st_size == 0:
-                 raise Exception("YouTube returned an empty file.")
-
-            # Sanitize
-            safe_name = sanitize_filename(downloaded_path.name)
-            final_path = work_dir / safe_name
-
-            if downloaded_path != final_path:
-                # Handle race condition if file already exists
-                if final_path.exists():
-                    log.warning(f"⚠️ Target file exists, removing old: {final_path.name}")
-                    final_path.unlink()
-                
-                downloaded_path.rename(final_path)
-                log.info(f"✅ Renamed to: {final_path.name}")
-            else:
-                log.info(f"✅ Download complete: {final_path.name}")
-
-            return final_path.name
-
-
-    except Exception as e:
-        log.error(f"⚠️ Download Error: {e}")
-        # Cleanup with proper checks
-        if 'downloaded_path' in locals():
-            try:
-                if downloaded_path.exists():
-                    os.remove(downloaded_path)
-            except Exception as cleanup_error:
-                log.warning(f"Failed to cleanup download: {cleanup_error}")
+import yt_dlp
+import time
+import re
+import os
+import shutil
+import uuid
+from pathlib import Path
+from config import settings
+from logger import log
+
+HTTP_CHUNK_SIZE = 10 * 1024**2   # Ranged requests for non-fragmented formats (YouTube throttles long single GETs)
+PROGRESS_INTERVAL = 1.0          # Seconds between progress reports / cancel checks
+
+class DownloadProgress:
+    """
+    yt-dlp progress hook -> on_progress(fraction, message), throttled.
+    Video and audio streams download one after the other, so bytes are
+    summed per file; should_stop() is polled here too and aborts the download.
+    """
+    def __init__(self, on_progress=None, should_stop=None):
+        self.on_progress = on_progress
+        self.should_stop = should_stop
+        self.files = {}   # filename -> (downloaded, total)
+        self.fraction = 0.0
+        self._last = 0.0
+
+    def __call__(self, d):
+        if d["status"] not in ("downloading", "finished"):
+            return
+        total = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
+        done = d.get("downloaded_bytes") or 0
+        self.files[d.get("filename")] = (total if d["status"] == "finished" else done, total or done)
+
+        now = time.monotonic()
+        if d["status"] == "downloading" and now - self._last < PROGRESS_INTERVAL:
+            return
+        self._last = now
+        if self.should_stop and self.should_stop():
+            raise yt_dlp.utils.DownloadCancelled("Download cancelled by user")
+        if self.on_progress:
+            done = sum(f[0] for f in self.files.values())
+            total = sum(f[1] for f in self.files.values())
+            self.fraction = max(self.fraction, done / total if total else 0.0)  # Never jump back on the next stream
+            speed = d.get("speed")
+            detail = f" ({speed / 1024**2:.1f} MB/s)" if speed else ""
+            self.on_progress(self.fraction, f"Downloading from YouTube... {total / 1024**2:.0f} MB{detail}")
+
+def sanitize_filename(name: str) -> str:
+    """Removes special chars and replaces spaces with underscores"""
+    clean = re.sub(r'[^a-zA-Z0-9_.-]', '', name.replace(' ', '_'))
+    return clean
+
+def download_video(url: str, on_progress=None, should_stop=None) -> str:
+    """Downloads into TEMP_DIR and returns the (sanitized) filename there."""
+    log.info(f"⬇️ Starting download for: {url}")
+    
+    # 1. Use Invisible Temp Directory
+    work_dir = settings.TEMP_DIR
+    work_dir.mkdir(parents=True, exist_ok=True)
+    
+    timestamp = int(time.time())
+    # Unique per download, so a failed one can sweep its own .part / fragment
+    # files by prefix without touching a concurrent download's
+    prefix = f"{timestamp}_{uuid.uuid4().hex[:8]}_"
+    temp_template = str(work_dir / f"{prefix}%(title)s.%(ext)s")
+    
+    ydl_opts = {
+        'format': 'bestvideo[height<=720][ext=mp4][vcodec^=avc1]+bestaudio[ext=m4a]/best[height<=720][ext=mp4][vcodec^=avc1]/best',
+        'outtmpl': temp_template,
+        'noplaylist': True,
+        'restrictfilenames': True,
+        'http_headers': {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Referer': 'https://www.youtube.com/',
+        },
+        'quiet': False,
+        'no_warnings': False,
+        # DASH/HLS fragments in parallel; plain formats in ranged chunks
+        'concurrent_fragment_downloads': settings.DOWNLOAD_FRAGMENTS,
+        'http_chunk_size': HTTP_CHUNK_SIZE,
+        'progress_hooks': [DownloadProgress(on_progress, should_stop)],
+    }
+
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+            downloaded_path = Path(ydl.prepare_filename(info))
+            
+            if not downloaded_path.exists() or downloaded_path.stat().st_size == 0:
+                 raise Exception("YouTube returned an empty file.")
+
+            # Sanitize (and drop the download's private token again)
+            safe_name = sanitize_filename(f"{timestamp}_{downloaded_path.name[len(prefix):]}")
+            final_path = work_dir / safe_name
+
+            if downloaded_path != final_path:
+                # Handle race condition if file already exists
+                if final_path.exists():
+                    log.warning(f"⚠️ Target file exists, removing old: {final_path.name}")
+                    final_path.unlink()
+                
+                downloaded_path.rename(final_path)
+                log.info(f"✅ Renamed to: {final_path.name}")
+            else:
+                log.info(f"✅ Download complete: {final_path.name}")
+
+            return final_path.name
+
+
+    except Exception as e:
+        log.error(f"⚠️ Download Error: {e}")
+        # Cleanup: the output, .part and fragment files all carry our prefix,
+        # even when the error came from a progress hook mid-download
+        for leftover in work_dir.glob(f"{prefix}*"):
+            try:
+                if leftover.is_dir():
+                    shutil.rmtree(leftover)
+                else:
+                    os.remove(leftover)
+            except Exception as cleanup_error:
+                log.warning(f"Failed to cleanup download: {cleanup_error}")
         raise e
\ No newline at end of file
@@ -1,65 +1,191 @@
-import json
-import torch
-from pathlib import Path
-from faster_whisper import WhisperModel
-from config import settings
-from storage import storage
-from logger import log
-
-class AudioTranscriber:
-    def __init__(self, model_size="distil-large-v3"): # 🚀 UPGRADE: Medium -> Distil-Large-v3
-        # FORCE CPU: Reliable performance on Ryzen without VRAM crashes
-        self.device = "cpu"
-        self.compute_type = "int8" 
-        
-        log.info(f"🚀 Loading Whisper ({model_size}) on {self.device.upper()} (Int8)...")
-
-        try:
-            # This downloads the model automatically (~1.5GB first time)
-            self.model = WhisperModel(model_size, device=self.device, compute_type=self.compute_type)
-        except Exception as e:
-            log.error(f"❌ Whisper Init Failed: {e}")
-            raise
-    
-    def transcribe(self, video_id: str):
-        filename = f"{video_id}.wav"
-        audio_path = settings.TEMP_DIR / filename
-        
-        # 1. Fetch Audio if missing
-        if not audio_path.exists():
-            log.info(f"📥 Fetching audio for {video_id}...")
-            try:
-                storage.client.fget_object(settings.MINIO_BUCKET, f"{video_id}/audio.wav", str(audio_path))
-            except Exception as e:
-                log.error(f"❌ Audio fetch failed: {e}")
-                raise FileNotFoundError(f"Audio not found: {video_id}")
-
-        log.info(f"🎙️ Transcribing {filename}...")
-        
-        # 2. Transcribe
-        # Beam size 1 is faster and usually sufficient for 'distil' models
-        # vad_filter=True removes silence gaps automatically
-        segments, info = self.model.transcribe(str(audio_path), beam_size=1, vad_filter=True)
-
-        transcript_data = []
-        for segment in segments:
-            transcript_data.append({
-                "start": segment.start,
-                "end": segment.end,
-                "text": segment.text.strip()
-            })
-
-        # 3. Save & Upload
-        json_filename = f"{video_id}.json"
-        json_path = settings.TEMP_DIR / json_filename
-        
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(transcript_data, f, indent=2)
-            
-        storage.upload_file(str(json_path), f"{video_id}/transcript.json")
-        log.info(f"✅ Transcription complete ({len(transcript_data)} segments).")
-            
-        return transcript_data
-
-if __name__ == "__main__":
+import os
+import json
+import queue
+import threading
+import torch
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from faster_whisper import decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+from config import settings
+from model_registry import get_whisper
+from storage import storage
+from logger import log
+
+SAMPLE_RATE = 16000
+LONG_AUDIO_SECONDS = 20 * 60   # Switch to chunked mode above this duration
+CHUNK_TARGET_SECONDS = 300     # Aim for ~5 min chunks, cut inside silence gaps
+SEGMENT_QUEUE_SIZE = 256       # Segments buffered ahead of the text embedder
+_STREAM_DONE = object()
+
+def split_on_silence(audio, target_seconds=CHUNK_TARGET_SECONDS):
+    """
+    Uses the Silero VAD bundled with faster-whisper to cut the audio into
+    ~target_seconds chunks. Cuts land in the middle of a silence gap, so no
+    word is split across chunks. Returns [(start_sample, end_sample), ...].
+    """
+    speech = get_speech_timestamps(audio, VadOptions(), sampling_rate=SAMPLE_RATE)
+    if not speech:
+        return []
+
+    target = int(target_seconds * SAMPLE_RATE)
+    chunks = []
+    chunk_start = 0
+    for prev, nxt in zip(speech, speech[1:]):
+        if prev["end"] - chunk_start >= target:
+            cut = (prev["end"] + nxt["start"]) // 2
+            chunks.append((chunk_start, cut))
+            chunk_start = cut
+    chunks.append((chunk_start, len(audio)))
+    return chunks
+
+class AudioTranscriber:
+    def __init__(self, model_size="distil-large-v3"): # 🚀 UPGRADE: Medium -> Distil-Large-v3
+        self.model_size = model_size
+        # FORCE CPU: Reliable performance on Ryzen without VRAM crashes
+        self.device = "cpu"
+        self.compute_type = "int8" 
+
+        # Several CTranslate2 workers share the weights; each gets its own slice of cores
+        self.num_workers = max(1, settings.WHISPER_WORKERS)
+        self.cpu_threads = settings.WHISPER_CPU_THREADS or max(1, (os.cpu_count() or 1) // self.num_workers)
+        
+        log.info(f"🚀 Loading Whisper ({model_size}) on {self.device.upper()} (Int8, "
+                 f"{self.num_workers} workers x {self.cpu_threads} threads)...")
+
+        try:
+            # This downloads the model automatically (~1.5GB first time)
+            self.model
+        except Exception as e:
+            log.error(f"❌ Whisper Init Failed: {e}")
+            raise
+
+    @property
+    def model(self):
+        # Shared registry, keyed by size: 'base' and 'distil-large-v3' never collide
+        return get_whisper(self.model_size, device=self.device, compute_type=self.compute_type,
+                           cpu_threads=self.cpu_threads, num_workers=self.num_workers)
+    
+    def transcribe(self, video_id: str, on_segment=None):
+        """
+        Transcribes <video_id>.wav and uploads transcript.json.
+        on_segment(seg) is called for every segment as soon as Whisper emits it
+        (from worker threads in chunked mode), in addition to the returned list.
+        """
+        filename = f"{video_id}.wav"
+        audio_path = settings.TEMP_DIR / filename
+        
+        # 1. Fetch Audio if missing
+        if not audio_path.exists():
+            log.info(f"📥 Fetching audio for {video_id}...")
+            try:
+                storage.client.fget_object(settings.MINIO_BUCKET, f"{video_id}/audio.wav", str(audio_path))
+            except Exception as e:
+                log.error(f"❌ Audio fetch failed: {e}")
+                raise FileNotFoundError(f"Audio not found: {video_id}")
+
+        log.info(f"🎙️ Transcribing {filename}...")
+        
+        # 2. Transcribe
+        audio = decode_audio(str(audio_path), sampling_rate=SAMPLE_RATE)
+        duration = len(audio) / SAMPLE_RATE
+        if duration >= LONG_AUDIO_SECONDS and self.num_workers > 1:
+            transcript_data = self._transcribe_chunked(audio, on_segment)
+        else:
+            transcript_data = self._transcribe_single(audio, on_segment=on_segment)
+
+        # 3. Save & Upload
+        json_filename = f"{video_id}.json"
+        json_path = settings.TEMP_DIR / json_filename
+        
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(transcript_data, f, indent=2)
+            
+        storage.upload_file(str(json_path), f"{video_id}/transcript.json")
+        log.info(f"✅ Transcription complete ({len(transcript_data)} segments).")
+            
+        return transcript_data
+
+    def stream_segments(self, video_id: str):
+        """
+        Incremental mode: yields segment dicts while Whisper is still running,
+        so the text embedder can index a long video as it is transcribed.
+        transcript.json is still written and uploaded when the stream ends.
+        Consumers must close() the generator (contextlib.closing) so Whisper
+        stops if they fail.
+        """
+        segments = queue.Queue(maxsize=SEGMENT_QUEUE_SIZE)
+        stop = threading.Event()
+
+        def put(item):
+            # Never block for good on a full queue: the consumer may be gone
+            while not stop.is_set():
+                try:
+                    segments.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+            raise InterruptedError("Segment consumer stopped")
+
+        def produce():
+            try:
+                self.transcribe(video_id, on_segment=put)
+                put(_STREAM_DONE)
+            except BaseException as e:
+                try:
+                    put(e)
+                except InterruptedError:
+                    pass  # Nobody is listening any more
+
+        producer = threading.Thread(target=produce, name=f"whisper-{video_id}", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = segments.get()
+                if item is _STREAM_DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Consumer done or bailed out early: Whisper stops at its next segment
+            stop.set()
+            producer.join()
+
+    def _transcribe_single(self, audio, offset=0.0, on_segment=None):
+        # Beam size 1 is faster and usually sufficient for 'distil' models
+        # vad_filter=True removes silence gaps automatically
+        segments, info = self.model.transcribe(audio, beam_size=1, vad_filter=True)
+
+        transcript_data = []
+        for segment in segments:
+            seg = {
+                "start": segment.start + offset,
+                "end": segment.end + offset,
+                "text": segment.text.strip()
+            }
+            transcript_data.append(seg)
+            if on_segment:
+                on_segment(seg)
+        return transcript_data
+
+    def _transcribe_chunked(self, audio, on_segment=None):
+        """
+        Long-audio mode: silence-aligned chunks are transcribed in parallel across
+        the model's CTranslate2 workers, then stitched back in order with each
+        chunk's offset added to its segment timestamps.
+        """
+        chunks = split_on_silence(audio)
+        log.info(f"🧩 Long audio ({len(audio) / SAMPLE_RATE / 60:.1f} min): "
+                 f"{len(chunks)} chunks across {self.num_workers} workers")
+
+        def run(chunk):
+            start, end = chunk
+            return self._transcribe_single(audio[start:end], offset=start / SAMPLE_RATE, on_segment=on_segment)
+
+        with ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="whisper") as pool:
+            parts = list(pool.map(run, chunks))
+        return [seg for part in parts for seg in part]
+
+if __name__ == "__main__":
     pass
\ No newline at end of file
@@ -0,0 +1,204 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from config import settings
+from logger import log
+
+REMOTE_PREFIX = "_embeddings"   # MinIO tier; '_' keeps it out of the video listing
+UPLOAD_WORKERS = 4
+EVICT_TO = 0.9                  # Evict down to 90% of the budget so we don't evict on every put
+TOUCH_FLUSH = 256               # Buffered hit timestamps written in one executemany
+SIZE_RECHECK_SECONDS = 30       # Other processes write to the same file: re-read its size this often
+
+class CacheStats:
+    """Per-run counters (one per video), so the hit rate of a re-ingest shows up in the logs."""
+    def __init__(self):
+        self.hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def add(self, hits=0, remote_hits=0, misses=0):
+        # Lookups run on prefetch threads
+        with self._lock:
+            self.hits += hits
+            self.remote_hits += remote_hits
+            self.misses += misses
+
+    @property
+    def lookups(self):
+        return self.hits + self.remote_hits + self.misses
+
+    def __str__(self):
+        if not self.lookups:
+            return "no lookups"
+        rate = (self.hits + self.remote_hits) / self.lookups
+        return (f"{rate:.1%} hit ({self.hits} local + {self.remote_hits} remote "
+                f"/ {self.lookups} lookups)")
+
+class EmbeddingStore:
+    """
+    Content-addressed vector store shared by every embedder in the process.
+    - Local tier: one SQLite file under EMBED_CACHE_DIR, bounded to
+      EMBED_CACHE_MAX_MB with least-recently-used eviction. WAL mode, so
+      several Celery processes can share it; the budget is checked against
+      the file's real size, not what this process wrote.
+      Hits only buffer their "used" time in memory; the buffer is written
+      in one batch (every TOUCH_FLUSH hits, on put_many and before eviction).
+    - Remote tier (EMBED_CACHE_MINIO): raw float32 blobs in the bucket, so
+      other workers (and fresh containers) reuse each other's work.
+    """
+    def __init__(self):
+        settings.EMBED_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        self.path = settings.EMBED_CACHE_DIR / "embeddings.sqlite3"
+        self.max_bytes = settings.EMBED_CACHE_MAX_MB * 1024**2
+        self.remote = settings.EMBED_CACHE_MINIO
+        # Remote writes must not stall the GPU loop
+        self._uploader = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="embed-cache") if self.remote else None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, used REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+        self._conn.commit()
+        self._touched = {}   # key -> last hit time, not yet written
+        self._bytes, count = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0), COUNT(*) FROM embeddings").fetchone()
+        self._checked = time.monotonic()
+        log.info(f"🗃️ Embedding cache: {count} vectors ({self._bytes / 1024**2:.1f} MB) at {self.path}")
+
+    def _remote_name(self, key):
+        return f"{REMOTE_PREFIX}/{key[:2]}/{key}"
+
+    def get_many(self, keys, stats=None):
+        """Returns one blob (or None) per key."""
+        found = {}
+        if keys:
+            with self._lock:
+                marks = ",".join("?" * len(keys))
+                found = dict(self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", list(keys)))
+                if found:
+                    now = time.time()
+                    self._touched.update((k, now) for k in found)
+                    if len(self._touched) >= TOUCH_FLUSH:
+                        self._flush_touched()
+                        self._conn.commit()
+
+        remote = {}
+        if self.remote:
+            remote = {k: blob for k in keys if k not in found and (blob := self._get_remote(k)) is not None}
+            if remote:
+                self.put_many(remote.items(), upload=False)
+        if stats is not None:
+            stats.add(len(found), len(remote), len(keys) - len(found) - len(remote))
+        return [found.get(k, remote.get(k)) for k in keys]
+
+    def _get_remote(self, key):
+        from storage import storage
+        response = None
+        try:
+            response = storage.client.get_object(settings.MINIO_BUCKET, self._remote_name(key))
+            return response.read()
+        except Exception:
+            return None
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
+    def _flush_touched(self):
+        """Caller holds the lock and commits."""
+        if self._touched:
+            self._conn.executemany("UPDATE embeddings SET used = ? WHERE key = ?",
+                                   [(used, k) for k, used in self._touched.items()])
+            self._touched.clear()
+
+    def _stored_bytes(self):
+        return self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+    def put_many(self, items, upload=True):
+        items = list(items)
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._flush_touched()
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector, used) VALUES (?, ?, ?)",
+                                   [(k, blob, now) for k, blob in items])
+            self._conn.commit()
+            # Local estimate (replacements counted as new) triggers an early check;
+            # other processes' writes are picked up by the periodic re-read
+            self._bytes += sum(len(blob) for _, blob in items)
+            if self._bytes > self.max_bytes or time.monotonic() - self._checked > SIZE_RECHECK_SECONDS:
+                self._bytes = self._stored_bytes()
+                self._checked = time.monotonic()
+                if self._bytes > self.max_bytes:
+                    self._evict()
+
+        if upload and self.remote:
+            from storage import storage
+            for key, blob in items:
+                self._uploader.submit(storage.upload_bytes, blob, self._remote_name(key))
+
+    def _evict(self):
+        target = int(self.max_bytes * EVICT_TO)
+        evicted = 0
+        # Write lock first, then the size: another process may have just evicted
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._bytes = self._stored_bytes()
+        for key, size in self._conn.execute("SELECT key, LENGTH(vector) FROM embeddings ORDER BY used").fetchall():
+            if self._bytes <= target:
+                break
+            self._conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+            self._bytes -= size
+            evicted += 1
+        self._conn.commit()
+        if not evicted:
+            return
+        log.info(f"🗃️ Embedding cache evicted {evicted} vectors (now {self._bytes / 1024**2:.1f} MB)")
+
+_store = None
+_store_guard = threading.Lock()
+
+def get_store():
+    global _store
+    with _store_guard:
+        if _store is None:
+            _store = EmbeddingStore()
+    return _store
+
+class EmbeddingCache:
+    """
+    Per-model view of the shared store. Keys are sha256(model name + content),
+    so a model upgrade never serves stale vectors.
+    """
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.enabled = settings.EMBED_CACHE
+        self.store = get_store() if self.enabled else None
+
+    def key(self, *parts):
+        h = hashlib.sha256(self.model_name.encode())
+        for part in parts:
+            h.update(b"\0")
+            h.update(part.encode() if isinstance(part, str) else part)
+        return h.hexdigest()
+
+    def get_many(self, keys, stats=None):
+        if not self.enabled:
+            if stats is not None:
+                stats.add(misses=len(keys))
+            return [None] * len(keys)
+        return [None if blob is None else np.frombuffer(blob, dtype=np.float32)
+                for blob in self.store.get_many(keys, stats)]
+
+    def get(self, key, stats=None):
+        return self.get_many([key], stats)[0]
+
+    def put_many(self, keys, vectors):
+        if self.enabled:
+            self.store.put_many((k, np.asarray(v, dtype=np.float32).tobytes()) for k, v in zip(keys, vectors))
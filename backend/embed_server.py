@@ -0,0 +1,182 @@
+"""
+Optional local embedding server.
+
+One process owns CLIP + MiniLM (through the model registry) and the API and
+worker processes on the same node call it over a Unix socket, so the
+~1.7 GB of CLIP weights is resident once per host instead of once per process.
+
+    EMBED_SERVER_AUTHKEY=<secret> python embed_server.py [--preload]
+    # then set EMBED_SERVER_SOCKET (same path) and the same EMBED_SERVER_AUTHKEY
+    # for uvicorn and celery
+
+Without EMBED_SERVER_SOCKET every process loads its own models in-process.
+"""
+import argparse
+import os
+import threading
+import numpy as np
+from multiprocessing.connection import Listener, Client
+from config import settings
+from logger import log
+
+DEFAULT_SOCKET = "/tmp/reelinsight_embed.sock"
+WEAK_AUTHKEYS = {"", "reelinsight"}   # Unset, or the old published default
+SOCKET_UMASK = 0o117                  # Socket created as 0660: owner + group only
+
+def _authkey():
+    key = settings.EMBED_SERVER_AUTHKEY
+    if key in WEAK_AUTHKEYS:
+        # Connections exchange pickles: a guessable key means code execution
+        raise RuntimeError("EMBED_SERVER_AUTHKEY must be set to a private secret to use the embedding server")
+    return key.encode()
+
+# --- Server ---
+
+def _clip_info(model_name, device):
+    from model_registry import local_clip
+    clip_model = local_clip(model_name, device)
+    return {"tag": clip_model.tag, "device": clip_model.device, "input_size": clip_model.input_size}
+
+def _clip_images(model_name, device, images):
+    from model_registry import local_clip
+    return local_clip(model_name, device).encode_images(images)
+
+def _clip_texts(model_name, device, texts):
+    from model_registry import local_clip
+    return local_clip(model_name, device).encode_texts(texts)
+
+def _encode_sentences(model_name, device, texts, batch_size):
+    from model_registry import local_sentence_encoder
+    return local_sentence_encoder(model_name, device).encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+def _stats():
+    from model_registry import registry
+    return registry.stats()
+
+OPS = {
+    "clip_info": _clip_info,
+    "clip_images": _clip_images,
+    "clip_texts": _clip_texts,
+    "encode_sentences": _encode_sentences,
+    "stats": _stats,
+}
+
+def _serve_connection(conn):
+    try:
+        while True:
+            op, args = conn.recv()
+            try:
+                conn.send(("ok", OPS[op](*args)))
+            except Exception as e:
+                log.error(f"❌ Embed server '{op}' failed: {e}")
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+    except (EOFError, ConnectionResetError):
+        pass
+    finally:
+        conn.close()
+
+def serve(address, preload=False):
+    authkey = _authkey()
+    if os.path.exists(address):
+        os.remove(address)
+    if preload:
+        _clip_info("ViT-L/14", "cuda" if _cuda() else "cpu")
+        _encode_sentences("all-MiniLM-L6-v2", "cpu", ["warmup"], 1)
+
+    # Restrictive from the moment bind() creates it, not chmod-ed afterwards
+    old_umask = os.umask(SOCKET_UMASK)
+    try:
+        listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    finally:
+        os.umask(old_umask)
+    with listener:
+        log.info(f"🧩 Embedding server listening on {address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                log.warning(f"⚠️ Rejected embed client: {e}")
+                continue
+            threading.Thread(target=_serve_connection, args=(conn,), daemon=True).start()
+
+def _cuda():
+    import torch
+    return torch.cuda.is_available()
+
+# --- Clients ---
+
+class _RemoteCall:
+    """One connection per calling thread (Connections are not thread-safe)."""
+    def __init__(self, address):
+        self.address = address
+        self._local = threading.local()
+
+    def __call__(self, op, *args):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = Client(self.address, family="AF_UNIX", authkey=_authkey())
+        try:
+            conn.send((op, args))
+            status, result = conn.recv()
+        except (EOFError, OSError):
+            # Server restarted: reconnect on the next call
+            self._local.conn = None
+            raise
+        if status != "ok":
+            raise RuntimeError(f"Embedding server: {result}")
+        return result
+
+_clients = {}
+_clients_guard = threading.Lock()
+
+def _client(cls, model_name, device):
+    with _clients_guard:
+        key = (cls, model_name, device)
+        if key not in _clients:
+            _clients[key] = cls(_RemoteCall(settings.EMBED_SERVER_SOCKET), model_name, device)
+        return _clients[key]
+
+class RemoteCLIP:
+    """Same interface as clip_backend.TorchCLIP / OnnxCLIP, computed by the server."""
+    def __init__(self, call, model_name, device):
+        import clip
+        self.call = call
+        self.model_name = model_name
+        info = call("clip_info", model_name, device)
+        self.tag = info["tag"]
+        self.device = info["device"]
+        self.input_size = info["input_size"]
+        self.preprocess = clip.clip._transform(self.input_size)
+        self._request_device = device
+
+    @classmethod
+    def connect(cls, model_name, device):
+        return _client(cls, model_name, device)
+
+    def encode_images(self, images):
+        batch = images.numpy() if hasattr(images, "numpy") else np.asarray(images)
+        return self.call("clip_images", self.model_name, self._request_device, batch)
+
+    def encode_texts(self, texts):
+        return self.call("clip_texts", self.model_name, self._request_device, list(texts))
+
+class RemoteSentenceEncoder:
+    """Stand-in for SentenceTransformer.encode, computed by the server."""
+    def __init__(self, call, model_name, device):
+        self.call = call
+        self.model_name = model_name
+        self.device = device
+
+    @classmethod
+    def connect(cls, model_name, device):
+        return _client(cls, model_name, device)
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, **kwargs):
+        return self.call("encode_sentences", self.model_name, self.device, list(texts), batch_size)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ReelInsight local embedding server")
+    parser.add_argument("--socket", default=settings.EMBED_SERVER_SOCKET or DEFAULT_SOCKET)
+    parser.add_argument("--preload", action="store_true", help="Load + warm CLIP and MiniLM before accepting clients")
+    args = parser.parse_args()
+    serve(args.socket, preload=args.preload)
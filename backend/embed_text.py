@@ -1,77 +1,141 @@
-import json
-import torch
-from pathlib import Path
-from sentence_transformers import SentenceTransformer
-from config import settings
-from db import db
-from logger import log
-
-class TextEmbedder:
-    def __init__(self):
-        # 🚀 UPGRADE: Switched from CLIP (Vision) to MiniLM (Pure Text)
-        # This is 5x faster on CPU and significantly more accurate for text search.
-        self.model_name = "all-MiniLM-L6-v2"
-        log.info(f"📝 Loading Text Model: {self.model_name}...")
-        
-        # FORCE CPU: This ensures we don't crash your 16GB RAM with CUDA overhead
-        # The model is small enough that CPU is very fast.
-        self.device = "cpu"
-        
-        try:
-            self.model = SentenceTransformer(self.model_name, device=self.device)
-        except Exception as e:
-            log.error(f"❌ Failed to load SentenceTransformer: {e}")
-            raise
-
-    def process_transcripts(self, video_id: str):
-        json_path = settings.TEMP_DIR / f"{video_id}.json"
-        
-        # 1. Fetch transcript if missing (Stateless check)
-        if not json_path.exists():
-            from storage import storage
-            try:
-                log.info(f"📥 Fetching transcript from Storage for {video_id}...")
-                storage.client.fget_object(settings.MINIO_BUCKET, f"{video_id}/transcript.json", str(json_path))
-            except:
-                log.error(f"❌ Transcript missing for embedding: {video_id}")
-                return # Fail gracefully
-
-        log.info(f"⚡ Embedding Transcript for: {video_id}")
-        
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-        segments = data if isinstance(data, list) else data.get("segments", [])
-        
-        # 2. Prepare Batch
-        # We filter out tiny snippets (< 5 chars) to reduce noise
-        valid_segments = [seg for seg in segments if len(seg['text'].strip()) > 5]
-        texts = [seg['text'].strip() for seg in valid_segments]
-        
-        if not texts:
-            log.warning("⚠️ No valid text found in transcript.")
-            return
-
-        # 3. Batch Inference (Fast on CPU)
-        # batch_size=32 is a safe sweet spot for Ryzen CPUs
-        embeddings = self.model.encode(texts, batch_size=32, convert_to_numpy=True)
-        
-        batch_data = []
-        for i, seg in enumerate(valid_segments):
-            batch_data.append({
-                "id": f"{video_id}_txt_{float(seg['start']):.2f}",
-                "embedding": embeddings[i].tolist(), # 384 dimensions
-                "metadata": {
-                    "video_id": video_id,
-                    "timestamp": float(seg['start']),
-                    "text": seg['text'].strip(),
-                    "end": float(seg['end'])
-                }
-            })
-
-        # 4. Save to DB
-        db.add_transcripts(video_id, batch_data)
-        log.info(f"✅ Saved {len(batch_data)} text segments (Model: {self.model_name}).")
-
-if __name__ == "__main__":
+import json
+import numpy as np
+import time
+import torch
+from contextlib import closing
+from pathlib import Path
+from config import settings
+from db import db
+from embed_cache import EmbeddingCache, CacheStats
+from model_registry import get_sentence_encoder
+from logger import log
+
+# --- Incremental Mode ---
+STREAM_BATCH_SIZE = 32       # Segments per MiniLM call / Qdrant upsert
+STREAM_FLUSH_SECONDS = 5.0   # ...or sooner, so slow transcriptions still show up in search
+
+class TextEmbedder:
+    def __init__(self):
+        # 🚀 UPGRADE: Switched from CLIP (Vision) to MiniLM (Pure Text)
+        # This is 5x faster on CPU and significantly more accurate for text search.
+        self.model_name = "all-MiniLM-L6-v2"
+        log.info(f"📝 Loading Text Model: {self.model_name}...")
+        
+        # FORCE CPU: This ensures we don't crash your 16GB RAM with CUDA overhead
+        # The model is small enough that CPU is very fast.
+        self.device = "cpu"
+        
+        try:
+            self.model  # Load (or connect) now rather than on the first segment
+        except Exception as e:
+            log.error(f"❌ Failed to load SentenceTransformer: {e}")
+            raise
+        self.cache = EmbeddingCache(f"sentence-transformers:{self.model_name}")
+        # Target collection (alias); reindex.py points this at a new version
+        self.collection = "video_transcripts"
+
+    @property
+    def model(self):
+        return get_sentence_encoder(self.model_name, self.device)
+
+    def process_transcripts(self, video_id: str):
+        json_path = settings.TEMP_DIR / f"{video_id}.json"
+        
+        # 1. Fetch transcript if missing (Stateless check)
+        if not json_path.exists():
+            from storage import storage
+            try:
+                log.info(f"📥 Fetching transcript from Storage for {video_id}...")
+                storage.client.fget_object(settings.MINIO_BUCKET, f"{video_id}/transcript.json", str(json_path))
+            except:
+                log.error(f"❌ Transcript missing for embedding: {video_id}")
+                return # Fail gracefully
+
+        log.info(f"⚡ Embedding Transcript for: {video_id}")
+        
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            
+        segments = data if isinstance(data, list) else data.get("segments", [])
+        
+        # 2. Prepare Batch
+        # We filter out tiny snippets (< 5 chars) to reduce noise
+        valid_segments = [seg for seg in segments if len(seg['text'].strip()) > 5]
+        
+        if not valid_segments:
+            log.warning("⚠️ No valid text found in transcript.")
+            return
+
+        # 3. Batch Inference + 4. Save to DB
+        stats = CacheStats()
+        try:
+            count = self._embed_and_store(video_id, valid_segments, stats)
+            db.barrier(self.collection, video_id)
+        except BaseException:
+            # Nothing queued for this video may surface at a retry's barrier
+            db.discard(self.collection, video_id)
+            raise
+        log.info(f"✅ Saved {count} text segments (Model: {self.model_name}). Embedding cache: {stats}")
+
+    def process_segment_stream(self, video_id: str, segments):
+        """
+        Incremental mode: consumes segments as Whisper produces them
+        (AudioTranscriber.stream_segments) and upserts them in small batches,
+        so a long video becomes searchable while it is still transcribing.
+        """
+        log.info(f"⚡ Embedding Transcript Stream for: {video_id}")
+
+        batch = []
+        total = 0
+        stats = CacheStats()
+        last_flush = time.monotonic()
+        try:
+            with closing(segments):
+                for seg in segments:
+                    if len(seg['text'].strip()) > 5:
+                        batch.append(seg)
+                    if len(batch) >= STREAM_BATCH_SIZE or (batch and time.monotonic() - last_flush >= STREAM_FLUSH_SECONDS):
+                        total += self._embed_and_store(video_id, batch, stats)
+                        batch = []
+                        last_flush = time.monotonic()
+
+            if batch:
+                total += self._embed_and_store(video_id, batch, stats)
+            db.barrier(self.collection, video_id)
+        except BaseException:
+            db.discard(self.collection, video_id)
+            raise
+        if not total:
+            log.warning("⚠️ No valid text found in transcript.")
+        log.info(f"✅ Saved {total} streamed text segments (Model: {self.model_name}). Embedding cache: {stats}")
+
+    def _embed_and_store(self, video_id, valid_segments, stats=None):
+        texts = [seg['text'].strip() for seg in valid_segments]
+
+        # Only segments whose text was never embedded go through MiniLM
+        keys = [self.cache.key(text) for text in texts]
+        embeddings = self.cache.get_many(keys, stats)
+        missing = [i for i, e in enumerate(embeddings) if e is None]
+        if missing:
+            # batch_size=32 is a safe sweet spot for Ryzen CPUs
+            fresh = self.model.encode([texts[i] for i in missing], batch_size=32, convert_to_numpy=True)
+            self.cache.put_many([keys[i] for i in missing], fresh)
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+        
+        # Columnar bulk upload: one (n, 384) matrix, payload as columns
+        db.upload_vectors(
+            self.collection, video_id,
+            [f"{video_id}_txt_{float(seg['start']):.2f}" for seg in valid_segments],
+            np.stack(embeddings),
+            {
+                "video_id": video_id,
+                "timestamp": [float(seg['start']) for seg in valid_segments],
+                "text": texts,
+                "end": [float(seg['end']) for seg in valid_segments],
+            }
+        )
+        return len(valid_segments)
+
+if __name__ == "__main__":
     pass
\ No newline at end of file
@@ -1,84 +1,268 @@
-import torch
-import clip
-import json
-from PIL import Image
-from pathlib import Path
-from config import settings
-from db import db
-from logger import log
-
-class VisionEmbedder:
-    def __init__(self):
-        # 🚀 UPGRADE: Using ViT-L/14 (Large) for high-accuracy visual search
-        # This requires ~2GB VRAM, which is fine for your L4 or local GPU.
-        self.model_name = "ViT-L/14" 
-        log.info(f"👁️ Loading CLIP Model: {self.model_name}...")
-        
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        
-        # Jit=False helps with some compatibility issues on newer PyTorch versions
-        self.model, self.preprocess = clip.load(self.model_name, device=self.device, jit=False)
-
-    def process_video_frames(self, video_id: str):
-        video_dir = settings.TEMP_DIR / video_id
-        if not video_dir.exists():
-            log.error(f"❌ Frames folder missing: {video_dir}")
-            raise FileNotFoundError(f"Frames directory not found: {video_dir}")
-
-        log.info(f"⚡ Embedding Frames for: {video_id} (Model: {self.model_name})")
-        
-        ts_path = video_dir / "timestamps.json"
-        if not ts_path.exists():
-            raise FileNotFoundError(f"Timestamps metadata missing: {ts_path}")
-            
-        with open(ts_path, 'r') as f:
-            frames_meta = json.load(f)
-
-        # Smaller batch size for the Larger Model to prevent OOM
-        batch_size = 4 
-        total_frames = len(frames_meta)
-        
-        for i in range(0, total_frames, batch_size):
-            batch_meta = frames_meta[i : i + batch_size]
-            batch_images = []
-            valid_batch_meta = []
-            
-            for meta in batch_meta:
-                frame_path = video_dir / meta["filename"]
-                if frame_path.exists():
-                    try:
-                        img = self.preprocess(Image.open(frame_path))
-                        batch_images.append(img)
-                        valid_batch_meta.append(meta)
-                    except Exception as e:
-                        log.warning(f"⚠️ Failed to load frame {frame_path}: {e}")
-                        continue
-
-            if not batch_images: continue
-
-            image_input = torch.tensor(torch.stack(batch_images)).to(self.device)
-            with torch.no_grad():
-                # Encode and normalize
-                embeddings = self.model.encode_image(image_input)
-                embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
-                embeddings = embeddings.cpu().numpy()
-
-            batch_data = []
-            for j, embedding in enumerate(embeddings):
-                meta = valid_batch_meta[j]
-                batch_data.append({
-                    "id": f"{video_id}_{float(meta['timestamp']):.2f}",
-                    "embedding": embedding.flatten().tolist(), # Should be 768 long
-                    "metadata": {
-                        "video_id": video_id,
-                        "timestamp": float(meta["timestamp"]),
-                        "frame_path": meta.get("s3_key", f"{video_id}/frames/{meta['filename']}")
-                    }
-                })
-
-            db.add_frames(video_id, batch_data)
-            if i % 20 == 0:
-                log.info(f"   ↳ Processed {min(i + batch_size, total_frames)}/{total_frames} frames...")
-
-if __name__ == "__main__":
-    pass
\ No newline at end of file
+import os
+import time
+import torch
+import json
+import numpy as np
+from io import BytesIO
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from pathlib import Path
+from config import settings
+from clip_backend import normalize
+from model_registry import get_clip
+from db import db
+from storage import storage
+from embed_cache import EmbeddingCache, CacheStats
+from logger import log
+
+# --- Batching Engine ---
+START_BATCH_SIZE = 4            # Safe first guess for ViT-L/14
+MAX_BATCH_SIZE = 64
+MEMORY_PER_FRAME = 48 * 1024**2 # Rough peak activation cost of one ViT-L/14 image (fp32)
+MEMORY_HEADROOM = 0.5           # Only plan batches into half of what is free
+MIN_GAIN = 1.05                 # Keep doubling while frames/sec improves by >5%
+PREFETCH_WORKERS = 4            # Threads doing PIL decode + CLIP preprocess
+PREFETCH_BATCHES = 2            # Batches kept in flight ahead of the model
+UPSERT_CHUNK = 256              # Points per Qdrant write
+
+def available_memory(device):
+    """Free bytes on the inference device (None if unknown)."""
+    if device == "cuda":
+        free, _ = torch.cuda.mem_get_info()
+        return free
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def prefetch(pool, fn, items, depth):
+    """Ordered map of fn over items with at most `depth` calls in flight."""
+    window = deque()
+    for item in items:
+        window.append(pool.submit(fn, item))
+        if len(window) >= depth:
+            yield window.popleft().result()
+    while window:
+        yield window.popleft().result()
+
+class AdaptiveBatcher:
+    """
+    Picks the CLIP batch size: capped by free memory, then hill-climbed on
+    measured frames/sec (double while it keeps paying off, step back once it
+    doesn't). The tuned size carries over between videos.
+    """
+    def __init__(self, device):
+        self.device = device
+        self.size = START_BATCH_SIZE
+        self.max_size = MAX_BATCH_SIZE
+        self.best_fps = 0.0
+        self.prev_size = self.size
+        self.settled = False
+
+    def refresh_cap(self):
+        free = available_memory(self.device)
+        cap = MAX_BATCH_SIZE
+        if free is not None:
+            cap = int(free * MEMORY_HEADROOM // MEMORY_PER_FRAME)
+        self.max_size = max(1, min(MAX_BATCH_SIZE, cap))
+        self.size = min(self.size, self.max_size)
+
+    def record(self, n_frames, seconds):
+        # Partial (tail) batches say nothing about the current size
+        if self.settled or n_frames < self.size:
+            return
+        fps = n_frames / max(seconds, 1e-6)
+        if fps > self.best_fps * MIN_GAIN:
+            self.best_fps = fps
+            if self.size >= self.max_size:
+                self.settled = True
+            else:
+                self.prev_size, self.size = self.size, min(self.size * 2, self.max_size)
+        else:
+            self.size = self.prev_size
+            self.settled = True
+            log.info(f"   ↳ CLIP batch size settled at {self.size} ({self.best_fps:.1f} frames/sec)")
+
+class VisionEmbedder:
+    def __init__(self):
+        # 🚀 UPGRADE: Using ViT-L/14 (Large) for high-accuracy visual search
+        # This requires ~2GB VRAM, which is fine for your L4 or local GPU.
+        self.model_name = "ViT-L/14"
+        log.info(f"👁️ Loading CLIP Model: {self.model_name}...")
+
+        self.requested_device = "cuda" if torch.cuda.is_available() else "cpu"
+
+        # Backend (PyTorch or ONNX Runtime int8) comes from settings.CLIP_BACKEND;
+        # weights live in the shared model registry (or the local embedding server)
+        clip_model = self.clip
+        self.device = clip_model.device
+        self.preprocess = clip_model.preprocess
+        self.batcher = AdaptiveBatcher(self.device)
+        # Backend tag in the key: int8 vectors never mix with fp32 ones
+        self.cache = EmbeddingCache(f"clip:{clip_model.tag}")
+        # Target collection (alias); reindex.py points this at a new version
+        self.collection = "vision_frames"
+
+    @property
+    def clip(self):
+        # Looked up per use, so the registry can unload it under memory pressure
+        return get_clip(self.model_name, self.requested_device)
+
+    def process_video_frames(self, video_id: str):
+        """
+        Disk handoff: embeds TEMP_DIR/<video_id> as written by extract_frames.
+        Frames missing locally (e.g. a resumed task on another worker) are read
+        back from MinIO instead of re-decoding the video.
+        """
+        video_dir = settings.TEMP_DIR / video_id
+        ts_path = video_dir / "timestamps.json"
+        if not ts_path.exists():
+            try:
+                log.info(f"📥 Fetching frame manifest from Storage for {video_id}...")
+                video_dir.mkdir(parents=True, exist_ok=True)
+                storage.client.fget_object(settings.MINIO_BUCKET, f"{video_id}/timestamps.json", str(ts_path))
+            except Exception as e:
+                log.error(f"❌ Frames missing for embedding: {video_id}")
+                raise FileNotFoundError(f"Timestamps metadata missing: {ts_path}") from e
+
+        log.info(f"⚡ Embedding Frames for: {video_id} (Model: {self.model_name})")
+
+        with open(ts_path, 'r') as f:
+            frames_meta = json.load(f)
+
+        def load(meta, stats):
+            frame_path = video_dir / meta["filename"]
+            try:
+                if frame_path.exists():
+                    data = frame_path.read_bytes()
+                else:
+                    data = storage.download_bytes(meta.get("s3_key", f"{video_id}/frames/{meta['filename']}"))
+                key = self.cache.key(data)
+                cached = self.cache.get(key, stats)
+                if cached is not None:
+                    return None, meta, key, cached
+                return self.preprocess(Image.open(BytesIO(data))), meta, key, None
+            except Exception as e:
+                log.warning(f"⚠️ Failed to load frame {frame_path}: {e}")
+                return None
+
+        self._embed_all(video_id, frames_meta, load, total_frames=len(frames_meta))
+
+    def process_frame_stream(self, video_id: str, frames):
+        """
+        Memory handoff from VideoProcessor.stream_frames(): consumes
+        (meta, BGR ndarray) pairs as they are decoded, no JPEGs involved.
+        The stream is closed even if embedding fails, which stops the decoder.
+        """
+        log.info(f"⚡ Embedding Frame Stream for: {video_id} (Model: {self.model_name})")
+
+        def load(item, stats):
+            meta, frame = item
+            frame = np.ascontiguousarray(frame)
+            key = self.cache.key(str(frame.shape), memoryview(frame).cast("B"))
+            cached = self.cache.get(key, stats)
+            if cached is not None:
+                return None, meta, key, cached
+            rgb = np.ascontiguousarray(frame[:, :, ::-1])
+            return self.preprocess(Image.fromarray(rgb)), meta, key, None
+
+        with closing(frames):
+            self._embed_all(video_id, frames, load)
+
+    def _embed_all(self, video_id, items, load, total_frames=None):
+        """
+        Batching engine shared by both handoffs: a thread pool prefetches,
+        looks frames up in the embedding cache and preprocesses the misses,
+        the AdaptiveBatcher sizes each forward pass, and points are queued to
+        Qdrant in UPSERT_CHUNK-sized chunks (one barrier at the end). load(item, stats) returns
+        (image, meta, cache_key, cached_vector) or None to skip the item.
+        """
+        self.batcher.refresh_cap()
+        started = time.perf_counter()
+        stats = CacheStats()
+        batch_images, batch_meta, batch_keys, pending = [], [], [], []
+        total = 0
+        next_log = 20
+
+        def flush_pending():
+            if len(pending) >= UPSERT_CHUNK:
+                db.add_frames(video_id, pending, collection=self.collection)
+                pending.clear()
+
+        def run_batch():
+            nonlocal total, next_log
+            pending.extend(self._embed_batch(video_id, batch_images, batch_meta, batch_keys))
+            total += len(batch_images)
+            batch_images.clear()
+            batch_meta.clear()
+            batch_keys.clear()
+            flush_pending()
+            if total >= next_log:
+                of_total = f"/{total_frames}" if total_frames else ""
+                log.info(f"   ↳ Processed {total}{of_total} frames...")
+                next_log = total + 20
+
+        depth = PREFETCH_BATCHES * self.batcher.max_size
+        try:
+            with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="clip-prefetch") as pool:
+                for loaded in prefetch(pool, lambda item: load(item, stats), items, depth):
+                    if loaded is None:
+                        continue
+                    image, meta, key, cached = loaded
+                    if cached is not None:
+                        pending.append(self._point(video_id, meta, cached))
+                        flush_pending()
+                        continue
+                    batch_images.append(image)
+                    batch_meta.append(meta)
+                    batch_keys.append(key)
+                    if len(batch_images) >= self.batcher.size:
+                        run_batch()
+
+            if batch_images:
+                run_batch()
+            if pending:
+                db.add_frames(video_id, pending, collection=self.collection)
+            db.barrier(self.collection, video_id)
+        except BaseException:
+            # Nothing queued for this video may surface at a retry's barrier
+            db.discard(self.collection, video_id)
+            raise
+
+        elapsed = time.perf_counter() - started
+        log.info(f"✅ Embedded {total} frames for {video_id} in {elapsed:.1f}s "
+                 f"({total / max(elapsed, 1e-6):.1f} frames/sec, batch size {self.batcher.size})")
+        log.info(f"   ↳ Embedding cache: {stats}")
+
+    def _point(self, video_id, meta, embedding):
+        return {
+            "id": f"{video_id}_{float(meta['timestamp']):.2f}",
+            "embedding": embedding.flatten(), # Should be 768 long
+            "metadata": {
+                "video_id": video_id,
+                "timestamp": float(meta["timestamp"]),
+                "end": float(meta.get("end", meta["timestamp"])),
+                "frame_path": meta.get("s3_key", f"{video_id}/frames/{meta['filename']}")
+            }
+        }
+
+    def _embed_batch(self, video_id, batch_images, valid_batch_meta, batch_keys):
+        t0 = time.perf_counter()
+        # Encode and normalize
+        embeddings = normalize(self.clip.encode_images(torch.stack(batch_images)))
+        self.batcher.record(len(batch_images), time.perf_counter() - t0)
+        self.cache.put_many(batch_keys, embeddings)
+
+        return [self._point(video_id, meta, embedding) for meta, embedding in zip(valid_batch_meta, embeddings)]
+
+if __name__ == "__main__":
+    pass
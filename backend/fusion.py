@@ -0,0 +1,144 @@
+import numpy as np
+from config import settings
+
+VISUAL = "📸 Visual"
+SPEECH = "🗣️ Speech"
+HYBRID = "✨ Hybrid"
+
+def _said(hit):
+    return f"Said: '{hit['metadata']['text']}...'"
+
+def _frame_key(meta):
+    vid = meta.get("video_id", "")
+    return meta.get("frame_path", "") or f"{vid}/frames/{meta.get('filename', '')}"
+
+class TemporalFusion:
+    """
+    Weighted Reciprocal Rank Fusion of vision + transcript hits.
+
+    - Hits are grouped by (video_id, time bucket), so different videos never
+      collide on the same second.
+    - Each speech hit attaches to the nearest visual group of the SAME video
+      within match_window seconds (searchsorted over one sorted key array,
+      O((n + m) log n)) and turns it into a Hybrid result.
+    - Unmatched speech hits form their own (video_id, bucket) groups.
+    Weights, RRF k, bucket size and match window default to settings.FUSION_*.
+    """
+    def __init__(self, vision_weight=None, text_weight=None, rrf_k=None, bucket_seconds=None, match_window=None):
+        self.vision_weight = settings.FUSION_VISION_WEIGHT if vision_weight is None else vision_weight
+        self.text_weight = settings.FUSION_TEXT_WEIGHT if text_weight is None else text_weight
+        self.rrf_k = settings.FUSION_RRF_K if rrf_k is None else rrf_k
+        self.bucket_seconds = settings.FUSION_BUCKET_SECONDS if bucket_seconds is None else bucket_seconds
+        self.match_window = settings.FUSION_MATCH_WINDOW if match_window is None else match_window
+
+    def _rrf(self, n, weight):
+        return weight / (self.rrf_k + np.arange(1, n + 1, dtype=np.float64))
+
+    def _group(self, vids, ts):
+        """Returns (first hit index per group, group index per hit). Hits arrive best-rank first."""
+        buckets = np.floor(ts / self.bucket_seconds).astype(np.int64)
+        keys = vids * (int(buckets.max()) + 1) + buckets
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        return first, inverse.reshape(-1)
+
+    def _nearest(self, g_vid, g_ts, q_vid, q_ts):
+        """Index of the nearest group in the same video within match_window, else -1."""
+        if not len(g_ts) or not len(q_ts):
+            return np.full(len(q_ts), -1, dtype=np.int64)
+
+        # One sortable key per (video, time): videos are spaced further apart than any window
+        span = max(g_ts.max(), q_ts.max()) + 2 * self.match_window + 1
+        g_key = g_vid * span + g_ts
+        order = np.argsort(g_key, kind="stable")
+        sorted_key = g_key[order]
+        q_key = q_vid * span + q_ts
+
+        pos = np.searchsorted(sorted_key, q_key)
+        left = np.clip(pos - 1, 0, len(order) - 1)
+        right = np.clip(pos, 0, len(order) - 1)
+        d_left = np.abs(q_key - sorted_key[left])
+        d_right = np.abs(sorted_key[right] - q_key)
+        best = order[np.where(d_right < d_left, right, left)]
+
+        ok = (np.minimum(d_left, d_right) <= self.match_window) & (g_vid[best] == q_vid)
+        return np.where(ok, best, -1)
+
+    def fuse(self, v_hits, t_hits, k):
+        """
+        v_hits / t_hits: db.search_* results in rank order.
+        Returns the top-k fused results (frame_path is still the S3 key).
+        """
+        codes = {}
+        def encode(hits):
+            vids = np.fromiter((codes.setdefault(h["metadata"]["video_id"], len(codes)) for h in hits),
+                               dtype=np.int64, count=len(hits))
+            ts = np.fromiter((float(h["metadata"]["timestamp"]) for h in hits), dtype=np.float64, count=len(hits))
+            return vids, ts
+
+        v_vid, v_ts = encode(v_hits)
+        t_vid, t_ts = encode(t_hits)
+        t_scores = self._rrf(len(t_hits), self.text_weight)
+
+        # 1. Visual groups
+        if len(v_hits):
+            v_first, v_inverse = self._group(v_vid, v_ts)
+            v_scores = np.bincount(v_inverse, weights=self._rrf(len(v_hits), self.vision_weight),
+                                   minlength=len(v_first))
+        else:
+            v_first = np.empty(0, dtype=np.int64)
+            v_scores = np.empty(0, dtype=np.float64)
+
+        # 2. Speech that overlaps a visual group boosts it
+        match = self._nearest(v_vid[v_first], v_ts[v_first], t_vid, t_ts)
+        matched = np.flatnonzero(match >= 0)
+        np.add.at(v_scores, match[matched], t_scores[matched])
+
+        # 3. Remaining speech forms its own groups
+        rest = np.flatnonzero(match < 0)
+        if len(rest):
+            s_first, s_inverse = self._group(t_vid[rest], t_ts[rest])
+            s_scores = np.bincount(s_inverse, weights=t_scores[rest], minlength=len(s_first))
+        else:
+            s_first = np.empty(0, dtype=np.int64)
+            s_scores = np.empty(0, dtype=np.float64)
+
+        # 4. Top-k on the score arrays (ties keep best-rank-first, visuals before speech),
+        #    so result dicts are only built for the k survivors
+        scores = np.concatenate([v_scores, s_scores])
+        if not len(scores) or k <= 0:
+            return []
+        first_seen = np.concatenate([v_first, len(v_hits) + rest[s_first]])
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.lexsort((first_seen[top], -scores[top]))]
+
+        n_visual = len(v_first)
+        top_visual = top[top < n_visual]
+        speech_by_group = {}
+        for i in matched[np.isin(match[matched], top_visual)]:
+            speech_by_group.setdefault(match[i], []).append(_said(t_hits[i]))
+
+        results = []
+        for g in top:
+            if g < n_visual:
+                hit = v_hits[v_first[g]]
+                said = speech_by_group.get(g)
+                kind = HYBRID if said else VISUAL
+                context = " + ".join(["Visual Match"] + said) if said else "Visual Match"
+            else:
+                hit = t_hits[rest[s_first[g - n_visual]]]
+                kind = SPEECH
+                context = _said(hit)
+            results.append({
+                "score": float(scores[g]),
+                "video_id": hit["metadata"]["video_id"],
+                "timestamp": hit["metadata"]["timestamp"],
+                # Visual: last near-duplicate frame the keyframe covers. Speech: segment end.
+                "end": hit["metadata"].get("end", hit["metadata"]["timestamp"]),
+                "frame_path": _frame_key(hit["metadata"]),
+                "type": kind,
+                "context": context,
+            })
+        return results
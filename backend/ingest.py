@@ -1,168 +1,473 @@
-import cv2
-import json
-import math
-import shutil
-import os
-from pathlib import Path
-from scenedetect import open_video, SceneManager
-from scenedetect.detectors import ContentDetector
-import ffmpeg
-from concurrent.futures import ThreadPoolExecutor
-from config import settings
-from storage import storage
-from logger import log
-
-MAX_SCENE_INTERVAL = 10.0 
-TARGET_HEIGHT = 360 
-
-class VideoProcessor:
-    def __init__(self, filename: str, cancel_callback=None):
-        self.cancel_callback = cancel_callback
-        self.filename = filename
-        self.video_id = Path(filename).stem
-        self.local_path = settings.TEMP_DIR / filename
-        
-        # 🛡️ STATELESS CHECK: 
-        # If file is not in /tmp (e.g. Cloud Worker), fetch it from MinIO
-        if not self.local_path.exists():
-            log.info(f"📥 File missing locally. Fetching {filename} from MinIO...")
-            try:
-                storage.client.fget_object(
-                    settings.MINIO_BUCKET, 
-                    f"{self.video_id}/source.mp4", 
-                    str(self.local_path)
-                )
-            except Exception as e:
-                raise FileNotFoundError(f"Could not fetch video from MinIO: {e}")
-
-    def extract_audio(self):
-        local_audio_path = settings.TEMP_DIR / f"{self.video_id}.wav"
-        minio_object_key = f"{self.video_id}/audio.wav"
-
-        # Check Cloud First
-        if storage.exists(minio_object_key):
-             log.info("☁️ Audio found in MinIO. Skipping extraction.")
-             # Ensure we have it locally for the Transcriber step later
-             if not local_audio_path.exists():
-                 storage.client.fget_object(settings.MINIO_BUCKET, minio_object_key, str(local_audio_path))
-             return local_audio_path
-
-        log.info(f"🔊 Extracting audio...")
-        try:
-            (
-                ffmpeg
-                .input(str(self.local_path))
-                .output(str(local_audio_path), ac=1, ar='16000')
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
-            storage.upload_file(str(local_audio_path), minio_object_key)
-            return local_audio_path
-        except ffmpeg.Error as e:
-            log.error("❌ FFmpeg Audio Error:", e.stderr.decode('utf8'))
-            raise e
-
-    def extract_frames(self):
-        video_frame_dir = settings.TEMP_DIR / self.video_id
-        if video_frame_dir.exists(): shutil.rmtree(video_frame_dir)
-        video_frame_dir.mkdir(parents=True, exist_ok=True)
-
-        log.info(f"🎞️  Scanning Scenes...")
-        scene_manager = SceneManager()
-        scene_manager.add_detector(ContentDetector(threshold=27.0))
-        video = open_video(str(self.local_path))
-        scene_manager.detect_scenes(video=video, show_progress=False)
-        scene_list = scene_manager.get_scene_list()
-        
-        cap = cv2.VideoCapture(str(self.local_path))
-        try:
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            
-            # Validate FPS
-            if fps <= 0:
-                raise ValueError(f"Invalid FPS: {fps}. Video may be corrupted.")
-            
-            duration = frame_count / fps
-
-            if not scene_list:
-                scene_list = [(type('obj', (object,), {'get_seconds': lambda: 0.0}),
-                            type('obj', (object,), {'get_seconds': lambda: duration}))]
-
-            frame_metadata = []
-            count = 0
-
-            for i, scene in enumerate(scene_list):
-                # 🛑 NEW: Check for cancellation every scene
-                if self.cancel_callback:
-                    self.cancel_callback()
-
-                start_sec = scene[0].get_seconds()
-                end_sec = scene[1].get_seconds()
-                duration_sec = end_sec - start_sec
-
-                if duration_sec <= MAX_SCENE_INTERVAL:
-                    timestamps = [start_sec + (duration_sec / 2)]
-                else:
-                    timestamps = [start_sec + (j * MAX_SCENE_INTERVAL) for j in range(math.ceil(duration_sec / MAX_SCENE_INTERVAL))]
-
-                for target_ts in timestamps:
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, int(target_ts * fps))
-                    ret, frame = cap.read()
-                    if ret:
-                        h, w = frame.shape[:2]
-                        new_w = int(TARGET_HEIGHT * (w / h))
-                        frame_small = cv2.resize(frame, (new_w, TARGET_HEIGHT))
-                        frame_name = f"frame_{count:04d}.jpg"
-                        output_img_path = video_frame_dir / frame_name
-                        cv2.imwrite(str(output_img_path), frame_small)
-
-                        frame_metadata.append({
-                            "filename": frame_name,
-                            "timestamp": round(target_ts, 2),
-                            "s3_key": f"{self.video_id}/frames/{frame_name}"
-                        })
-                        count += 1
-        finally:
-            cap.release()
-
-        
-        log.info(f"☁️ Uploading {count} frames (Parallel)...")
-        
-        def upload_frame(meta):
-            local_file = video_frame_dir / meta["filename"]
-            storage.upload_file(str(local_file), meta["s3_key"])
-
-        # Upload 20 frames at a time
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            executor.map(upload_frame, frame_metadata)
-
-        json_path = video_frame_dir / "timestamps.json"
-        with open(json_path, 'w') as f:
-            json.dump(frame_metadata, f, indent=2)
-        storage.upload_file(str(json_path), f"{self.video_id}/timestamps.json")
-        
-        return video_frame_dir
-
-    def cleanup(self):
-        """Wipes the temp video and frames to stay stateless"""
-        log.info(f"🧹 Cleaning up temp files for {self.video_id}...")
-        try:
-            if self.local_path.exists(): os.remove(self.local_path)
-            
-            frames_dir = settings.TEMP_DIR / self.video_id
-            if frames_dir.exists(): shutil.rmtree(frames_dir)
-            
-            audio_path = settings.TEMP_DIR / f"{self.video_id}.wav"
-            if audio_path.exists(): os.remove(audio_path)
-            
-            # Remove audio json transcript if exists
-            transcript_path = settings.TEMP_DIR / f"{self.video_id}.json"
-            if transcript_path.exists(): os.remove(transcript_path)
-            
-        except Exception as e:
-            log.error(f"⚠️ Cleanup Warning: {e}")
-
-    def process(self):
-        self.extract_audio()
+import cv2
+import json
+import numpy as np
+import math
+import shutil
+import os
+from pathlib import Path
+from collections import deque
+from scenedetect import open_video, SceneManager
+from scenedetect.detectors import ContentDetector
+from scenedetect.scene_manager import compute_downscale_factor
+import ffmpeg
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import settings
+from storage import storage
+from logger import log
+
+MAX_SCENE_INTERVAL = 10.0 
+TARGET_HEIGHT = 360 
+
+# --- Scene Detection ---
+CONTENT_THRESHOLD = 27.0
+MIN_SCENE_LEN = 15               # ContentDetector default (frames)
+FRAME_LAG = MIN_SCENE_LEN + 1    # Flash filter can report a cut this late
+MIDPOINT_SAMPLES_PER_SEC = 4.0   # Midpoint pick lands within 1/8s of the exact frame
+CANCEL_CHECK_FRAMES = 1000
+
+# --- Memory Handoff ---
+FRAME_QUEUE_SIZE = 32     # Decoded keyframes buffered ahead of the embedder
+UPLOAD_WORKERS = 8        # Background JPEG encode + MinIO upload threads
+_STREAM_DONE = object()
+
+# --- Near-Duplicate Suppression ---
+DEDUP_HASH_SIZE = 16      # 16x16 difference hash (256 bits): fine enough to see slide text change
+
+def make_detector():
+    return ContentDetector(threshold=CONTENT_THRESHOLD, min_scene_len=MIN_SCENE_LEN)
+
+def scene_timestamps(start_sec, end_sec):
+    """Mid-scene for short scenes, otherwise one keyframe every MAX_SCENE_INTERVAL."""
+    duration_sec = end_sec - start_sec
+    if duration_sec <= MAX_SCENE_INTERVAL:
+        return [start_sec + (duration_sec / 2)]
+    return [start_sec + (j * MAX_SCENE_INTERVAL) for j in range(math.ceil(duration_sec / MAX_SCENE_INTERVAL))]
+
+def frame_hash(frame_small):
+    """Difference hash: sign of horizontal gradients on a tiny grayscale thumbnail."""
+    gray = cv2.cvtColor(frame_small, cv2.COLOR_BGR2GRAY)
+    thumb = cv2.resize(gray, (DEDUP_HASH_SIZE + 1, DEDUP_HASH_SIZE), interpolation=cv2.INTER_AREA)
+    return thumb[:, 1:] > thumb[:, :-1]
+
+class NearDuplicateFilter:
+    """
+    Sits between the extractor and emit(): a keyframe whose hash is within
+    max_distance bits of the previous KEPT frame is dropped, and the kept
+    frame's covered range is stretched to it instead. The kept frame is held
+    back until the run ends, so it is emitted once with its final end_ts.
+    """
+    def __init__(self, emit, max_distance):
+        self.emit = emit
+        self.max_distance = max_distance
+        self.held = None  # [frame_small, start_ts, end_ts, hash]
+        self.kept = 0
+        self.skipped = 0
+
+    def __call__(self, frame_small, target_ts):
+        h = frame_hash(frame_small)
+        if self.held is not None and np.count_nonzero(h != self.held[3]) <= self.max_distance:
+            self.held[2] = target_ts
+            self.skipped += 1
+            return
+        self.flush()
+        self.held = [frame_small, target_ts, target_ts, h]
+
+    def flush(self):
+        if self.held is not None:
+            frame_small, start_ts, end_ts, _ = self.held
+            self.held = None
+            self.kept += 1
+            self.emit(frame_small, start_ts, end_ts)
+
+def resize_frame(frame):
+    h, w = frame.shape[:2]
+    new_w = int(TARGET_HEIGHT * (w / h))
+    return cv2.resize(frame, (new_w, TARGET_HEIGHT))
+
+class VideoProcessor:
+    def __init__(self, filename: str, cancel_callback=None):
+        self.cancel_callback = cancel_callback
+        self._stop = None  # Set by stream_frames(): the frame consumer went away
+        self.filename = filename
+        self.video_id = Path(filename).stem
+        self.local_path = settings.TEMP_DIR / filename
+        # Audio and frame branches may both need the source at the same time
+        self._fetch_lock = threading.Lock()
+
+    def ensure_local(self):
+        """
+        🛡️ STATELESS CHECK: If file is not in /tmp (e.g. Cloud Worker), fetch it
+        from MinIO. Done on first decode, so a resumed task whose decode stages
+        already finished never downloads the source again.
+        """
+        with self._fetch_lock:
+            if self.local_path.exists():
+                return self.local_path
+            log.info(f"📥 File missing locally. Fetching {self.filename} from MinIO...")
+            try:
+                storage.client.fget_object(
+                    settings.MINIO_BUCKET, 
+                    f"{self.video_id}/source.mp4", 
+                    str(self.local_path)
+                )
+            except Exception as e:
+                raise FileNotFoundError(f"Could not fetch video from MinIO: {e}")
+            return self.local_path
+
+    def probe_duration(self):
+        """Container duration in seconds (0.0 if unreadable)."""
+        self.ensure_local()
+        cap = cv2.VideoCapture(str(self.local_path))
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            return cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps if fps > 0 else 0.0
+        finally:
+            cap.release()
+
+    def extract_audio(self):
+        local_audio_path = settings.TEMP_DIR / f"{self.video_id}.wav"
+        minio_object_key = f"{self.video_id}/audio.wav"
+
+        # Check Cloud First
+        if storage.exists(minio_object_key):
+             log.info("☁️ Audio found in MinIO. Skipping extraction.")
+             # Ensure we have it locally for the Transcriber step later
+             if not local_audio_path.exists():
+                 storage.client.fget_object(settings.MINIO_BUCKET, minio_object_key, str(local_audio_path))
+             return local_audio_path
+
+        log.info(f"🔊 Extracting audio...")
+        self.ensure_local()
+        try:
+            (
+                ffmpeg
+                .input(str(self.local_path))
+                .output(str(local_audio_path), ac=1, ar='16000')
+                .overwrite_output()
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+            storage.upload_file(str(local_audio_path), minio_object_key)
+            return local_audio_path
+        except ffmpeg.Error as e:
+            log.error("❌ FFmpeg Audio Error:", e.stderr.decode('utf8'))
+            raise e
+
+    def _check_cancel(self):
+        if self._stop is not None and self._stop.is_set():
+            raise InterruptedError("Frame consumer stopped")
+        if self.cancel_callback:
+            self.cancel_callback()
+
+    def _frame_meta(self, index, target_ts, end_ts):
+        frame_name = f"frame_{index:04d}.jpg"
+        return {
+            "filename": frame_name,
+            "timestamp": round(target_ts, 2),
+            "end": round(end_ts, 2),  # Last near-duplicate this frame stands in for
+            "s3_key": f"{self.video_id}/frames/{frame_name}"
+        }
+
+    def _scan_frames(self, emit):
+        """
+        Runs the configured extractor, calling emit(frame_small, target_ts, end_ts)
+        per kept keyframe. With FRAME_DEDUP, near-identical consecutive keyframes
+        (slides, talking heads) collapse into one frame covering [target_ts, end_ts].
+        """
+        self.ensure_local()
+        dedup = None
+        if settings.FRAME_DEDUP:
+            dedup = NearDuplicateFilter(emit, settings.FRAME_DEDUP_DISTANCE)
+            candidate = dedup
+        else:
+            candidate = lambda frame_small, target_ts: emit(frame_small, target_ts, target_ts)
+
+        if settings.FRAME_EXTRACTION_MODE == "two_pass":
+            self._extract_two_pass(candidate)
+        else:
+            self._extract_single_pass(candidate)
+
+        if dedup:
+            dedup.flush()
+            log.info(f"🪞 Kept {dedup.kept} keyframes, suppressed {dedup.skipped} near-duplicates")
+
+    def _extract_two_pass(self, emit):
+        """Legacy path: full PySceneDetect scan, then one cv2 seek per keyframe."""
+        log.info(f"🎞️  Scanning Scenes...")
+        scene_manager = SceneManager()
+        scene_manager.add_detector(make_detector())
+        video = open_video(str(self.local_path))
+        scene_manager.detect_scenes(video=video, show_progress=False)
+        scene_list = scene_manager.get_scene_list()
+        
+        cap = cv2.VideoCapture(str(self.local_path))
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            
+            # Validate FPS
+            if fps <= 0:
+                raise ValueError(f"Invalid FPS: {fps}. Video may be corrupted.")
+            
+            duration = frame_count / fps
+
+            if not scene_list:
+                scene_list = [(type('obj', (object,), {'get_seconds': lambda: 0.0}),
+                            type('obj', (object,), {'get_seconds': lambda: duration}))]
+
+            for i, scene in enumerate(scene_list):
+                # 🛑 NEW: Check for cancellation every scene
+                self._check_cancel()
+
+                for target_ts in scene_timestamps(scene[0].get_seconds(), scene[1].get_seconds()):
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, int(target_ts * fps))
+                    ret, frame = cap.read()
+                    if ret:
+                        emit(resize_frame(frame), target_ts)
+        finally:
+            cap.release()
+
+    def _extract_single_pass(self, emit):
+        """
+        One sequential decode: the ContentDetector sees every frame while we
+        capture keyframes on the fly. Scene decisions run FRAME_LAG frames
+        behind the decoder because the detector's flash filter can report a
+        cut up to min_scene_len frames late, so only a short ring of resized
+        frames, the open scene's first frame and a few midpoint candidates
+        are ever held in memory.
+        """
+        log.info("🎞️  Scanning Scenes & Capturing Keyframes (Single Pass)...")
+        cap = cv2.VideoCapture(str(self.local_path))
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+            # Validate FPS
+            if fps <= 0:
+                raise ValueError(f"Invalid FPS: {fps}. Video may be corrupted.")
+
+            # Same detector settings & downscale heuristic as SceneManager,
+            # so both modes agree on scene boundaries.
+            detector = make_detector()
+            downscale = compute_downscale_factor(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+            mid_stride = max(1, int(round(fps / MIDPOINT_SAMPLES_PER_SEC)))
+
+            ring = deque()      # (frame_idx, frame_small) awaiting a scene decision
+            cuts = set()
+            scene = {}
+
+            def open_scene(idx, frame_small):
+                scene.update(start=idx, first=frame_small, next_grid=1, mids=deque(), cut_seen=bool(scene))
+
+            def grid_idx(j):
+                return int((scene["start"] / fps + j * MAX_SCENE_INTERVAL) * fps)
+
+            def close_scene(end_idx):
+                start_sec = scene["start"] / fps
+                end_sec = end_idx / fps
+                if end_sec - start_sec > MAX_SCENE_INTERVAL:
+                    # Long scenes were written as their grid frames went by, unless the
+                    # container claimed more frames than we could actually decode.
+                    if scene["next_grid"] == 1:
+                        emit(scene["first"], start_sec)
+                    return
+                target_ts = scene_timestamps(start_sec, end_sec)[0]
+                target_idx = int(target_ts * fps)
+                if scene["mids"]:
+                    _, frame_small = min(scene["mids"], key=lambda c: abs(c[0] - target_idx))
+                    emit(frame_small, target_ts)
+
+            def consume(idx, frame_small):
+                if not scene:
+                    open_scene(idx, frame_small)
+                elif idx in cuts:
+                    close_scene(idx)
+                    open_scene(idx, frame_small)
+                    # 🛑 Check for cancellation every scene
+                    self._check_cancel()
+
+                # Long scene: emit the scene start, then one frame every MAX_SCENE_INTERVAL
+                while idx >= grid_idx(scene["next_grid"]):
+                    if scene["next_grid"] == 1:
+                        emit(scene["first"], scene["start"] / fps)
+                        scene["first"] = None
+                        scene["mids"].clear()
+                    emit(frame_small, scene["start"] / fps + scene["next_grid"] * MAX_SCENE_INTERVAL)
+                    scene["next_grid"] += 1
+
+                # Short (so far) scene: keep sparse midpoint candidates, dropping
+                # the ones the midpoint has already moved past.
+                if scene["next_grid"] == 1:
+                    mids = scene["mids"]
+                    if (idx - scene["start"]) % mid_stride == 0:
+                        mids.append((idx, frame_small))
+                    lower_bound = scene["start"] + (idx + 1 - scene["start"]) // 2
+                    while len(mids) > 1 and mids[1][0] <= lower_bound:
+                        mids.popleft()
+
+            frame_idx = 0
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+
+                if downscale > 1:
+                    h, w = frame.shape[:2]
+                    det_frame = cv2.resize(frame, (round(w / downscale), round(h / downscale)),
+                                           interpolation=cv2.INTER_LINEAR)
+                else:
+                    det_frame = frame
+                cuts.update(detector.process_frame(frame_idx, det_frame))
+
+                ring.append((frame_idx, resize_frame(frame)))
+                while len(ring) > FRAME_LAG:
+                    consume(*ring.popleft())
+
+                if frame_idx % CANCEL_CHECK_FRAMES == 0:
+                    self._check_cancel()
+                frame_idx += 1
+
+            if frame_idx:
+                cuts.update(detector.post_process(frame_idx - 1) or [])
+            while ring:
+                consume(*ring.popleft())
+
+            if scene:
+                # Mirror the two-pass fallback: a cut-free video spans the container duration
+                close_scene(frame_idx if scene["cut_seen"] else max(frame_count, frame_idx))
+        finally:
+            cap.release()
+
+    def _fresh_frame_dir(self):
+        video_frame_dir = settings.TEMP_DIR / self.video_id
+        if video_frame_dir.exists(): shutil.rmtree(video_frame_dir)
+        video_frame_dir.mkdir(parents=True, exist_ok=True)
+        return video_frame_dir
+
+    def _write_manifest(self, video_frame_dir, frame_metadata):
+        json_path = video_frame_dir / "timestamps.json"
+        with open(json_path, 'w') as f:
+            json.dump(frame_metadata, f, indent=2)
+        storage.upload_file(str(json_path), f"{self.video_id}/timestamps.json")
+
+    def extract_frames(self):
+        """Disk handoff: JPEGs + timestamps.json land in TEMP_DIR/<video_id> for VisionEmbedder."""
+        video_frame_dir = self._fresh_frame_dir()
+        frame_metadata = []
+
+        def save(frame_small, target_ts, end_ts):
+            meta = self._frame_meta(len(frame_metadata), target_ts, end_ts)
+            cv2.imwrite(str(video_frame_dir / meta["filename"]), frame_small)
+            frame_metadata.append(meta)
+
+        self._scan_frames(save)
+        count = len(frame_metadata)
+
+        log.info(f"☁️ Uploading {count} frames (Parallel)...")
+        
+        def upload_frame(meta):
+            local_file = video_frame_dir / meta["filename"]
+            storage.upload_file(str(local_file), meta["s3_key"])
+
+        # Upload 20 frames at a time
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            executor.map(upload_frame, frame_metadata)
+
+        self._write_manifest(video_frame_dir, frame_metadata)
+        
+        return video_frame_dir
+
+    def stream_frames(self):
+        """
+        Memory handoff: yields (meta, frame_small) while the video is still being
+        decoded, so CLIP can start embedding without a JPEG round-trip through disk.
+        JPEG encoding + MinIO upload happen on a background pool; timestamps.json
+        is written once the stream is exhausted. Consumers must close() the
+        generator (contextlib.closing) so the decoder stops if they fail.
+        """
+        video_frame_dir = self._fresh_frame_dir()
+        frame_metadata = []
+        frames = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+        stop = threading.Event()
+        uploader = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS)
+        uploads = []
+
+        def upload_jpeg(frame_small, object_name):
+            ok, buf = cv2.imencode(".jpg", frame_small)
+            if not ok or not storage.upload_bytes(buf.tobytes(), object_name, content_type="image/jpeg"):
+                raise IOError(f"Frame upload failed: {object_name}")
+
+        def put(item):
+            # Never block for good on a full queue: the consumer may be gone
+            while not stop.is_set():
+                try:
+                    frames.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+            raise InterruptedError("Frame consumer stopped")
+
+        def emit(frame_small, target_ts, end_ts):
+            self._check_cancel()
+            meta = self._frame_meta(len(frame_metadata), target_ts, end_ts)
+            frame_metadata.append(meta)
+            uploads.append(uploader.submit(upload_jpeg, frame_small, meta["s3_key"]))
+            put((meta, frame_small))
+
+        def produce():
+            try:
+                self._scan_frames(emit)
+                put(_STREAM_DONE)
+            except BaseException as e:
+                try:
+                    put(e)
+                except InterruptedError:
+                    pass  # Nobody is listening any more
+
+        self._stop = stop
+        producer = threading.Thread(target=produce, name=f"frames-{self.video_id}", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = frames.get()
+                if item is _STREAM_DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+
+            log.info(f"☁️ Waiting on {len(uploads)} frame uploads...")
+            for future in uploads:
+                future.result()
+            self._write_manifest(video_frame_dir, frame_metadata)
+        finally:
+            # Consumer done or bailed out early: the producer stops at its next
+            # put() or cancellation check
+            stop.set()
+            producer.join()
+            self._stop = None
+            uploader.shutdown(wait=True, cancel_futures=True)
+
+    def cleanup(self, parts=("source", "frames", "audio", "transcript")):
+        """Wipes the temp video and frames to stay stateless (only `parts` of them, for stage tasks)"""
+        log.info(f"🧹 Cleaning up temp files for {self.video_id}...")
+        try:
+            if "source" in parts and self.local_path.exists(): os.remove(self.local_path)
+            
+            frames_dir = settings.TEMP_DIR / self.video_id
+            if "frames" in parts and frames_dir.exists(): shutil.rmtree(frames_dir)
+            
+            audio_path = settings.TEMP_DIR / f"{self.video_id}.wav"
+            if "audio" in parts and audio_path.exists(): os.remove(audio_path)
+            
+            # Remove audio json transcript if exists
+            transcript_path = settings.TEMP_DIR / f"{self.video_id}.json"
+            if "transcript" in parts and transcript_path.exists(): os.remove(transcript_path)
+            
+        except Exception as e:
+            log.error(f"⚠️ Cleanup Warning: {e}")
+
+    def process(self):
+        self.extract_audio()
         self.extract_frames()
\ No newline at end of file
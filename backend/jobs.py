@@ -0,0 +1,54 @@
+import time
+import uuid
+import redis
+from config import settings
+
+KEY_PREFIX = "job"
+JOB_TTL = 7 * 24 * 3600
+
+class DownloadJobs:
+    """
+    URL ingestion jobs. /process_url returns a job id at once; the download
+    runs on the "download" queue and the job learns its filename when the
+    file is in MinIO. Until then progress and cancel signals live under the
+    job id, afterwards under the filename like any upload.
+
+    - job:<id>   hash: id, url, status (queued, downloading, uploading,
+                 downloaded, failed, cancelled), filename, size, error,
+                 batch, created
+    """
+    def __init__(self):
+        self.redis = redis.Redis(host=settings.REDIS_HOST, port=6379, db=0, decode_responses=True)
+
+    def _key(self, job_id):
+        return f"{KEY_PREFIX}:{job_id}"
+
+    def create(self, url, batch_id=None):
+        job_id = uuid.uuid4().hex[:12]
+        fields = {"id": job_id, "url": url, "status": "queued", "created": time.time()}
+        if batch_id:
+            fields["batch"] = batch_id
+        pipe = self.redis.pipeline()
+        pipe.hset(self._key(job_id), mapping=fields)
+        pipe.expire(self._key(job_id), JOB_TTL)
+        # Before the task is sent, so the worker's first report is never overwritten
+        pipe.hset(f"progress:{job_id}", mapping={"percent": 0, "status": "Queued for download..."})
+        pipe.expire(f"progress:{job_id}", 3600)
+        pipe.execute()
+        return job_id
+
+    def update(self, job_id, **fields):
+        self.redis.hset(self._key(job_id), mapping={k: v for k, v in fields.items() if v is not None})
+
+    def get(self, job_id):
+        data = self.redis.hgetall(self._key(job_id))
+        if not data:
+            return None
+        data["created"] = float(data["created"])
+        return data
+
+    def resolve(self, name):
+        """Job id -> its filename once downloaded; anything else is returned unchanged."""
+        return self.redis.hget(self._key(name), "filename") or name
+
+jobs = DownloadJobs()
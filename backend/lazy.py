@@ -0,0 +1,51 @@
+import threading
+import time
+
+class Lazy:
+    """
+    Module singleton that is only constructed on first attribute access, so
+    importing a module never opens connections. `from db import db` keeps
+    working unchanged; `db.ready` tells whether it has been built yet.
+    """
+    def __init__(self, factory, name):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_error", None)
+        object.__setattr__(self, "_init_seconds", None)
+
+    def get(self):
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    started = time.perf_counter()
+                    try:
+                        instance = self._factory()
+                    except Exception as e:
+                        object.__setattr__(self, "_error", f"{type(e).__name__}: {e}")
+                        raise
+                    object.__setattr__(self, "_instance", instance)
+                    object.__setattr__(self, "_error", None)
+                    object.__setattr__(self, "_init_seconds", time.perf_counter() - started)
+        return instance
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self.get(), attr, value)
+
+    @property
+    def ready(self):
+        return self._instance is not None
+
+    def status(self):
+        """Readiness summary: warm, last init error, init time."""
+        return {
+            "warm": self.ready,
+            "error": self._error,
+            "init_seconds": round(self._init_seconds, 2) if self._init_seconds is not None else None,
+        }
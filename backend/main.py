@@ -1,214 +1,456 @@
-import shutil
-import time
-import re
-import os
-import redis
-from pathlib import Path
-from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Request
-from fastapi.responses import StreamingResponse, RedirectResponse
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from contextlib import asynccontextmanager
-from pydantic import BaseModel
-from db import db
-from storage import storage
-import aiofiles
-
-# --- IMPORTS (Flattened Structure) ---
-from config import settings
-from search_engine import VideoSearchEngine
-from download import download_video
-from llm_engine import summarize_video, ask_question, generate_chapters
-from logger import log
-# Import the Celery Task
-from worker import process_video_task
-
-def sanitize_filename(name: str) -> str:
-    return re.sub(r'[^a-zA-Z0-9_.-]', '', name.replace(' ', '_'))
-
-search_engine = None
-
-# Connect to Redis (For reading progress)
-REDIS_HOST = settings.REDIS_HOST
-redis_client = redis.Redis(host=REDIS_HOST, port=6379, db=0, decode_responses=True)
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    global search_engine
-    log.info("🚀 Server starting...")
-    search_engine = VideoSearchEngine() # Load CLIP once
-    yield
-
-app = FastAPI(title="ReelInsight API", lifespan=lifespan)
-
-# 1. Enable CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# --- ENDPOINTS ---
-
-class URLRequest(BaseModel):
-    url: str
-
-@app.post("/upload")
-async def upload_video(file: UploadFile = File(...)):
-    # 1. Save Locally (Invisible Temp)
-    timestamp = int(time.time())
-    clean_name = sanitize_filename(file.filename)
-    fname = f"{timestamp}_{clean_name}"
-    
-    # USE TEMP_DIR
-    save_path = settings.TEMP_DIR / fname
-    
-    # Changed to async write
-    async with aiofiles.open(save_path, 'wb') as out_file:
-        while content := await file.read(1024 * 1024):  # Read in 1MB chunks
-            await out_file.write(content)
-    
-    # 2. Upload to MinIO
-    video_id = Path(fname).stem
-    storage.upload_file(str(save_path), f"{video_id}/source.mp4")
-
-    # 3. Dispatch & Cleanup
-    redis_client.hset(f"progress:{fname}", mapping={"percent": 0, "status": "Uploaded to Cloud. Queued..."})
-    process_video_task.delay(fname)
-    
-    # Optional: Delete local immediately since MinIO has it
-    # os.remove(save_path) 
-    
-    return {"filename": fname}
-
-@app.post("/process_url")
-def process_url_endpoint(request: URLRequest):
-    try:
-        redis_client.hset("progress:downloading...", mapping={"percent": 10, "status": "Downloading from YouTube..."})
-        
-        # 1. Download (Saves to TEMP_DIR now)
-        filename = download_video(request.url)
-        
-        if not filename:
-            raise Exception("Download failed: No filename returned.")
-
-        # 2. Upload to MinIO
-        local_path = settings.TEMP_DIR / filename
-        video_id = Path(filename).stem
-        
-        if not local_path.exists():
-             raise Exception(f"File missing after download: {local_path}")
-
-        log.info(f"☁️ Uploading {filename} to MinIO...")
-        redis_client.hset(f"progress:{filename}", mapping={"percent": 20, "status": "Uploading to Cloud..."})
-        
-        success = storage.upload_file(str(local_path), f"{video_id}/source.mp4")
-        if not success:
-             raise Exception("Failed to upload video to MinIO storage.")
-
-        # 3. Dispatch
-        redis_client.hset(f"progress:{filename}", mapping={"percent": 30, "status": "Queued for AI Processing..."})
-        process_video_task.delay(filename)
-        
-        return {"filename": filename}
-
-    except Exception as e:
-        log.error(f"❌ Process URL Error: {e}")
-        raise HTTPException(status_code=400, detail=str(e))
-
-@app.post("/cancel/{filename}")
-def cancel_processing(filename: str):
-    log.warning(f"🛑 Received CANCEL signal for {filename}")
-    
-    # 1. Set the STOP FLAG in Redis (Worker checks this)
-    redis_client.set(f"cancel:{filename}", "1", ex=3600)
-    
-    # 2. Immediate Cleanup 
-    # Reuse existing delete logic to wipe partial data
-    video_id = Path(filename).stem
-    delete_video_endpoint(video_id)
-    
-    return {"status": "cancelled", "id": filename}
-
-
-@app.get("/progress/{filename}")
-def get_progress(filename: str):
-    """Reads real-time status from Redis"""
-    key = f"progress:{filename}"
-    data = redis_client.hgetall(key)
-    
-    if not data:
-        return {"percent": 0, "status": "Not found / Waiting"}
-    
-    return {
-        "percent": int(data.get("percent", 0)),
-        "status": data.get("status", "Unknown")
-    }
-
-@app.get("/search")
-def search(query: str, k: int = 10, filter: str = None):
-    if filter in ["All Videos", ""]: filter = None
-    if filter: filter = filter.replace(".mp4", "")
-    return {"results": search_engine.search(query, k, filter)}
-
-@app.get("/videos")
-def get_videos():
-    """Returns list of videos from MinIO with thumbnails"""
-    return {"videos": storage.list_videos()}
-
-@app.delete("/videos/{video_id}")
-def delete_video_endpoint(video_id: str):
-    """The Nuclear Option: Wipes DB, Storage, and Cache"""
-    video_id = video_id.replace(".mp4", "")
-    
-    log.info(f"🧨 Nuke request received for: {video_id}")
-
-    # 1. Delete from MinIO
-    storage.delete_folder(f"{video_id}/")
-    
-    # 2. Delete from Vector DB
-    db.delete_video(video_id)
-    
-    # 3. Clear Redis Status
-    redis_client.delete(f"progress:{video_id}.mp4")
-    redis_client.delete(f"progress:{video_id}")
-    
-    return {"status": "deleted", "id": video_id}
-
-@app.get("/summarize")
-def api_summarize(video_id: str):
-    video_id = video_id.replace(".mp4", "")
-    return {"summary": summarize_video(video_id)}
-
-@app.get("/ask_ai")
-def api_ask_ai(query: str, video_filter: str = None):
-    if video_filter in ["All Videos", ""]: video_filter = None
-    if video_filter: video_filter = video_filter.replace(".mp4", "")
-    res = search_engine.search(query, k=15, video_filter=video_filter)
-    return {"answer": ask_question(query, res), "context": res}
-
-@app.get("/chapters")
-def api_chapters(video_id: str):
-    video_id = video_id.replace(".mp4", "")
-    return {"chapters": generate_chapters(video_id)}
-
-@app.get("/stream/{video_id}")
-async def stream_video(video_id: str):
-    """
-    STATELESS STREAMING:
-    Redirects the browser to a temporary, secure MinIO URL.
-    MinIO handles the byte-range requests (seeking) automatically.
-    """
-    # Ensure video_id has no extension for directory lookup, but MinIO needs 'source.mp4'
-    clean_id = video_id.replace(".mp4", "")
-    object_name = f"{clean_id}/source.mp4"
-    
-    # Generate a link valid for 1 hour
-    url = storage.get_presigned_url(object_name)
-    
-    if not url:
-        raise HTTPException(status_code=404, detail="Video not found in Cloud Storage")
-        
+import shutil
+import time
+import re
+import os
+import redis
+import threading
+from pathlib import Path
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse, RedirectResponse
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field
+from db import db
+from storage import storage
+from catalog import catalog, title_from_filename
+from manifest import manifest
+from jobs import jobs
+from batches import batches, PRIORITIES
+from upload_stream import receive_uploads, FieldTooLarge
+from model_registry import registry
+
+# --- IMPORTS (Flattened Structure) ---
+# Heavy modules (torch/CLIP via search_engine, yt_dlp via download, and the
+# whole worker) are imported lazily; see benchmarks/bench_import_time.py.
+from config import settings
+from lazy import Lazy
+import llm_engine
+from llm_engine import summarize_video, ask_question, generate_chapters
+from logger import log
+# Celery client only: tasks are enqueued by name
+from tasks import enqueue_video, enqueue_download, queue_depths
+
+def sanitize_filename(name: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9_.-]', '', name.replace(' ', '_'))
+
+def _build_search_engine():
+    from search_engine import VideoSearchEngine
+    return VideoSearchEngine() # Load CLIP once
+
+search_engine = Lazy(_build_search_engine, "search_engine")
+
+# Connect to Redis (For reading progress)
+REDIS_HOST = settings.REDIS_HOST
+redis_client = redis.Redis(host=REDIS_HOST, port=6379, db=0, decode_responses=True)
+
+def _backfill_catalog():
+    if catalog.count() == 0:
+        # Libraries ingested before the catalog existed: list the bucket once
+        catalog.backfill(storage.list_video_ids(), db.video_stats)
+    return True
+
+WARMUP_STEPS = [
+    ("minio", storage.get),
+    ("qdrant", db.get),
+    ("catalog", _backfill_catalog),
+    ("search_engine", search_engine.get),
+    ("llm", llm_engine.ensure_model),
+]
+warmup_state = {name: "pending" for name, _ in WARMUP_STEPS}
+
+def warmup():
+    """Brings every backend + model up; each step is independent so one outage doesn't block the rest."""
+    started = time.perf_counter()
+    for name, step in WARMUP_STEPS:
+        warmup_state[name] = "warming"
+        try:
+            warmup_state[name] = "ready" if step() else "unavailable"
+        except Exception as e:
+            warmup_state[name] = f"failed: {e}"
+            log.error(f"⚠️ Warmup '{name}' failed: {e}")
+    log.info(f"🔥 Warmup finished in {time.perf_counter() - started:.1f}s: {warmup_state}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log.info(f"🚀 Server starting ({settings.STARTUP_MODE} startup)...")
+    if settings.STARTUP_MODE == "eager":
+        await run_in_threadpool(warmup)
+    else:
+        # Serve right away; endpoints that need a cold subsystem initialize it on first use
+        threading.Thread(target=warmup, name="warmup", daemon=True).start()
+    yield
+
+async def get_search_engine():
+    """The engine, built off the event loop if warmup hasn't finished yet."""
+    if not search_engine.ready:
+        await run_in_threadpool(search_engine.get)
+    return search_engine
+
+app = FastAPI(title="ReelInsight API", lifespan=lifespan)
+
+# 1. Enable CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# --- ENDPOINTS ---
+
+class URLRequest(BaseModel):
+    url: str
+
+class BatchIngestRequest(BaseModel):
+    urls: list[str] = []
+    folder: str = None      # Relative to IMPORT_DIR
+    name: str = None
+    priority: str = "normal"
+
+class BatchSearchRequest(BaseModel):
+    queries: list[str] = Field(..., min_length=1, max_length=100)
+    k: int = Field(10, ge=1, le=100)
+    filter: str = None
+
+def _upload_name(filename):
+    """Client filename -> (MinIO source object, our filename)."""
+    fname = f"{int(time.time())}_{sanitize_filename(filename)}"
+    return f"{Path(fname).stem}/source.mp4", fname
+
+def _register_upload(result, status="Uploaded to Cloud. Queued..."):
+    """Catalogs one streamed upload as queued. Returns its filename."""
+    fname = result.meta
+    video_id = Path(fname).stem
+    catalog.upsert(video_id, title=title_from_filename(result.filename), status="queued", sha256=result.sha256)
+    redis_client.hset(f"progress:{fname}", mapping={"percent": 0, "status": status})
+    return fname
+
+async def _discard(results):
+    """Removes streamed uploads of a request we end up rejecting (fields may come after the files)."""
+    for result in results:
+        await run_in_threadpool(storage.delete_folder, f"{Path(result.meta).stem}/")
+
+async def _receive(request: Request):
+    """Streams the multipart body straight into MinIO (no TEMP_DIR copy, no UploadFile spooling)."""
+    try:
+        return await receive_uploads(request, _upload_name)
+    except FieldTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+@app.post("/upload")
+async def upload_video(request: Request, process: bool = True):
+    """One video as multipart field "file". process=false only stores it (run it later via /reprocess)."""
+    _, results = await _receive(request)
+    if len(results) != 1:
+        await _discard(results)
+        raise HTTPException(status_code=400, detail="Expected exactly one file")
+    result = results[0]
+    fname = await run_in_threadpool(_register_upload, result, "Uploaded to Cloud. Queued..." if process else "Stored.")
+    if process:
+        # Interactive: highest priority, never behind batch backfills
+        await run_in_threadpool(enqueue_video, fname)
+    return {"filename": fname, "size": result.size, "sha256": result.sha256}
+
+# ==========================================
+# 📦 BATCH INGESTION
+# ==========================================
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".mov", ".webm", ".avi", ".m4v"}
+
+def _new_batch(name, priority):
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of: {', '.join(PRIORITIES)}")
+    return batches.create(name, priority)
+
+def _import_folder(batch_id, paths):
+    """
+    Background thread: each file goes to MinIO, then joins the batch as a job.
+    The files were reserved in the batch total up front; a file that cannot be
+    imported counts as a failed job, a cancel gives back the rest.
+    """
+    for i, path in enumerate(paths):
+        if batches.cancelled(batch_id):
+            batches.reserve(batch_id, -(len(paths) - i))
+            log.info(f"🛑 Batch {batch_id} cancelled; skipped {len(paths) - i} remaining files")
+            return
+        try:
+            fname = f"{int(time.time())}_{sanitize_filename(path.name)}"
+            video_id = Path(fname).stem
+            if not storage.upload_file(str(path), f"{video_id}/source.mp4"):
+                raise IOError("upload to MinIO failed")
+            catalog.upsert(video_id, title=title_from_filename(path.name), status="queued")
+            redis_client.hset(f"progress:{fname}", mapping={"percent": 0, "status": "Imported. Waiting in batch..."})
+            batches.add_jobs(batch_id, [{"filename": fname}], reserved=True)
+        except Exception as e:
+            log.error(f"❌ Batch {batch_id}: could not import {path}: {e}")
+            try:
+                batches.fail_reserved(batch_id)
+            except Exception as err:
+                log.error(f"❌ Batch {batch_id}: could not record failed import: {err}")
+
+@app.post("/batches")
+async def create_batch(request: Request):
+    """Many uploads at once (fields: files, name, priority). Jobs are released into the pipeline fair-share (see batches.py)."""
+    fields, results = await _receive(request)
+    if not results:
+        raise HTTPException(status_code=400, detail="No files in request")
+    priority = fields.get("priority", "normal")
+    if priority not in PRIORITIES:
+        await _discard(results)
+        raise HTTPException(status_code=400, detail=f"priority must be one of: {', '.join(PRIORITIES)}")
+    batch_id = await run_in_threadpool(_new_batch, fields.get("name"), priority)
+    jobs = []
+    for result in results:
+        jobs.append({"filename": await run_in_threadpool(_register_upload, result, "Uploaded. Waiting in batch...")})
+    await run_in_threadpool(batches.add_jobs, batch_id, jobs)
+    return await run_in_threadpool(batches.get, batch_id)
+
+@app.post("/batches/import")
+def create_import_batch(request: BatchIngestRequest):
+    """URLs and/or a server-side folder (under IMPORT_DIR) as one batch."""
+    # Validate everything before the batch exists: URL jobs are dispatched right away
+    paths = []
+    if request.folder:
+        root = settings.IMPORT_DIR.resolve()
+        folder = (root / request.folder).resolve()
+        if not folder.is_dir() or not folder.is_relative_to(root):
+            raise HTTPException(status_code=400, detail=f"Folder not found under {root}")
+        paths = sorted(p for p in folder.iterdir() if p.is_file() and p.suffix.lower() in VIDEO_EXTENSIONS)
+    if not request.urls and not paths:
+        raise HTTPException(status_code=400, detail="Nothing to import: no URLs and no video files")
+
+    batch_id = _new_batch(request.name, request.priority)
+    batches.reserve(batch_id, len(paths))
+    batches.add_jobs(batch_id, [{"url": url} for url in request.urls])
+    if paths:
+        threading.Thread(target=_import_folder, args=(batch_id, paths), name=f"import-{batch_id}", daemon=True).start()
+    return batches.get(batch_id)
+
+@app.get("/batches")
+def list_batches(limit: int = 50):
+    return {"batches": batches.list(limit)}
+
+@app.get("/batches/{batch_id}")
+def get_batch(batch_id: str):
+    batch = batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+@app.delete("/batches/{batch_id}")
+def cancel_batch(batch_id: str):
+    """Drops the batch's not-yet-started jobs; running ones finish."""
+    if batches.get(batch_id) is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return {"id": batch_id, "dropped": batches.cancel(batch_id)}
+
+@app.get("/queue")
+def queue_status():
+    """Broker queue depth per pipeline stage plus batch jobs still waiting for a slot."""
+    return {
+        "queues": queue_depths(),
+        "batch_running": batches.running_total(),
+        "batch_pending": batches.pending_total(),
+        "batch_max_running": settings.BATCH_MAX_RUNNING,
+    }
+
+@app.post("/process_url")
+def process_url_endpoint(request: URLRequest):
+    """Queues the download on the download workers and returns at once; poll /progress/{job_id} or /jobs/{job_id}."""
+    return {"job_id": enqueue_download(request.url)}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {**job, "progress": get_progress(job_id)}
+
+@app.post("/reprocess/{video_id}")
+def reprocess_video(video_id: str, force: bool = False):
+    """
+    Re-queues an existing video. It resumes after the last stage recorded in
+    its manifest; force=true starts over from the source.
+    """
+    video_id = video_id.replace(".mp4", "")
+    if not storage.exists(f"{video_id}/source.mp4"):
+        raise HTTPException(status_code=404, detail="Source video not found")
+    if force:
+        manifest.reset(video_id)
+
+    filename = f"{video_id}.mp4"
+    redis_client.delete(f"cancel:{filename}")
+    catalog.update(video_id, status="queued")
+    redis_client.hset(f"progress:{filename}", mapping={"percent": 0, "status": "Queued for AI Processing..."})
+    enqueue_video(filename)
+    return {"filename": filename, "resume": not force}
+
+@app.post("/cancel/{filename}")
+def cancel_processing(filename: str):
+    log.warning(f"🛑 Received CANCEL signal for {filename}")
+    
+    # 1. Set the STOP FLAG in Redis (Worker checks this)
+    redis_client.set(f"cancel:{filename}", "1", ex=3600)
+    job = jobs.get(filename)
+    if job is not None:
+        if not job.get("filename"):
+            # URL job still downloading: the flag stops it, nothing is stored yet
+            return {"status": "cancelled", "id": filename}
+        filename = job["filename"]
+        redis_client.set(f"cancel:{filename}", "1", ex=3600)
+    
+    # 2. Immediate Cleanup 
+    # Reuse existing delete logic to wipe partial data
+    video_id = Path(filename).stem
+    delete_video_endpoint(video_id)
+    
+    return {"status": "cancelled", "id": filename}
+
+
+@app.get("/progress/{filename}")
+def get_progress(filename: str):
+    """Reads real-time status from Redis"""
+    key = f"progress:{jobs.resolve(filename)}"  # URL jobs: job id -> filename once downloaded
+    data = redis_client.hgetall(key)
+    
+    if not data:
+        return {"percent": 0, "status": "Not found / Waiting"}
+    
+    return {
+        "percent": int(data.get("percent", 0)),
+        "status": data.get("status", "Unknown")
+    }
+
+@app.get("/search")
+async def search(query: str, k: int = Query(10, ge=1, le=100), filter: str = None):
+    if filter in ["All Videos", ""]: filter = None
+    if filter: filter = filter.replace(".mp4", "")
+    engine = await get_search_engine()
+    return {"results": await engine.asearch(query, k, filter)}
+
+@app.post("/search_batch")
+async def search_batch(request: BatchSearchRequest):
+    """Many queries in one call (nightly jobs). Results come back in input order."""
+    video_filter = request.filter
+    if video_filter in ["All Videos", ""]: video_filter = None
+    if video_filter: video_filter = video_filter.replace(".mp4", "")
+    engine = await get_search_engine()
+    results = await engine.asearch_many(request.queries, request.k, video_filter)
+    return {"results": [{"query": q, "results": r} for q, r in zip(request.queries, results)]}
+
+@app.get("/search/cache")
+def search_cache_stats():
+    """Hit/miss counters of the query embedding cache"""
+    if not search_engine.ready:
+        # Never build the engine (CLIP load) just to report an empty cache
+        return {"size": 0, "max_size": settings.QUERY_CACHE_SIZE, "hits": 0, "redis_hits": 0,
+                "misses": 0, "hit_rate": 0.0, "warm": False}
+    return {**search_engine.query_cache.stats(), "warm": True}
+
+@app.get("/ready")
+def readiness(response: Response):
+    """
+    Which subsystems are warm. 200 once search can be served end to end,
+    503 while warming (or when a core backend is down). The LLM is optional.
+    """
+    try:
+        redis_ok = bool(redis_client.ping())
+    except Exception:
+        redis_ok = False
+    subsystems = {
+        "redis": {"warm": redis_ok},
+        "minio": storage.status(),
+        "qdrant": db.status(),
+        "search_engine": search_engine.status(),
+        "llm": {"warm": bool(llm_engine.MODEL_NAME), "model": llm_engine.MODEL_NAME or None},
+    }
+    ready = all(subsystems[name]["warm"] for name in ("redis", "minio", "qdrant", "search_engine"))
+    response.status_code = 200 if ready else 503
+    return {
+        "ready": ready,
+        "startup_mode": settings.STARTUP_MODE,
+        "warmup": warmup_state,
+        "subsystems": subsystems,
+        "models": [f"{m['model']}:{m['size']}" for m in registry.stats()["models"]],
+    }
+
+@app.get("/models")
+def model_stats():
+    """Models resident in this API process (keyed by model, size, device, precision)"""
+    return registry.stats()
+
+@app.get("/videos")
+def get_videos(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500), sort: str = "created", order: str = "desc"):
+    """Paginated video library from the catalog (no bucket listing), with thumbnails"""
+    try:
+        videos, total = catalog.page(offset, limit, sort, descending=(order != "asc"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    thumbs = storage.get_urls([v["thumbnail"] for v in videos])
+    for v in videos:
+        v["thumbnail"] = thumbs[v["thumbnail"]]
+    return {"videos": videos, "total": total, "offset": offset, "limit": limit}
+
+@app.delete("/videos/{video_id}")
+def delete_video_endpoint(video_id: str):
+    """The Nuclear Option: Wipes DB, Storage, and Cache"""
+    video_id = video_id.replace(".mp4", "")
+    
+    log.info(f"🧨 Nuke request received for: {video_id}")
+
+    # 1. Delete from MinIO
+    storage.delete_folder(f"{video_id}/")
+    
+    # 2. Delete from Vector DB
+    db.delete_video(video_id)
+    catalog.remove(video_id)
+    manifest.reset(video_id)
+    
+    # 3. Clear Redis Status
+    redis_client.delete(f"progress:{video_id}.mp4")
+    redis_client.delete(f"progress:{video_id}")
+    
+    return {"status": "deleted", "id": video_id}
+
+@app.get("/summarize")
+def api_summarize(video_id: str):
+    video_id = video_id.replace(".mp4", "")
+    return {"summary": summarize_video(video_id)}
+
+@app.get("/ask_ai")
+async def api_ask_ai(query: str, video_filter: str = None):
+    if video_filter in ["All Videos", ""]: video_filter = None
+    if video_filter: video_filter = video_filter.replace(".mp4", "")
+    engine = await get_search_engine()
+    res = await engine.asearch(query, k=15, video_filter=video_filter)
+    # The LLM call is blocking: keep it off the event loop
+    answer = await run_in_threadpool(ask_question, query, res)
+    return {"answer": answer, "context": res}
+
+@app.get("/chapters")
+def api_chapters(video_id: str):
+    video_id = video_id.replace(".mp4", "")
+    return {"chapters": generate_chapters(video_id)}
+
+@app.get("/stream/{video_id}")
+async def stream_video(video_id: str):
+    """
+    STATELESS STREAMING:
+    Redirects the browser to a temporary, secure MinIO URL.
+    MinIO handles the byte-range requests (seeking) automatically.
+    """
+    # Ensure video_id has no extension for directory lookup, but MinIO needs 'source.mp4'
+    clean_id = video_id.replace(".mp4", "")
+    object_name = f"{clean_id}/source.mp4"
+    
+    # Generate a link valid for 1 hour
+    url = storage.get_presigned_url(object_name)
+    
+    if not url:
+        raise HTTPException(status_code=404, detail="Video not found in Cloud Storage")
+        
     return RedirectResponse(url=url)
\ No newline at end of file
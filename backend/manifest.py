@@ -0,0 +1,56 @@
+import json
+import time
+import redis
+from config import settings
+from logger import log
+
+KEY_PREFIX = "manifest"
+META_FIELD = "_meta"
+
+class StageManifest:
+    """
+    Per-video record of finished ingest stages, so a Celery retry or a manual
+    reprocess resumes at the first incomplete stage instead of re-decoding
+    and re-transcribing everything.
+
+    - manifest:<id>   hash: stage name -> {"finished", "artifacts"} (JSON),
+                      plus "_meta" for facts learned along the way (duration)
+    A stage only counts as done while every MinIO artifact it recorded still
+    exists, so a half-failed upload is simply redone.
+    """
+    def __init__(self):
+        self.redis = redis.Redis(host=settings.REDIS_HOST, port=6379, db=0, decode_responses=True)
+
+    def _key(self, video_id):
+        return f"{KEY_PREFIX}:{video_id}"
+
+    def load(self, video_id: str):
+        raw = self.redis.hgetall(self._key(video_id))
+        return {stage: json.loads(value) for stage, value in raw.items() if stage != META_FIELD}
+
+    def completed(self, video_id: str):
+        """Stage names that finished earlier and whose artifacts are still in MinIO."""
+        from storage import storage
+        done = set()
+        for stage, record in self.load(video_id).items():
+            missing = [key for key in record.get("artifacts", []) if not storage.exists(key)]
+            if missing:
+                log.warning(f"⚠️ Stage '{stage}' of {video_id} lost artifacts {missing}; it will run again")
+                continue
+            done.add(stage)
+        return done
+
+    def mark_done(self, video_id: str, stage: str, artifacts=()):
+        record = {"finished": time.time(), "artifacts": list(artifacts)}
+        self.redis.hset(self._key(video_id), stage, json.dumps(record))
+
+    def meta(self, video_id: str):
+        return json.loads(self.redis.hget(self._key(video_id), META_FIELD) or "{}")
+
+    def set_meta(self, video_id: str, **fields):
+        self.redis.hset(self._key(video_id), META_FIELD, json.dumps({**self.meta(video_id), **fields}))
+
+    def reset(self, video_id: str):
+        self.redis.delete(self._key(video_id))
+
+manifest = StageManifest()
@@ -0,0 +1,157 @@
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from config import settings
+from logger import log
+
+ModelKey = namedtuple("ModelKey", ["model", "size", "device", "precision"])
+
+def _resident_bytes():
+    """Current RSS of this process (0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def _device_bytes(device):
+    if device == "cuda":
+        import torch
+        return torch.cuda.memory_allocated()
+    return _resident_bytes()
+
+class ModelRegistry:
+    """
+    Process-wide home of every heavy model (CLIP, MiniLM, Whisper), keyed by
+    (model, size, device, precision) so e.g. Whisper 'base' and 'small' or
+    CLIP torch vs onnx-int8 never collide.
+
+    - Lazy: a model is loaded on first get(), once, even if several pipeline
+      threads ask at the same time (per-key lock).
+    - Warmup: an optional callable runs right after loading, so the first
+      real request doesn't pay for lazy kernels / allocator growth.
+    - Budget: loaded models are kept in LRU order with the memory their load
+      added (RSS, or CUDA allocations). When the total exceeds
+      MODEL_MEMORY_BUDGET_MB the least recently used ones are dropped.
+      Callers must not hold on to models across requests, otherwise
+      unloading cannot free anything.
+    """
+    def __init__(self, budget_bytes=0):
+        self.budget_bytes = budget_bytes
+        self._models = OrderedDict()   # key -> {"model", "bytes", "loaded", "hits"}
+        self._guard = threading.Lock()
+        self._locks = {}
+
+    def get(self, key, loader, warmup=None):
+        key = ModelKey(*key)
+        with self._guard:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                entry["hits"] += 1
+                return entry["model"]
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        with lock:
+            with self._guard:
+                entry = self._models.get(key)
+            if entry is not None:
+                return entry["model"]
+
+            log.info(f"🧠 Loading Model: {key.model} ({key.size}, {key.device}, {key.precision})...")
+            before = _device_bytes(key.device)
+            started = time.perf_counter()
+            model = loader()
+            if warmup:
+                warmup(model)
+            used = max(0, _device_bytes(key.device) - before)
+            log.info(f"   ↳ Ready in {time.perf_counter() - started:.1f}s (~{used / 1024**2:.0f} MB)")
+
+            with self._guard:
+                self._models[key] = {"model": model, "bytes": used, "loaded": time.time(), "hits": 0}
+                self._enforce_budget(keep=key)
+            return model
+
+    def _enforce_budget(self, keep):
+        if not self.budget_bytes:
+            return
+        total = sum(e["bytes"] for e in self._models.values())
+        for key in list(self._models):
+            if total <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._models[key]["bytes"]
+            self._drop(key)
+        if total > self.budget_bytes:
+            log.warning(f"⚠️ Model memory ~{total / 1024**2:.0f} MB exceeds budget "
+                        f"{self.budget_bytes / 1024**2:.0f} MB with a single model loaded")
+
+    def _drop(self, key):
+        entry = self._models.pop(key)
+        log.info(f"♻️ Unloading Model: {key.model} ({key.size}), ~{entry['bytes'] / 1024**2:.0f} MB")
+        del entry
+        gc.collect()
+        if key.device == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+
+    def unload(self, key):
+        with self._guard:
+            if ModelKey(*key) in self._models:
+                self._drop(ModelKey(*key))
+
+    def stats(self):
+        with self._guard:
+            return {
+                "budget_mb": self.budget_bytes // 1024**2,
+                "models": [
+                    {**k._asdict(), "mb": round(e["bytes"] / 1024**2, 1), "hits": e["hits"],
+                     "loaded_at": e["loaded"]}
+                    for k, e in self._models.items()
+                ],
+            }
+
+registry = ModelRegistry(settings.MODEL_MEMORY_BUDGET_MB * 1024**2)
+
+# --- Shared loaders (API + worker go through these) ---
+
+def clip_key(model_name, device):
+    precision = settings.CLIP_PRECISION if settings.CLIP_BACKEND == "onnx" else ("fp16" if device == "cuda" else "fp32")
+    return ModelKey("clip", model_name, "cpu" if settings.CLIP_BACKEND == "onnx" else device,
+                    f"{settings.CLIP_BACKEND}-{precision}")
+
+def local_clip(model_name, device):
+    from clip_backend import load_clip
+    return registry.get(clip_key(model_name, device), lambda: load_clip(model_name, device),
+                        warmup=lambda m: m.encode_texts(["warmup"]))
+
+def local_sentence_encoder(model_name, device="cpu"):
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name, device=device)
+    return registry.get(ModelKey("sentence-transformers", model_name, device, "fp32"), load,
+                        warmup=lambda m: m.encode(["warmup"]))
+
+def get_clip(model_name, device):
+    """CLIP backend, served by the local embedding server when EMBED_SERVER_SOCKET is set."""
+    if settings.EMBED_SERVER_SOCKET:
+        from embed_server import RemoteCLIP
+        return RemoteCLIP.connect(model_name, device)
+    return local_clip(model_name, device)
+
+def get_sentence_encoder(model_name, device="cpu"):
+    """SentenceTransformer (or its remote stand-in with the same .encode)."""
+    if settings.EMBED_SERVER_SOCKET:
+        from embed_server import RemoteSentenceEncoder
+        return RemoteSentenceEncoder.connect(model_name, device)
+    return local_sentence_encoder(model_name, device)
+
+def get_whisper(model_size, device="cpu", compute_type="int8", cpu_threads=0, num_workers=1):
+    def load():
+        from faster_whisper import WhisperModel
+        return WhisperModel(model_size, device=device, compute_type=compute_type,
+                            cpu_threads=cpu_threads, num_workers=num_workers)
+    return registry.get(ModelKey("whisper", model_size, device, compute_type), load)
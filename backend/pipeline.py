@@ -0,0 +1,90 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from logger import log
+
+class StageGraph:
+    """
+    In-process dependency graph for the ingest pipeline.
+    Every stage whose dependencies are done is started on its own thread, so
+    independent branches (audio -> transcript vs frames -> CLIP) overlap.
+
+    - Progress: completed stage weights are mapped onto [start_pct, end_pct]
+      and reported together with the labels of the stages currently running.
+    - Resume: stages added with done=True finished in an earlier attempt;
+      they count as completed (dependencies + progress) without running.
+    - Cancellation: `check()` is the cancel callback for stages. It raises
+      InterruptedError when the user cancels OR when a sibling branch failed,
+      so long-running stages bail out at their next checkpoint.
+    """
+    def __init__(self, on_progress=None, cancel_check=None, start_pct=10, end_pct=95):
+        self.on_progress = on_progress
+        self.cancel_check = cancel_check
+        self.start_pct = start_pct
+        self.end_pct = end_pct
+        self.stages = {}
+        self._aborted = threading.Event()
+
+    def add(self, name, fn, label, weight=1, after=(), done=False):
+        for dep in after:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = {"fn": fn, "label": label, "weight": weight, "after": tuple(after), "done": done}
+        return self
+
+    def check(self):
+        if self._aborted.is_set():
+            raise InterruptedError("Sibling stage failed")
+        if self.cancel_check:
+            self.cancel_check()
+
+    def _run_stage(self, name):
+        self.check()
+        return self.stages[name]["fn"]()
+
+    def _report(self, done_weight, running):
+        if not self.on_progress:
+            return
+        total = sum(s["weight"] for s in self.stages.values()) or 1
+        pct = self.start_pct + int((self.end_pct - self.start_pct) * done_weight / total)
+        labels = " + ".join(self.stages[n]["label"] for n in running.values())
+        self.on_progress(pct, f"{labels}..." if labels else "Finishing...")
+
+    def run(self):
+        pending = {n: s for n, s in self.stages.items() if not s["done"]}
+        done = set(self.stages) - set(pending)
+        running = {}  # future -> stage name
+        results = {}
+        done_weight = sum(self.stages[n]["weight"] for n in done)
+        error = None
+
+        with ThreadPoolExecutor(max_workers=len(self.stages) or 1, thread_name_prefix="stage") as pool:
+            while pending or running:
+                if error is None:
+                    for name in [n for n, s in pending.items() if all(d in done for d in s["after"])]:
+                        del pending[name]
+                        running[pool.submit(self._run_stage, name)] = name
+                    if not running:
+                        raise ValueError(f"Unsatisfiable stage dependencies: {sorted(pending)}")
+                    self._report(done_weight, running)
+                elif not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except BaseException as e:
+                        # Keep the first real failure; sibling aborts are a consequence of it
+                        if error is None or (isinstance(error, InterruptedError) and not isinstance(e, InterruptedError)):
+                            error = e
+                        if not self._aborted.is_set():
+                            log.warning(f"⚠️ Stage '{name}' stopped ({e}). Waiting for running stages...")
+                            self._aborted.set()
+                        continue
+                    done.add(name)
+                    done_weight += self.stages[name]["weight"]
+
+        if error is not None:
+            raise error
+        return results
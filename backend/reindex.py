@@ -0,0 +1,160 @@
+"""
+Bulk re-index from stored artifacts (frames/*.jpg + timestamps.json,
+transcript.json in MinIO): no source download, no decoding, no Whisper.
+
+    python reindex.py [--only vision|text] [--videos ID ...] [--keep-old] [--no-swap]
+
+Vectors go into a fresh versioned collection (<name>_v<unix time>); search
+keeps using the current one through the alias until every video is done,
+then the alias is swapped atomically. Vision and text run as two lanes in
+parallel; within a lane frames / transcripts stream from MinIO on the
+embedders' prefetch pools while the previous batch is on the model.
+
+Only videos whose catalog status is "ready" are re-embedded: one still
+ingesting, or stored without processing, has no frames / transcript yet.
+Those are logged and skipped, not counted as failures.
+
+Videos ingested while the rebuild runs land in the old version, so two
+catch-up passes re-embed them into the new one: one before the swap, and
+one after it (new ingests then already go to the new version). Only after
+that is the old version dropped. Remaining window: a video whose ingest
+is still running during the final pass has only its post-swap points in
+the new version; re-run it with --videos (or /reprocess) once it is ready.
+"""
+import argparse
+import os
+import shutil
+import threading
+import time
+from config import settings
+from db import db
+from storage import storage
+from catalog import catalog
+from logger import log
+
+TARGETS = {"vision": "vision_frames", "text": "video_transcripts"}
+
+def _cleanup(video_id):
+    shutil.rmtree(settings.TEMP_DIR / video_id, ignore_errors=True)
+    transcript = settings.TEMP_DIR / f"{video_id}.json"
+    if transcript.exists():
+        os.remove(transcript)
+
+class Lane:
+    """One collection being rebuilt: its embedder, new version and progress."""
+    def __init__(self, kind, embedder):
+        self.kind = kind
+        self.name = TARGETS[kind]
+        self.embedder = embedder
+        self.version = db.create_version(self.name)
+        embedder.collection = self.version
+        self.done = 0
+        self.failed = {}
+        self.seconds = 0.0
+
+    def embed(self, video_id):
+        if self.kind == "vision":
+            self.embedder.process_video_frames(video_id)
+        else:
+            self.embedder.process_transcripts(video_id)
+
+    def run(self, video_ids):
+        started = time.perf_counter()
+        for video_id in video_ids:
+            try:
+                self.embed(video_id)
+                self.done += 1
+            except Exception as e:
+                log.error(f"❌ Re-index {self.kind} failed for {video_id}: {e}")
+                self.failed[video_id] = str(e)
+            if self.done % 10 == 0 and self.done:
+                rate = self.done / max(time.perf_counter() - started, 1e-6) * 3600
+                log.info(f"   ↳ {self.kind}: {self.done}/{len(video_ids)} videos ({rate:.0f} videos/hour)")
+        self.seconds += time.perf_counter() - started
+
+def build_lanes(kinds):
+    lanes = []
+    if "vision" in kinds:
+        from embed_vision import VisionEmbedder
+        lanes.append(Lane("vision", VisionEmbedder()))
+    if "text" in kinds:
+        from embed_text import TextEmbedder
+        lanes.append(Lane("text", TextEmbedder()))
+    return lanes
+
+def run_lanes(lanes, video_ids):
+    threads = [threading.Thread(target=lane.run, args=(video_ids,), name=f"reindex-{lane.kind}") for lane in lanes]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for video_id in video_ids:
+        _cleanup(video_id)
+
+def ready_videos(video_ids):
+    """The videos with artifacts to re-embed. Uncatalogued ones predate the catalog and count as ready."""
+    statuses = catalog.statuses(video_ids)
+    skipped = {vid: status for vid, status in statuses.items() if status not in (None, "ready")}
+    for video_id, status in skipped.items():
+        log.warning(f"⏭️ Skipping {video_id}: status '{status}', nothing to re-embed yet")
+    return [vid for vid in video_ids if vid not in skipped]
+
+def catch_up(lanes, video_ids):
+    """Re-embeds videos ready (in the old version) since video_ids was listed; extends video_ids."""
+    late = ready_videos(sorted(set(storage.list_video_ids()) - set(video_ids)))
+    if late:
+        log.info(f"🔁 Catching up on {len(late)} videos ingested during the rebuild")
+        run_lanes(lanes, late)
+        video_ids += late
+    return late
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=sorted(TARGETS), help="Rebuild one collection (default: both)")
+    parser.add_argument("--videos", nargs="+", help="Video ids (default: every video in the bucket)")
+    parser.add_argument("--keep-old", action="store_true", help="Keep the previous version after the swap")
+    parser.add_argument("--no-swap", action="store_true", help="Build the new version but leave the alias alone")
+    parser.add_argument("--allow-failures", action="store_true", help="Swap even if some videos failed")
+    args = parser.parse_args()
+
+    video_ids = ready_videos(args.videos or storage.list_video_ids())
+    lanes = build_lanes([args.only] if args.only else list(TARGETS))
+    log.info(f"🔁 Re-indexing {len(video_ids)} videos into {', '.join(l.version for l in lanes)}")
+
+    started = time.perf_counter()
+    run_lanes(lanes, video_ids)
+    if not args.videos:
+        catch_up(lanes, video_ids)
+    elapsed = time.perf_counter() - started
+
+    log.info(f"📊 {'lane':<7} {'collection':<32} {'videos':>7} {'failed':>7} {'points':>9} {'videos/hour':>12}")
+    for lane in lanes:
+        points = db.client.count(lane.version, exact=True).count
+        rate = lane.done / max(lane.seconds, 1e-6) * 3600
+        log.info(f"   {lane.kind:<7} {lane.version:<32} {lane.done:>7} {len(lane.failed):>7} {points:>9} {rate:>12.0f}")
+    log.info(f"   overall: {len(video_ids)} videos in {elapsed / 60:.1f} min "
+             f"({len(video_ids) / max(elapsed, 1e-6) * 3600:.0f} videos/hour)")
+
+    failed = {vid for lane in lanes for vid in lane.failed}
+    if args.no_swap:
+        log.info("⏸️ --no-swap: aliases unchanged")
+        return
+    if failed and not args.allow_failures:
+        log.warning(f"⚠️ {len(failed)} videos failed; aliases unchanged (use --allow-failures to swap anyway)")
+        return
+
+    old_versions = [db.swap_alias(lane.name, lane.version, drop_old=False) for lane in lanes]
+    if not args.videos:
+        # Ingests between the last catch-up and the swap went to the old version
+        catch_up(lanes, video_ids)
+    if not args.keep_old:
+        for old, lane in zip(old_versions, lanes):
+            if old and old != lane.version:
+                db.client.delete_collection(old)
+                log.info(f"🗑️ Dropped previous version {old}")
+    for video_id in video_ids:
+        catalog.update(video_id, **db.video_stats(video_id))
+    log.info("✅ Re-index complete")
+
+if __name__ == "__main__":
+    main()
@@ -1,91 +1,250 @@
-import torch
-import clip
-from sentence_transformers import SentenceTransformer
-from db import db
-from logger import log
-from storage import storage
-
-class VideoSearchEngine:
-    def __init__(self):
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        
-        # 1. Load Vision Model (CLIP ViT-L/14)
-        log.info(f"👁️ Loading Vision Model (CLIP) on {self.device.upper()}...")
-        self.vision_model, _ = clip.load("ViT-L/14", device=self.device)
-        
-        # 2. Load Text Model (MiniLM) - CPU Optimized
-        log.info("📝 Loading Text Model (MiniLM) on CPU...")
-        # We force CPU for text to save VRAM/System RAM, as it's very fast anyway
-        self.text_model = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
-
-    def search(self, query: str, k=5, video_filter=None):
-        log.info(f"🔍 Searching: '{query}'")
-        
-        # --- A. Generate Vision Vector (768 dim) ---
-        # CLIP requires truncation at 77 tokens
-        text_token = clip.tokenize([query[:77]], truncate=True).to(self.device)
-        with torch.no_grad():
-            vision_vector = self.vision_model.encode_text(text_token).cpu().numpy().flatten().tolist()
-            
-        # --- B. Generate Text Vector (384 dim) ---
-        # MiniLM handles full sentences natively
-        text_vector = self.text_model.encode(query, convert_to_numpy=True).flatten().tolist()
-        
-        # --- C. Parallel Search in DB ---
-        # 1. Search Images using CLIP vector
-        v_results = db.search_vision(vision_vector, k=k*3, filter_video_id=video_filter)
-        
-        # 2. Search Transcripts using MiniLM vector
-        t_results = db.search_text(text_vector, k=k*3, filter_video_id=video_filter)
-        
-        # --- D. Reciprocal Rank Fusion (RRF) ---
-        # This algorithm fairly merges results from two different models
-        fusion_map = {}
-        RRF_K = 60 
-
-        def add_score(ts, vid, score, meta, type_label, text=""):
-            # Round to nearest second for grouping close matches
-            key = int(ts)
-            
-            if key not in fusion_map:
-                s3_key = meta.get('frame_path', '') or f"{vid}/frames/{meta.get('filename','')}"
-                fusion_map[key] = {
-                    "score": 0, 
-                    "video_id": vid, 
-                    "timestamp": ts,
-                    "frame_path": storage.get_presigned_url(s3_key),
-                    "type": type_label, 
-                    "context": text or "Visual Match"
-                }
-            
-            fusion_map[key]["score"] += score
-            
-            # Hybrid Logic: If we find speech overlapping with a visual match, mark it
-            if type_label == "🗣️ Speech" and "Visual" in fusion_map[key]["type"]:
-                fusion_map[key]["type"] = "✨ Hybrid"
-                fusion_map[key]["context"] += f" + {text}"
-
-        # Rank Visuals (Weight 2.0 - Visuals are usually what users want first)
-        for rank, hit in enumerate(v_results):
-            rrf_score = 2.0 / (RRF_K + rank + 1)
-            add_score(hit['metadata']['timestamp'], hit['metadata']['video_id'], rrf_score, hit['metadata'], "📸 Visual")
-
-        # Rank Text (Weight 1.5 - Boosted relevance due to better model)
-        for rank, hit in enumerate(t_results):
-            rrf_score = 1.5 / (RRF_K + rank + 1)
-            ts = hit['metadata']['timestamp']
-            
-            # Smart Fusion: Look for match within 2 seconds of a visual hit
-            found_match = False
-            for offset in range(-2, 3):
-                if int(ts + offset) in fusion_map:
-                    add_score(ts + offset, hit['metadata']['video_id'], rrf_score, hit['metadata'], "🗣️ Speech", f"Said: '{hit['metadata']['text']}...'")
-                    found_match = True
-                    break
-            
-            if not found_match:
-                add_score(ts, hit['metadata']['video_id'], rrf_score, hit['metadata'], "🗣️ Speech", f"Said: '{hit['metadata']['text']}...'")
-
-        # Sort by final score
-        results = sorted(fusion_map.values(), key=lambda x: x["score"], reverse=True)
-        return results[:k]
\ No newline at end of file
+import asyncio
+import hashlib
+import threading
+import redis
+import numpy as np
+import torch
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from model_registry import get_clip, get_sentence_encoder
+from db import db
+from fusion import TemporalFusion
+from logger import log
+from storage import storage
+from config import settings
+
+CLIP_DIM = 768
+SEARCH_BATCH_CHUNK = 256   # Queries per batched encode / Qdrant batch request
+
+class QueryEmbeddingCache:
+    """
+    Bounded, thread-safe LRU of normalized query -> (CLIP vector, MiniLM vector).
+    With share_via_redis, local misses fall through to Redis so API replicas
+    warm each other; vectors are stored there as raw float32 bytes.
+    """
+    def __init__(self, max_size, model_tag, share_via_redis=False, ttl=86400):
+        self.max_size = max_size
+        self.model_tag = model_tag
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis = redis.Redis(host=settings.REDIS_HOST, port=6379, db=0) if share_via_redis else None
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        # Both CLIP's tokenizer and MiniLM (uncased) lowercase anyway
+        return " ".join(query.lower().split())
+
+    def _redis_key(self, key):
+        digest = hashlib.sha1(f"{self.model_tag}|{key}".encode()).hexdigest()
+        return f"qcache:{digest}"
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        if self.redis is not None:
+            try:
+                blob = self.redis.get(self._redis_key(key))
+            except Exception as e:
+                log.warning(f"⚠️ Query cache Redis read failed: {e}")
+                blob = None
+            if blob:
+                flat = np.frombuffer(blob, dtype=np.float32)
+                value = (flat[:CLIP_DIM].tolist(), flat[CLIP_DIM:].tolist())
+                with self._lock:
+                    self.redis_hits += 1
+                self._store_local(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._store_local(key, value)
+        if self.redis is not None:
+            blob = np.concatenate([np.asarray(v, dtype=np.float32) for v in value]).tobytes()
+            try:
+                self.redis.setex(self._redis_key(key), self.ttl, blob)
+            except Exception as e:
+                log.warning(f"⚠️ Query cache Redis write failed: {e}")
+
+    def _store_local(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.redis_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+class VideoSearchEngine:
+    def __init__(self):
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        # 1. Load Vision Model (CLIP ViT-L/14)
+        log.info(f"👁️ Loading Vision Model (CLIP) on {self.device.upper()}...")
+        clip_tag = self.clip.tag
+        
+        # 2. Load Text Model (MiniLM) - CPU Optimized
+        log.info("📝 Loading Text Model (MiniLM) on CPU...")
+        # We force CPU for text to save VRAM/System RAM, as it's very fast anyway
+        self.text_model  # Load eagerly so the first query doesn't pay for it
+
+        # 3. Query Embedding Cache (repeated dashboard / saved searches skip inference)
+        self.query_cache = QueryEmbeddingCache(
+            settings.QUERY_CACHE_SIZE,
+            model_tag=f"{clip_tag}|all-MiniLM-L6-v2",
+            share_via_redis=settings.QUERY_CACHE_REDIS,
+            ttl=settings.QUERY_CACHE_TTL,
+        )
+
+        # 4. Result Fusion (weights / windows from settings.FUSION_*)
+        self.fusion = TemporalFusion()
+
+        # 5. Dedicated executor for query encoding (async API path)
+        self.encode_executor = ThreadPoolExecutor(max_workers=settings.QUERY_ENCODE_WORKERS,
+                                                  thread_name_prefix="query-encode")
+
+    # Models come from the shared registry (or the local embedding server) on every use
+    @property
+    def clip(self):
+        return get_clip("ViT-L/14", self.device)
+
+    @property
+    def text_model(self):
+        return get_sentence_encoder("all-MiniLM-L6-v2", "cpu")
+
+    def encode_query(self, query: str):
+        """Returns (CLIP vector, MiniLM vector) for a query, from cache when possible."""
+        return self.encode_queries([query])[0]
+
+    def encode_queries(self, queries):
+        """
+        Batched encode: cache misses go through ONE CLIP encode_text call and
+        ONE MiniLM encode call per chunk. Returns vectors in input order.
+        """
+        keys = [QueryEmbeddingCache.normalize(q) for q in queries]
+        vectors = {}
+        todo = []
+        for key in dict.fromkeys(keys):
+            cached = self.query_cache.get(key)
+            if cached is not None:
+                vectors[key] = cached
+            else:
+                todo.append(key)
+
+        for i in range(0, len(todo), SEARCH_BATCH_CHUNK):
+            chunk = todo[i : i + SEARCH_BATCH_CHUNK]
+
+            # --- A. Generate Vision Vectors (768 dim) ---
+            # CLIP requires truncation at 77 tokens
+            vision_vectors = self.clip.encode_texts([key[:77] for key in chunk])
+
+            # --- B. Generate Text Vectors (384 dim) ---
+            # MiniLM handles full sentences natively
+            text_vectors = self.text_model.encode(chunk, batch_size=64, convert_to_numpy=True)
+
+            for key, vision_vector, text_vector in zip(chunk, vision_vectors, text_vectors):
+                vectors[key] = (vision_vector.flatten().tolist(), text_vector.flatten().tolist())
+                self.query_cache.put(key, vectors[key])
+
+        return [vectors[key] for key in keys]
+
+    def search(self, query: str, k=5, video_filter=None):
+        """Blocking search (scripts / evaluation). The API uses asearch."""
+        log.info(f"🔍 Searching: '{query}'")
+        
+        # --- A/B. Query Vectors (768 dim CLIP + 384 dim MiniLM) ---
+        vision_vector, text_vector = self.encode_query(query)
+        
+        # --- C. Search in DB ---
+        # 1. Search Images using CLIP vector
+        v_results = db.search_vision(vision_vector, k=k*3, filter_video_id=video_filter)
+        
+        # 2. Search Transcripts using MiniLM vector
+        t_results = db.search_text(text_vector, k=k*3, filter_video_id=video_filter)
+        
+        return self._fuse(v_results, t_results, k)
+
+    async def asearch(self, query: str, k=5, video_filter=None):
+        """
+        Async search for the API: query encoding runs on a dedicated executor
+        (never on the event loop or the request threadpool), then both Qdrant
+        collections are queried concurrently, so latency ~ the slower lookup.
+        """
+        log.info(f"🔍 Searching: '{query}'")
+        loop = asyncio.get_running_loop()
+
+        # --- A/B. Query Vectors (768 dim CLIP + 384 dim MiniLM) ---
+        vision_vector, text_vector = await loop.run_in_executor(self.encode_executor, self.encode_query, query)
+
+        # --- C. Parallel Search in DB ---
+        v_results, t_results = await asyncio.gather(
+            db.asearch_vision(vision_vector, k=k*3, filter_video_id=video_filter),
+            db.asearch_text(text_vector, k=k*3, filter_video_id=video_filter),
+        )
+        # URL signing (and the first MinIO client init) must not run on the event loop
+        return await loop.run_in_executor(self.encode_executor, self._fuse, v_results, t_results, k)
+
+    def search_many(self, queries, k=5, video_filter=None):
+        """
+        Batched multi-query search: batched encoding, Qdrant batch search on
+        both collections, then RRF per query. Results follow input order.
+        """
+        log.info(f"🔍 Batch search: {len(queries)} queries")
+        results = []
+        for i in range(0, len(queries), SEARCH_BATCH_CHUNK):
+            vectors = self.encode_queries(queries[i : i + SEARCH_BATCH_CHUNK])
+            v_batches = db.search_vision_batch([v for v, _ in vectors], k=k*3, filter_video_id=video_filter)
+            t_batches = db.search_text_batch([t for _, t in vectors], k=k*3, filter_video_id=video_filter)
+            results.extend(self._fuse(v, t, k) for v, t in zip(v_batches, t_batches))
+        return results
+
+    async def asearch_many(self, queries, k=5, video_filter=None):
+        """Async search_many: encoding on the encode executor, both batch lookups concurrent."""
+        log.info(f"🔍 Batch search: {len(queries)} queries")
+        loop = asyncio.get_running_loop()
+        results = []
+        for i in range(0, len(queries), SEARCH_BATCH_CHUNK):
+            vectors = await loop.run_in_executor(self.encode_executor, self.encode_queries,
+                                                 queries[i : i + SEARCH_BATCH_CHUNK])
+            v_batches, t_batches = await asyncio.gather(
+                db.asearch_vision_batch([v for v, _ in vectors], k=k*3, filter_video_id=video_filter),
+                db.asearch_text_batch([t for _, t in vectors], k=k*3, filter_video_id=video_filter),
+            )
+            results.extend(await loop.run_in_executor(
+                self.encode_executor, lambda: [self._fuse(v, t, k) for v, t in zip(v_batches, t_batches)]))
+        return results
+
+    def _fuse(self, v_results, t_results, k):
+        # --- D. Reciprocal Rank Fusion (RRF) ---
+        # Weighted, per-video temporal grouping (see fusion.TemporalFusion)
+        results = self.fusion.fuse(v_results, t_results, k)
+
+        # Only the returned hits need URLs, and they come from one batch (mostly cache hits)
+        urls = storage.get_urls([r["frame_path"] for r in results])
+        for r in results:
+            r["frame_path"] = urls[r["frame_path"]]
+        return results
\ No newline at end of file
@@ -1,11 +1,20 @@
+import io
 import os
 import json
+import time
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
 from minio import Minio
 from minio.deleteobjects import DeleteObject
 from datetime import timedelta
 from config import settings
+from lazy import Lazy
 from logger import log
 
+URL_CACHE_SIZE = 20000      # Signed URLs kept in memory (LRU)
+URL_REUSE_FRACTION = 0.5    # Re-serve a signed URL until half its lifetime is gone
+
 class Storage:
     def __init__(self):
         log.info(f"☁️ Connecting to MinIO at {settings.MINIO_ENDPOINT}...")
@@ -15,6 +24,11 @@ class Storage:
             secret_key=settings.MINIO_SECRET_KEY,
             secure=False 
         )
+        self._public_endpoint = os.getenv("MINIO_PUBLIC_ENDPOINT", "localhost:9000")
+        self._internal_endpoint = f"{settings.MINIO_ENDPOINT}"
+        self._public_base = f"http://{self._public_endpoint}/{settings.MINIO_BUCKET}"
+        self._url_cache = OrderedDict()  # (object_name, expiration) -> (url, reuse_until)
+        self._url_lock = threading.Lock()
         self._ensure_bucket()
         # We replace the broken CORS logic with a standard Policy
         self._set_public_policy()
@@ -56,6 +70,23 @@ class Storage:
             log.error(f"❌ MinIO Upload Error: {e}")
             return False
 
+    def upload_bytes(self, data: bytes, object_name: str, content_type: str = "application/octet-stream") -> bool:
+        try:
+            self.client.put_object(settings.MINIO_BUCKET, object_name, io.BytesIO(data), length=len(data), content_type=content_type)
+            log.info(f"✅ Uploaded to MinIO: {object_name}")
+            return True
+        except Exception as e:
+            log.error(f"❌ MinIO Upload Error: {e}")
+            return False
+
+    def download_bytes(self, object_name: str) -> bytes:
+        response = self.client.get_object(settings.MINIO_BUCKET, object_name)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
     def exists(self, object_name: str) -> bool:
         try:
             self.client.stat_object(settings.MINIO_BUCKET, object_name)
@@ -63,15 +94,17 @@ class Storage:
         except:
             return False
 
-    def list_videos(self):
+    def list_video_ids(self):
+        """Full bucket listing: only used to backfill the video catalog."""
         objects = self.client.list_objects(settings.MINIO_BUCKET, recursive=False)
-        videos = []
-        for obj in objects:
-            if obj.is_dir:
-                vid_id = obj.object_name.replace("/", "")
-                thumb_url = self.get_presigned_url(f"{vid_id}/frames/frame_0000.jpg")
-                videos.append({"id": vid_id, "thumbnail": thumb_url})
-        return videos
+        # '_'-prefixed folders are internal (e.g. the embedding cache tier)
+        return [obj.object_name.replace("/", "") for obj in objects
+                if obj.is_dir and not obj.object_name.startswith("_")]
+
+    def list_videos(self):
+        vid_ids = self.list_video_ids()
+        thumbs = self.get_urls([f"{vid_id}/frames/frame_0000.jpg" for vid_id in vid_ids])
+        return [{"id": vid_id, "thumbnail": thumbs[f"{vid_id}/frames/frame_0000.jpg"]} for vid_id in vid_ids]
 
     def delete_folder(self, prefix: str):
         objects_to_delete = self.client.list_objects(settings.MINIO_BUCKET, prefix=prefix, recursive=True)
@@ -84,24 +117,64 @@ class Storage:
         for err in errors:
             log.error(f"Error deleting {err}")
 
+    def _sign(self, object_name: str, expiration: int) -> str:
+        url = self.client.get_presigned_url(
+            "GET",
+            settings.MINIO_BUCKET,
+            object_name,
+            expires=timedelta(seconds=expiration),
+        )
+        # FIX: Ensure browser can reach it (Docker DNS vs Localhost)
+        if self._internal_endpoint in url:
+            url = url.replace(self._internal_endpoint, self._public_endpoint)
+        return url
+
     def get_presigned_url(self, object_name: str, expiration=3600):
-        try:
-            url = self.client.get_presigned_url(
-                "GET",
-                settings.MINIO_BUCKET,
-                object_name,
-                expires=timedelta(seconds=expiration),
-            )
-            # FIX: Ensure browser can reach it (Docker DNS vs Localhost)
-            public_endpoint = os.getenv("MINIO_PUBLIC_ENDPOINT", "localhost:9000")
-            internal_endpoint = f"{settings.MINIO_ENDPOINT}"
-
-            if internal_endpoint in url:
-                url = url.replace(internal_endpoint, public_endpoint)
-            return url
-        
-        except Exception as e:
-            log.error(f"URL Gen Error: {e}")
-            return ""
+        return self.get_urls([object_name], expiration).get(object_name, "")
+
+    def get_urls(self, object_names, expiration=3600):
+        """
+        Batch URL API for the hot paths (search results, library thumbnails).
+        - FRAME_URL_MODE=public: stable bucket URLs, no signing at all
+          (the bucket already has a public-read policy).
+        - Otherwise signed URLs are cached and re-served until only
+          URL_REUSE_FRACTION of their lifetime is left, so cache hits cost
+          a dict lookup.
+        Returns {object_name: url}; failures map to "".
+        """
+        if settings.FRAME_URL_MODE == "public":
+            return {name: f"{self._public_base}/{quote(name)}" for name in object_names}
+
+        now = time.monotonic()
+        urls = {}
+        missing = []
+        with self._url_lock:
+            for name in object_names:
+                entry = self._url_cache.get((name, expiration))
+                if entry and entry[1] > now:
+                    self._url_cache.move_to_end((name, expiration))
+                    urls[name] = entry[0]
+                else:
+                    missing.append(name)
+
+        signed = []
+        for name in dict.fromkeys(missing):
+            try:
+                urls[name] = self._sign(name, expiration)
+                signed.append(name)
+            except Exception as e:
+                log.error(f"URL Gen Error: {e}")
+                urls[name] = ""
+
+        if signed:
+            reuse_until = now + expiration * URL_REUSE_FRACTION
+            with self._url_lock:
+                for name in signed:
+                    self._url_cache[(name, expiration)] = (urls[name], reuse_until)
+                    self._url_cache.move_to_end((name, expiration))
+                while len(self._url_cache) > URL_CACHE_SIZE:
+                    self._url_cache.popitem(last=False)
+        return urls
 
-storage = Storage()
\ No newline at end of file
+# Bucket + policy are set up on first use, not at import
+storage = Lazy(Storage, "minio")
\ No newline at end of file
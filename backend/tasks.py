@@ -0,0 +1,78 @@
+import redis
+from celery import Celery, chain, group
+from config import settings
+
+# Lightweight Celery client: the API enqueues by task name, so it never has
+# to import worker.py (and with it torch, Whisper, CLIP and OpenCV).
+PROCESS_VIDEO_TASK = "worker.process_video_task"
+# Staged pipeline: one task per stage, each on its own queue so every stage
+# gets a worker pool sized for it (see docker-compose.yml)
+STAGE_TASKS = {
+    "decode": "worker.decode_task",
+    "transcribe": "worker.transcribe_task",
+    "vision_embed": "worker.vision_embed_task",
+    "text_embed": "worker.text_embed_task",
+    "llm": "worker.llm_task",
+}
+FINALIZE_TASK = "worker.finalize_task"   # Tiny; stays on the default 'celery' queue
+DOWNLOAD_TASK = "worker.download_task"
+QUEUES = ("celery", "download", *STAGE_TASKS)
+# Redis transport priorities: one list per step, 0 is consumed first
+PRIORITY_STEPS = list(range(10))
+PRIORITY_SEP = ":"
+INTERACTIVE_PRIORITY = 0
+
+# Redis Config
+celery_app = Celery("reel_worker", broker=f"redis://{settings.REDIS_HOST}:6379/0", backend=f"redis://{settings.REDIS_HOST}:6379/0")
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    result_serializer="json",
+    timezone="UTC",
+    enable_utc=True,
+    task_routes={DOWNLOAD_TASK: {"queue": "download"}, **{name: {"queue": queue} for queue, name in STAGE_TASKS.items()}},
+    broker_transport_options={"priority_steps": PRIORITY_STEPS, "sep": PRIORITY_SEP, "queue_order_strategy": "priority"},
+)
+
+def _stage(name, filename, priority):
+    return celery_app.signature(name, args=[filename], immutable=True, priority=priority)
+
+def enqueue_video(filename: str, priority: int = INTERACTIVE_PRIORITY):
+    """Interactive uploads use priority 0; batch jobs come through batches.dispatch with their level."""
+    if settings.PIPELINE_MODE != "staged":
+        return celery_app.send_task(PROCESS_VIDEO_TASK, args=[filename], priority=priority)
+    # decode -> (transcribe -> text_embed -> llm  ||  vision_embed) -> finalize
+    workflow = chain(
+        _stage(STAGE_TASKS["decode"], filename, priority),
+        group(
+            chain(_stage(STAGE_TASKS["transcribe"], filename, priority), _stage(STAGE_TASKS["text_embed"], filename, priority),
+                  _stage(STAGE_TASKS["llm"], filename, priority)),
+            _stage(STAGE_TASKS["vision_embed"], filename, priority),
+        ),
+        _stage(FINALIZE_TASK, filename, priority),
+    )
+    return workflow.apply_async()
+
+
+def enqueue_download(url: str, batch_id: str = None, priority: int = INTERACTIVE_PRIORITY):
+    """Queues a URL job on the download workers. Returns its job id (see jobs.py)."""
+    from jobs import jobs
+    job_id = jobs.create(url, batch_id)
+    celery_app.send_task(DOWNLOAD_TASK, args=[url], kwargs={"job_id": job_id, "batch_id": batch_id, "priority": priority},
+                         priority=priority)
+    return job_id
+
+_redis = None
+
+def queue_depths():
+    """Messages waiting per Celery queue (all priority levels), straight from the Redis broker."""
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis(host=settings.REDIS_HOST, port=6379, db=0)
+    pipe = _redis.pipeline()
+    for queue in QUEUES:
+        for step in PRIORITY_STEPS:
+            pipe.llen(f"{queue}{PRIORITY_SEP}{step}" if step else queue)
+    counts = pipe.execute()
+    n = len(PRIORITY_STEPS)
+    return {queue: sum(counts[i * n:(i + 1) * n]) for i, queue in enumerate(QUEUES)}
@@ -0,0 +1,49 @@
+import json
+import pytest
+
+pytest.importorskip("redis")
+
+from batches import BatchScheduler, dedupe_jobs
+
+
+class RecordingPipeline:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return []
+
+
+class RecordingRedis:
+    def __init__(self):
+        self.calls = []
+
+    def pipeline(self):
+        return RecordingPipeline(self.calls)
+
+
+def test_duplicate_urls_are_dropped_in_order():
+    jobs = [{"url": "https://a"}, {"url": "https://b"}, {"url": "https://a"}]
+
+    assert dedupe_jobs(jobs) == [{"url": "https://a"}, {"url": "https://b"}]
+
+
+def test_files_and_urls_never_collide():
+    jobs = [{"filename": "1_a.mp4"}, {"url": "1_a.mp4"}, {"filename": "1_a.mp4"}]
+
+    assert dedupe_jobs(jobs) == [{"filename": "1_a.mp4"}, {"url": "1_a.mp4"}]
+
+
+def test_add_jobs_counts_a_duplicate_url_once(monkeypatch):
+    scheduler = BatchScheduler()
+    scheduler.redis = RecordingRedis()
+    monkeypatch.setattr(scheduler, "dispatch", lambda: None)
+
+    scheduler.add_jobs("b1", [{"url": "https://a"}, {"url": "https://a"}])
+
+    calls = {name: args for name, args, _ in scheduler.redis.calls}
+    assert [json.loads(job) for job in calls["rpush"][1:]] == [{"url": "https://a"}]
+    assert calls["hincrby"] == ("batch:b1", "total", 1)
@@ -0,0 +1,68 @@
+import threading
+import time
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("clip")
+
+import embed_server
+import model_registry
+from clip_backend import TorchCLIP
+from config import settings
+
+INPUT_SIZE = 8
+DIM = 4
+
+
+class TinyImageModel(torch.nn.Module):
+    """Stands in for the CLIP weights: TorchCLIP only calls encode_image()."""
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.proj = torch.nn.Linear(3 * INPUT_SIZE * INPUT_SIZE, DIM)
+
+    def encode_image(self, images):
+        return self.proj(images.flatten(1))
+
+
+def tiny_clip():
+    model = TorchCLIP.__new__(TorchCLIP)
+    model.model_name, model.device, model.tag = "tiny", "cpu", "tiny|torch"
+    model.model = TinyImageModel().eval()
+    model.input_size = INPUT_SIZE
+    return model
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    local = tiny_clip()
+    address = str(tmp_path / "embed.sock")
+    monkeypatch.setattr(settings, "EMBED_SERVER_AUTHKEY", "test-secret")
+    monkeypatch.setattr(model_registry, "local_clip", lambda model_name, device: local)
+
+    threading.Thread(target=embed_server.serve, args=(address,), daemon=True).start()
+    deadline = time.monotonic() + 5
+    while not (tmp_path / "embed.sock").exists():
+        assert time.monotonic() < deadline, "embedding server did not start"
+        time.sleep(0.01)
+    return address, local
+
+
+def test_torch_clip_accepts_arrays():
+    model = tiny_clip()
+    images = torch.randn(2, 3, INPUT_SIZE, INPUT_SIZE)
+
+    np.testing.assert_allclose(model.encode_images(images.numpy()), model.encode_images(images))
+
+
+def test_remote_images_round_trip(server):
+    address, local = server
+    remote = embed_server.RemoteCLIP(embed_server._RemoteCall(address), "tiny", "cpu")
+    images = torch.randn(3, 3, INPUT_SIZE, INPUT_SIZE)
+
+    embeddings = remote.encode_images(images)
+
+    assert remote.tag == "tiny|torch" and remote.input_size == INPUT_SIZE
+    assert embeddings.shape == (3, DIM) and embeddings.dtype == np.float32
+    np.testing.assert_allclose(embeddings, local.encode_images(images), rtol=1e-6)
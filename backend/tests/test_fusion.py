@@ -0,0 +1,122 @@
+import pytest
+from fusion import TemporalFusion, VISUAL, SPEECH, HYBRID
+
+K = 60
+
+
+def vision(video_id, timestamp):
+    return {"metadata": {"video_id": video_id, "timestamp": timestamp,
+                         "frame_path": f"{video_id}/frames/frame_{int(timestamp * 100):06d}.jpg"}}
+
+
+def speech(video_id, timestamp, text="hello"):
+    return {"metadata": {"video_id": video_id, "timestamp": timestamp, "end": timestamp + 2.0, "text": text}}
+
+
+def rrf(rank, weight=1.0):
+    return weight / (K + rank)
+
+
+@pytest.fixture
+def fusion():
+    return TemporalFusion(vision_weight=1.0, text_weight=1.0, rrf_k=K, bucket_seconds=5.0, match_window=2.0)
+
+
+def test_same_bucket_in_different_videos_is_not_merged(fusion):
+    results = fusion.fuse([vision("a", 1.0), vision("b", 1.5)], [], k=10)
+
+    assert [(r["video_id"], r["type"]) for r in results] == [("a", VISUAL), ("b", VISUAL)]
+    assert [r["score"] for r in results] == pytest.approx([rrf(1), rrf(2)])
+
+
+def test_same_bucket_in_one_video_is_merged(fusion):
+    results = fusion.fuse([vision("a", 1.0), vision("a", 3.0)], [], k=10)
+
+    assert len(results) == 1
+    assert results[0]["timestamp"] == 1.0  # Best-ranked hit represents the group
+    assert results[0]["score"] == pytest.approx(rrf(1) + rrf(2))
+
+
+def test_speech_within_window_makes_a_hybrid_hit(fusion):
+    results = fusion.fuse([vision("a", 10.0)], [speech("a", 11.5, "the answer")], k=10)
+
+    assert len(results) == 1
+    hit = results[0]
+    assert hit["type"] == HYBRID
+    assert hit["video_id"] == "a" and hit["timestamp"] == 10.0
+    assert hit["context"] == "Visual Match + Said: 'the answer...'"
+    assert hit["score"] == pytest.approx(rrf(1) + rrf(1))
+
+
+def test_speech_outside_window_stays_separate(fusion):
+    results = fusion.fuse([vision("a", 10.0)], [speech("a", 12.5)], k=10)
+
+    assert sorted(r["type"] for r in results) == sorted([VISUAL, SPEECH])
+    speech_hit = next(r for r in results if r["type"] == SPEECH)
+    assert speech_hit["timestamp"] == 12.5
+    assert speech_hit["end"] == 14.5
+    assert speech_hit["score"] == pytest.approx(rrf(1))
+
+
+def test_speech_never_matches_another_video(fusion):
+    results = fusion.fuse([vision("a", 10.0)], [speech("b", 10.0)], k=10)
+
+    assert {(r["video_id"], r["type"]) for r in results} == {("a", VISUAL), ("b", SPEECH)}
+
+
+def test_speech_matches_nearest_group():
+    fusion = TemporalFusion(vision_weight=1.0, text_weight=1.0, rrf_k=K, bucket_seconds=1.0, match_window=2.0)
+    results = fusion.fuse([vision("a", 10.0), vision("a", 13.0)], [speech("a", 11.8)], k=10)
+
+    by_ts = {r["timestamp"]: r for r in results}
+    assert by_ts[13.0]["type"] == HYBRID
+    assert by_ts[10.0]["type"] == VISUAL
+
+
+@pytest.mark.parametrize("vision_weight, text_weight, first", [(2.0, 1.0, VISUAL), (1.0, 2.0, SPEECH)])
+def test_weights_change_scores_and_order(vision_weight, text_weight, first):
+    fusion = TemporalFusion(vision_weight=vision_weight, text_weight=text_weight, rrf_k=K,
+                            bucket_seconds=5.0, match_window=2.0)
+    results = fusion.fuse([vision("a", 0.0)], [speech("b", 100.0)], k=10)
+
+    scores = {r["type"]: r["score"] for r in results}
+    assert scores[VISUAL] == pytest.approx(rrf(1, vision_weight))
+    assert scores[SPEECH] == pytest.approx(rrf(1, text_weight))
+    assert results[0]["type"] == first
+
+
+def test_top_k_keeps_rank_order_and_truncates(fusion):
+    v_hits = [vision("a", 10.0 * i) for i in range(6)]
+    results = fusion.fuse(v_hits, [], k=3)
+
+    assert [r["timestamp"] for r in results] == [0.0, 10.0, 20.0]
+    scores = [r["score"] for r in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_top_k_ties_keep_visual_first(fusion):
+    results = fusion.fuse([vision("a", 0.0)], [speech("b", 0.0)], k=1)
+
+    assert len(results) == 1
+    assert results[0]["type"] == VISUAL
+
+
+def test_k_zero_returns_nothing(fusion):
+    assert fusion.fuse([vision("a", 0.0)], [speech("a", 0.0)], k=0) == []
+
+
+def test_empty_inputs(fusion):
+    assert fusion.fuse([], [], k=5) == []
+
+    only_vision = fusion.fuse([vision("a", 0.0), vision("b", 0.0)], [], k=5)
+    assert [r["type"] for r in only_vision] == [VISUAL, VISUAL]
+
+    only_speech = fusion.fuse([], [speech("a", 0.0), speech("a", 30.0)], k=5)
+    assert [r["type"] for r in only_speech] == [SPEECH, SPEECH]
+    assert [r["timestamp"] for r in only_speech] == [0.0, 30.0]
+
+
+def test_frame_path_falls_back_to_filename(fusion):
+    hit = {"metadata": {"video_id": "a", "timestamp": 0.0, "filename": "frame_0000.jpg"}}
+
+    assert fusion.fuse([hit], [], k=1)[0]["frame_path"] == "a/frames/frame_0000.jpg"
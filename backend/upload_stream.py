@@ -0,0 +1,259 @@
+"""
+Streaming uploads: multipart/form-data request bodies are parsed as they
+arrive and every file part is piped straight into a MinIO multipart upload.
+Nothing is spooled to TEMP_DIR and memory per upload stays bounded
+(coalescing buffer + UPLOAD_QUEUE_CHUNKS + one MinIO part). The SHA-256 of
+each file is computed on the uploader thread while the bytes go past, and all
+blocking MinIO calls run on that thread, never on the event loop.
+upload_local_file() is the blocking variant for files already on disk.
+"""
+import asyncio
+import hashlib
+import os
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from python_multipart.multipart import MultipartParser, parse_options_header
+from config import settings
+from storage import storage
+from logger import log
+
+UPLOAD_PART_SIZE = 16 * 1024**2   # MinIO multipart part size (minimum 5 MB)
+UPLOAD_CHUNK = 1024**2            # Request bytes are coalesced into 1 MB hand-offs
+UPLOAD_QUEUE_CHUNKS = 8           # Hand-offs buffered per upload before the request is paused
+PUT_POLL_SECONDS = 0.5            # A full queue re-checks that the uploader is still alive this often
+MAX_FIELD_BYTES = 64 * 1024       # Non-file form fields (name, priority, ...) are read into memory
+
+_EOF = object()
+_uploaders = None
+_uploaders_guard = threading.Lock()
+
+def _pool():
+    # One thread per in-flight upload (it blocks on the network for the whole file)
+    global _uploaders
+    with _uploaders_guard:
+        if _uploaders is None:
+            _uploaders = ThreadPoolExecutor(max_workers=settings.UPLOAD_CONCURRENCY, thread_name_prefix="minio-upload")
+    return _uploaders
+
+# filename = client-side name; meta = whatever name_for() returned alongside the object name
+UploadResult = namedtuple("UploadResult", ["filename", "object_name", "size", "sha256", "meta"])
+
+class FieldTooLarge(ValueError):
+    """A non-file form field went over MAX_FIELD_BYTES."""
+
+class StreamingUpload:
+    """
+    File-like bridge: the event loop write()s chunks, MinIO's put_object
+    (length=-1, i.e. multipart) read()s them on an uploader thread. The
+    bounded queue gives backpressure, so a fast client cannot outrun MinIO.
+    """
+    def __init__(self, object_name, content_type="application/octet-stream"):
+        self.object_name = object_name
+        self.content_type = content_type
+        self._queue = queue.Queue(maxsize=UPLOAD_QUEUE_CHUNKS)
+        self._pending = bytearray()   # Event-loop side coalescing buffer
+        self._leftover = b""          # Uploader side: bytes of a chunk not read yet
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self._upload_future = _pool().submit(self._upload)  # Thread-safe view for _put_blocking
+        self._future = asyncio.wrap_future(self._upload_future)
+
+    # --- Uploader thread ---
+    def _upload(self):
+        storage.client.put_object(
+            settings.MINIO_BUCKET, self.object_name, self, length=-1,
+            part_size=UPLOAD_PART_SIZE, content_type=self.content_type,
+        )
+        return self._hash.hexdigest()
+
+    def read(self, size=-1):
+        while not self._leftover:
+            item = self._queue.get()
+            if item is _EOF:
+                self._queue.put(_EOF)  # Every later read() is EOF too
+                return b""
+            if isinstance(item, BaseException):
+                raise item             # put_object aborts the multipart upload
+            self._hash.update(item)
+            self._leftover = item
+        if size is None or size < 0:
+            size = len(self._leftover)
+        data, self._leftover = self._leftover[:size], self._leftover[size:]
+        return data
+
+    # --- Event loop side ---
+    def _check_uploader(self):
+        if self._upload_future.done():
+            self._upload_future.result()   # Uploader died: surface its error
+            raise IOError(f"Upload of {self.object_name} stopped early")
+
+    def _put_blocking(self, item):
+        # Nobody drains the queue once put_object has failed: never wait on it for good
+        while True:
+            self._check_uploader()
+            try:
+                self._queue.put(item, timeout=PUT_POLL_SECONDS)
+                return
+            except queue.Full:
+                pass
+
+    async def _put(self, item):
+        await asyncio.to_thread(self._put_blocking, item)
+
+    async def write(self, data):
+        self._pending += data
+        self.size += len(data)
+        if len(self._pending) >= UPLOAD_CHUNK:
+            chunk, self._pending = bytes(self._pending), bytearray()
+            await self._put(chunk)
+
+    async def finish(self):
+        if self._pending:
+            await self._put(bytes(self._pending))
+            self._pending = bytearray()
+        await self._put(_EOF)
+        return await self._future
+
+    async def abort(self, error=None):
+        if self._future.cancel():
+            return  # Uploader thread never started
+        try:
+            await self._put(error or ConnectionAbortedError("Client upload aborted"))
+        except Exception:
+            pass  # Uploader already gone
+        try:
+            await self._future
+        except Exception:
+            pass
+
+class _HashingFile:
+    """Read-only wrapper: hashes and counts what put_object reads from a local file."""
+    def __init__(self, f, on_read=None):
+        self._file = f
+        self._hash = hashlib.sha256()
+        self._on_read = on_read
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        self._hash.update(data)
+        self.size += len(data)
+        if self._on_read and data:
+            self._on_read(self.size)
+        return data
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+def upload_local_file(path, object_name, on_progress=None, content_type="video/mp4"):
+    """
+    Blocking: streams a finished local file (e.g. a yt-dlp download) into a
+    MinIO multipart upload part by part, hashing it on the way.
+    on_progress(bytes_sent, total). Returns (size, sha256).
+    """
+    total = os.path.getsize(path)
+    with open(path, "rb") as f:
+        reader = _HashingFile(f, on_read=on_progress and (lambda sent: on_progress(sent, total)))
+        storage.client.put_object(settings.MINIO_BUCKET, object_name, reader, length=total,
+                                  part_size=UPLOAD_PART_SIZE, content_type=content_type)
+    log.info(f"✅ Streamed to MinIO: {object_name} ({total / 1024**2:.1f} MB, sha256 {reader.hexdigest()[:12]})")
+    return total, reader.hexdigest()
+
+class _PartCollector:
+    """python-multipart callbacks -> a list of events the async side drains after each write()."""
+    def __init__(self):
+        self.events = []
+        self._field = b""
+        self._value = b""
+        self._headers = {}
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self._begin,
+            "on_header_field": lambda d, s, e: self._add("_field", d[s:e]),
+            "on_header_value": lambda d, s, e: self._add("_value", d[s:e]),
+            "on_header_end": self._header_end,
+            "on_headers_finished": lambda: self.events.append(("headers", self._headers)),
+            "on_part_data": lambda d, s, e: self.events.append(("data", d[s:e])),
+            "on_part_end": lambda: self.events.append(("end", None)),
+        }
+
+    def _add(self, attr, data):
+        setattr(self, attr, getattr(self, attr) + data)
+
+    def _begin(self):
+        self._headers = {}
+
+    def _header_end(self):
+        self._headers[self._field.lower()] = self._value
+        self._field, self._value = b"", b""
+
+    def drain(self):
+        events, self.events = self.events, []
+        return events
+
+async def _remove_objects(results):
+    for result in results:
+        try:
+            await asyncio.to_thread(storage.client.remove_object, settings.MINIO_BUCKET, result.object_name)
+        except Exception as e:
+            log.error(f"❌ Could not remove {result.object_name}: {e}")
+
+async def receive_uploads(request, name_for):
+    """
+    Streams a multipart/form-data request. Every file part goes to MinIO under
+    the object name from name_for(filename) -> (object_name, meta).
+    Returns ({field: value}, [UploadResult]). If the request fails part-way,
+    the files it already stored are removed again before the error propagates.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise ValueError("Expected a multipart/form-data body")
+
+    collector = _PartCollector()
+    parser = MultipartParser(params[b"boundary"], callbacks=collector.callbacks())
+    fields, results = {}, []
+    upload, part = None, None   # Current file upload / current field name + value
+    filename, meta = None, None
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for kind, payload in collector.drain():
+                if kind == "headers":
+                    _, disposition = parse_options_header(payload.get(b"content-disposition", b""))
+                    filename = disposition.get(b"filename")
+                    if filename is not None:
+                        filename = filename.decode("utf-8", "replace")
+                        object_name, meta = name_for(filename)
+                        upload = StreamingUpload(object_name, payload.get(b"content-type", b"application/octet-stream").decode())
+                    else:
+                        part = [disposition.get(b"name", b"").decode(), bytearray()]
+                elif kind == "data":
+                    if upload is not None:
+                        await upload.write(payload)
+                    elif part is not None:
+                        part[1] += payload
+                        if len(part[1]) > MAX_FIELD_BYTES:
+                            raise FieldTooLarge(f"Form field '{part[0]}' is over {MAX_FIELD_BYTES // 1024} KB")
+                elif kind == "end":
+                    if upload is not None:
+                        digest = await upload.finish()
+                        results.append(UploadResult(filename, upload.object_name, upload.size, digest, meta))
+                        log.info(f"✅ Streamed to MinIO: {upload.object_name} ({upload.size / 1024**2:.1f} MB, sha256 {digest[:12]})")
+                        upload = None
+                    elif part is not None:
+                        fields[part[0]] = part[1].decode("utf-8", "replace")
+                        part = None
+        parser.finalize()
+    except BaseException as e:
+        if upload is not None:
+            log.warning(f"⚠️ Upload of {upload.object_name} aborted: {e}")
+            await upload.abort()
+        if results:
+            log.warning(f"⚠️ Removing {len(results)} files already stored by the failed request")
+            await _remove_objects(results)
+        raise
+    return fields, results
@@ -1,36 +1,43 @@
 import os
+import random
 import redis
-from celery import Celery
+import threading
 from pathlib import Path
 from ingest import VideoProcessor
+from pipeline import StageGraph
 from embed_audio import AudioTranscriber
 from embed_vision import VisionEmbedder
 from embed_text import TextEmbedder
 from db import db
 from storage import storage
+from catalog import catalog, title_from_filename
+from manifest import manifest
+from batches import batches
 from logger import log
 from config import settings
-from llm_engine import summarize_video, ask_question, generate_chapters, generate_synthetic_data
+from tasks import celery_app, enqueue_video, INTERACTIVE_PRIORITY
+from llm_engine import summarize_video, ask_question, generate_chapters, generate_synthetic_data, ensure_model
+from celery.exceptions import Ignore
+from celery.signals import worker_process_init
 
 MODEL_CACHE = {}
+MODEL_LOCKS = {}
+_MODEL_LOCKS_GUARD = threading.Lock()
 
 def get_model(model_class, *args):
-    key = model_class.__name__
-    if key not in MODEL_CACHE:
-        log.info(f"🧠 Loading Model: {key}...")
-        MODEL_CACHE[key] = model_class(*args)
+    """
+    Per-process embedder wrappers, keyed by class AND arguments. The weights
+    themselves live in model_registry (keyed by model, size, device, precision).
+    """
+    key = (model_class.__name__,) + args
+    # Pipeline branches run on separate threads: build each wrapper exactly once
+    with _MODEL_LOCKS_GUARD:
+        lock = MODEL_LOCKS.setdefault(key, threading.Lock())
+    with lock:
+        if key not in MODEL_CACHE:
+            MODEL_CACHE[key] = model_class(*args)
     return MODEL_CACHE[key]
 
-# Redis Config
-celery_app = Celery("reel_worker", broker=f"redis://{settings.REDIS_HOST}:6379/0", backend=f"redis://{settings.REDIS_HOST}:6379/0")
-celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
-    timezone="UTC",
-    enable_utc=True,
-)
-
 redis_client = redis.Redis(host=settings.REDIS_HOST, port=6379, db=0, decode_responses=True)
 
 def update_status(filename, percent, message):
@@ -45,7 +52,47 @@ def check_cancel_signal(filename):
         log.warning(f"🛑 Worker detected CANCEL signal for {filename}. Aborting task.")
         raise InterruptedError("Processing Cancelled by User")
 
-@celery_app.task(bind=True)
+# MinIO objects each stage leaves behind (relative to <video_id>/); the
+# manifest only trusts a finished stage while these still exist.
+STAGE_ARTIFACTS = {
+    "audio": ["audio.wav"],
+    "transcribe": ["transcript.json"],
+    "frames": ["timestamps.json"],
+}
+
+def tracked(vid_id, stage, fn, also=()):
+    """Runs a stage and records it (plus any stages it subsumes) in the manifest."""
+    def run():
+        result = fn()
+        for name in (*also, stage):
+            manifest.mark_done(vid_id, name, [f"{vid_id}/{a}" for a in STAGE_ARTIFACTS.get(name, [])])
+        return result
+    return run
+
+def retry_delay(retries):
+    """Exponential backoff with jitter: base * 2^retries, capped."""
+    delay = min(settings.INGEST_RETRY_BACKOFF * 2 ** retries, settings.INGEST_RETRY_BACKOFF_MAX)
+    return int(random.uniform(delay / 2, delay))
+
+def handle_failure(task, filename, e):
+    """
+    A missing source cannot fix itself; anything else (Qdrant / MinIO / LLM
+    hiccups) is retried with backoff and resumes after the last finished stage.
+    """
+    vid_id = Path(filename).stem
+    if not isinstance(e, FileNotFoundError) and task.request.retries < task.max_retries:
+        delay = retry_delay(task.request.retries)
+        log.warning(f"🔁 {filename} failed in {task.name} ({e}). Retry {task.request.retries + 1}/{task.max_retries} in {delay}s")
+        update_status(filename, 0, f"Retrying in {delay}s after error: {str(e)}")
+        catalog.update(vid_id, status="retrying")
+        raise task.retry(exc=e, countdown=delay)
+    log.error(f"💥 CRITICAL FAILURE on {filename}: {e}")
+    update_status(filename, -1, f"Failed: {str(e)}")
+    catalog.update(vid_id, status="failed")
+    batches.finish(filename, ok=False)
+    raise e
+
+@celery_app.task(bind=True, max_retries=settings.INGEST_MAX_RETRIES)
 def process_video_task(self, filename: str):
     vid_id = Path(filename).stem
     processor = None
@@ -53,48 +100,267 @@ def process_video_task(self, filename: str):
     try:
         log.info(f"Starting processing for {filename}")
         check_cancel_signal(filename) # 🛑 Check 1
-        
-        # 1. Ingest
-        update_status(filename, 10, "Extracting Frames & Audio...")
-        # Pass a lambda that calls our existing check function
-        processor = VideoProcessor(filename, cancel_callback=lambda: check_cancel_signal(filename))
-        processor.process()
-
-        check_cancel_signal(filename) # 🛑 Check 2
+        catalog.update(vid_id, status="processing")
 
-        # 2. Transcribe
-        update_status(filename, 40, "Transcribing Audio...")
-        get_model(AudioTranscriber, "base").transcribe(vid_id)
+        # Stages finished by an earlier attempt are skipped (resume)
+        done = manifest.completed(vid_id)
+        if done:
+            log.info(f"⏩ Resuming {vid_id}: already done {sorted(done)}")
         
-        check_cancel_signal(filename) # 🛑 Check 3
+        # The pipeline is a dependency graph: the audio branch (audio -> Whisper -> MiniLM)
+        # runs concurrently with the visual branch (frames -> CLIP).
+        # Every stage start and every scene re-checks the cancel flag via graph.check.
+        graph = StageGraph(
+            on_progress=lambda pct, msg: update_status(filename, pct, msg),
+            cancel_check=lambda: check_cancel_signal(filename),
+        )
+        processor = VideoProcessor(filename, cancel_callback=graph.check)
 
-        # 3. Embed Text
-        update_status(filename, 60, "Embedding Transcript...")
-        get_model(TextEmbedder).process_transcripts(vid_id)
+        # 1. Audio Branch
+        graph.add("audio", tracked(vid_id, "audio", processor.extract_audio), "Extracting Audio", weight=5,
+                  done="audio" in done)
+        # Stream handoff embeds Whisper segments while transcription is still running
+        # (unless an earlier attempt already left transcript.json in MinIO)
+        if settings.TRANSCRIPT_HANDOFF == "stream" and "transcribe" not in done:
+            graph.add("embed_text", tracked(vid_id, "embed_text", lambda: get_model(TextEmbedder).process_segment_stream(
+                          vid_id, get_model(AudioTranscriber, "base").stream_segments(vid_id)), also=("transcribe",)),
+                      "Transcribing & Embedding Audio", weight=35, after=("audio",), done="embed_text" in done)
+        else:
+            graph.add("transcribe", tracked(vid_id, "transcribe", lambda: get_model(AudioTranscriber, "base").transcribe(vid_id)),
+                      "Transcribing Audio", weight=30, after=("audio",), done="transcribe" in done)
+            graph.add("embed_text", tracked(vid_id, "embed_text", lambda: get_model(TextEmbedder).process_transcripts(vid_id)),
+                      "Embedding Transcript", weight=5, after=("transcribe",), done="embed_text" in done)
 
-        check_cancel_signal(filename) # 🛑 Check 4
+        # 2. Visual Branch
+        # Memory handoff streams frames into CLIP while they are decoded
+        # (unless an earlier attempt already uploaded the frames)
+        if settings.FRAME_HANDOFF == "memory" and "frames" not in done:
+            graph.add("embed_vision", tracked(vid_id, "embed_vision", lambda: get_model(VisionEmbedder).process_frame_stream(
+                          vid_id, processor.stream_frames()), also=("frames",)),
+                      "Extracting & Embedding Visuals", weight=45, done="embed_vision" in done)
+        else:
+            graph.add("frames", tracked(vid_id, "frames", processor.extract_frames), "Extracting Frames", weight=15,
+                      done="frames" in done)
+            graph.add("embed_vision", tracked(vid_id, "embed_vision", lambda: get_model(VisionEmbedder).process_video_frames(vid_id)),
+                      "Embedding Visuals", weight=30, after=("frames",), done="embed_vision" in done)
 
-        # 4. Embed Vision
-        update_status(filename, 70, "Embedding Visuals...")
-        get_model(VisionEmbedder).process_video_frames(vid_id)
+        # 3. [NEW] Generate Training Data (only needs the transcript)
+        graph.add("synthetic", tracked(vid_id, "synthetic", lambda: generate_synthetic_data(vid_id)),
+                  "Generating QLoRA Data", weight=10, after=("embed_text",), done="synthetic" in done)
 
-        # 5. [NEW] Generate Training Data
-        update_status(filename, 90, "Generating QLoRA Data...")
-        generate_synthetic_data(vid_id)
+        graph.run()
 
+        duration = manifest.meta(vid_id).get("duration")
+        if duration is None:
+            duration = processor.probe_duration()
+            manifest.set_meta(vid_id, duration=duration)
+        catalog.upsert(vid_id, status="ready", duration=duration, **db.video_stats(vid_id))
         update_status(filename, 100, "Processing Complete! Ready to Search.")
+        batches.finish(filename, ok=True)
         return "Done"
 
     except InterruptedError:
         # ✨ Handle User Cancellation gracefully
         log.info(f"✅ Clean cancellation for {filename}")
         update_status(filename, -1, "Cancelled by User")
+        batches.finish(filename, ok=False)
 
     except Exception as e:
-        log.error(f"💥 CRITICAL FAILURE on {filename}: {e}")
-        update_status(filename, -1, f"Failed: {str(e)}")
-        raise e
+        handle_failure(self, filename, e)
         
     finally:
         if processor:
-            processor.cleanup()
\ No newline at end of file
+            processor.cleanup()
+
+# ==========================================
+# 🧵 STAGED PIPELINE (PIPELINE_MODE=staged)
+# ==========================================
+# One task per stage, routed to its own queue (tasks.STAGE_TASKS). Stages hand
+# over through MinIO artifacts (disk / file handoff), so any worker on any host
+# can pick up the next step; the manifest makes every task resumable.
+
+STAGE_WEIGHTS = {"audio": 5, "frames": 15, "transcribe": 30, "embed_text": 5, "embed_vision": 30, "synthetic": 10}
+
+def staged_progress(filename, vid_id):
+    """Overall % from the manifest, since stage tasks of one video run on different workers."""
+    def report(_, message):
+        finished = manifest.load(vid_id)
+        done = sum(w for stage, w in STAGE_WEIGHTS.items() if stage in finished)
+        update_status(filename, 10 + 85 * done // sum(STAGE_WEIGHTS.values()), message)
+    return report
+
+def run_stages(task, filename, steps, owns):
+    """
+    Body of every stage task: steps(processor) -> [(stage, fn, label, after)]
+    run on a StageGraph, skipping stages the manifest already has. Only the
+    temp files in `owns` are cleaned up: parallel stage tasks of the same
+    video may share TEMP_DIR.
+    """
+    vid_id = Path(filename).stem
+    processor = None
+    try:
+        check_cancel_signal(filename)
+        catalog.update(vid_id, status="processing")
+        done = manifest.completed(vid_id)
+        graph = StageGraph(
+            on_progress=staged_progress(filename, vid_id),
+            cancel_check=lambda: check_cancel_signal(filename),
+        )
+        processor = VideoProcessor(filename, cancel_callback=graph.check)
+        for stage, fn, label, after in steps(processor):
+            graph.add(stage, tracked(vid_id, stage, fn), label, weight=STAGE_WEIGHTS[stage], after=after,
+                      done=stage in done)
+        graph.run()
+
+    except InterruptedError:
+        log.info(f"✅ Clean cancellation for {filename}")
+        update_status(filename, -1, "Cancelled by User")
+        batches.finish(filename, ok=False)
+        raise Ignore()  # Stops the rest of the chain
+
+    except Exception as e:
+        handle_failure(task, filename, e)
+
+    finally:
+        if processor:
+            processor.cleanup(parts=owns)
+
+def _decode_steps(processor):
+    def frames():
+        processor.extract_frames()
+        # Source is local right now; later stages never need it again
+        manifest.set_meta(processor.video_id, duration=processor.probe_duration())
+    return [
+        ("audio", processor.extract_audio, "Extracting Audio", ()),
+        ("frames", frames, "Extracting Frames", ()),
+    ]
+
+@celery_app.task(bind=True, max_retries=settings.INGEST_MAX_RETRIES)
+def decode_task(self, filename: str):
+    run_stages(self, filename, _decode_steps, owns=("source", "frames", "audio"))
+
+@celery_app.task(bind=True, max_retries=settings.INGEST_MAX_RETRIES)
+def transcribe_task(self, filename: str):
+    run_stages(self, filename, lambda p: [
+        ("transcribe", lambda: get_model(AudioTranscriber, "base").transcribe(p.video_id), "Transcribing Audio", ()),
+    ], owns=("audio", "transcript"))
+
+@celery_app.task(bind=True, max_retries=settings.INGEST_MAX_RETRIES)
+def text_embed_task(self, filename: str):
+    run_stages(self, filename, lambda p: [
+        ("embed_text", lambda: get_model(TextEmbedder).process_transcripts(p.video_id), "Embedding Transcript", ()),
+    ], owns=("transcript",))
+
+@celery_app.task(bind=True, max_retries=settings.INGEST_MAX_RETRIES)
+def vision_embed_task(self, filename: str):
+    run_stages(self, filename, lambda p: [
+        ("embed_vision", lambda: get_model(VisionEmbedder).process_video_frames(p.video_id), "Embedding Visuals", ()),
+    ], owns=("frames",))
+
+@celery_app.task(bind=True, max_retries=settings.INGEST_MAX_RETRIES)
+def llm_task(self, filename: str):
+    run_stages(self, filename, lambda p: [
+        ("synthetic", lambda: generate_synthetic_data(p.video_id), "Generating QLoRA Data", ()),
+    ], owns=("transcript",))
+
+@celery_app.task
+def finalize_task(filename: str):
+    vid_id = Path(filename).stem
+    duration = manifest.meta(vid_id).get("duration", 0.0)
+    catalog.upsert(vid_id, status="ready", duration=duration, **db.video_stats(vid_id))
+    update_status(filename, 100, "Processing Complete! Ready to Search.")
+    batches.finish(filename, ok=True)
+    return "Done"
+
+# Share of the progress bar for a URL job before the pipeline's own 10%+
+DOWNLOAD_SHARE, UPLOAD_SHARE = 8, 2
+
+@celery_app.task(bind=True, max_retries=settings.INGEST_MAX_RETRIES)
+def download_task(self, url: str, job_id: str = None, batch_id: str = None, priority: int = INTERACTIVE_PRIORITY):
+    """
+    URL job: yt-dlp download -> MinIO source.mp4 -> the ingest pipeline.
+    Progress and cancel signals use the job id until the filename is known.
+    """
+    from download import download_video
+    from jobs import jobs
+    from upload_stream import upload_local_file
+    from yt_dlp.utils import DownloadCancelled
+    job_id = job_id or jobs.create(url, batch_id)
+    local_path = None
+
+    def cancelled():
+        return bool(redis_client.exists(f"cancel:{job_id}"))
+
+    try:
+        jobs.update(job_id, status="downloading")
+        filename = download_video(
+            url,
+            on_progress=lambda fraction, message: update_status(job_id, int(DOWNLOAD_SHARE * fraction), message),
+            should_stop=cancelled,
+        )
+        local_path = settings.TEMP_DIR / filename
+        video_id = Path(filename).stem
+
+        jobs.update(job_id, status="uploading")
+        update_status(job_id, DOWNLOAD_SHARE, "Uploading to Cloud...")
+        size, sha256 = upload_local_file(
+            local_path, f"{video_id}/source.mp4",
+            on_progress=lambda sent, total: update_status(job_id, DOWNLOAD_SHARE + UPLOAD_SHARE * sent // max(total, 1),
+                                                          f"Uploading to Cloud... {sent / 1024**2:.0f}/{total / 1024**2:.0f} MB"),
+        )
+        # From here on /progress and /cancel of the job id follow the filename
+        update_status(filename, DOWNLOAD_SHARE + UPLOAD_SHARE, "Uploaded to Cloud.")
+        jobs.update(job_id, filename=filename, size=size)
+        if cancelled():
+            storage.delete_folder(f"{video_id}/")
+            raise DownloadCancelled("Download cancelled by user")
+    except DownloadCancelled:
+        log.info(f"✅ Clean cancellation for download {job_id} ({url})")
+        jobs.update(job_id, status="cancelled")
+        update_status(job_id, -1, "Cancelled by User")
+        if batch_id:
+            batches.finish(batch_id=batch_id, url=url, ok=False)
+        raise Ignore()
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            delay = retry_delay(self.request.retries)
+            log.warning(f"🔁 Download of {url} failed ({e}). Retry {self.request.retries + 1}/{self.max_retries} in {delay}s")
+            update_status(job_id, 0, f"Retrying in {delay}s after error: {str(e)}")
+            raise self.retry(exc=e, countdown=delay, kwargs={"job_id": job_id, "batch_id": batch_id, "priority": priority})
+        log.error(f"💥 Download failed for {url}: {e}")
+        jobs.update(job_id, status="failed", error=str(e))
+        update_status(job_id, -1, f"Failed: {str(e)}")
+        if batch_id:
+            batches.finish(batch_id=batch_id, url=url, ok=False)
+        raise
+    finally:
+        if local_path is not None and local_path.exists():
+            os.remove(local_path)
+
+    catalog.upsert(video_id, title=title_from_filename(filename), status="queued", sha256=sha256)
+    update_status(filename, 10, "Queued for AI Processing...")
+    jobs.update(job_id, status="downloaded")
+    if batch_id:
+        batches.downloaded(batch_id, url, filename)
+    enqueue_video(filename, priority=priority)
+    return filename
+
+# --- Per-queue model preload (WORKER_PRELOAD) ---
+PRELOADERS = {
+    "clip": lambda: get_model(VisionEmbedder),
+    "whisper": lambda: get_model(AudioTranscriber, "base").model,
+    "minilm": lambda: get_model(TextEmbedder),
+    "llm": ensure_model,
+}
+
+@worker_process_init.connect
+def preload_models(**_):
+    """Loads this worker's models in each pool process before it takes a task."""
+    for name in filter(None, (n.strip() for n in settings.WORKER_PRELOAD.split(","))):
+        if name not in PRELOADERS:
+            log.warning(f"⚠️ Unknown WORKER_PRELOAD entry '{name}' (expected: {', '.join(PRELOADERS)})")
+            continue
+        try:
+            PRELOADERS[name]()
+        except Exception as e:
+            log.error(f"❌ Preload of {name} failed: {e}")
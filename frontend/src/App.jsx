@@ -137,8 +137,15 @@ function App() {
 
   const fetchVideos = async () => {
     try {
-      const res = await axios.get(`${API_URL}/videos`);
-      const cleanList = (res.data.videos || []).filter(v => typeof v !== 'string');
+      // /videos is paginated (max 500 per page): walk the pages
+      const pageSize = 500;
+      let all = [];
+      for (let offset = 0; ; offset += pageSize) {
+        const res = await axios.get(`${API_URL}/videos`, { params: { offset, limit: pageSize } });
+        all = all.concat(res.data.videos || []);
+        if ((res.data.videos || []).length < pageSize || all.length >= res.data.total) break;
+      }
+      const cleanList = all.filter(v => typeof v !== 'string');
       setVideoList(cleanList);
 
       // Set initial summary video if not set
@@ -93,7 +93,8 @@ const UploadSection = ({
         filename = res.data.filename;
       } else {
         const res = await axios.post(`${API_URL}/process_url`, { url });
-        filename = res.data.filename;
+        // Download runs in the background; progress / cancel accept the job id
+        filename = res.data.job_id;
       }
 
       // ✨ NEW: Save filename so we can cancel it later if needed